@@ -0,0 +1,16 @@
+"""
+Benchmarks for the backend's hot paths, run from the backend directory:
+
+    python -m benchmarks.bulk_admin         # per-user vs bulk admin updates
+    python -m benchmarks.stats_snapshot     # snapshot startup and first-request latency
+    python -m benchmarks.prepared_statements  # plain vs prepared user lookups
+    python -m benchmarks.binary_ids         # VARCHAR(36) uuid4 vs BINARY(16) uuid7 match keys
+
+They use the databases configured in .env and clean up the rows they create.
+"""
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Repositories read their settings at import time
+load_dotenv(Path(__file__).parent.parent / '.env')
@@ -0,0 +1,120 @@
+"""
+VARCHAR(36) random UUIDs vs BINARY(16) UUIDv7 keys for cs2_matches
+
+Creates two throwaway copies of the cs2_matches layout (without the users foreign
+key) that differ only in the id column:
+
+- varchar: id VARCHAR(36) filled with uuid4 strings, the schema before 0007
+- binary: id BINARY(16) filled with uuid7 bytes, the current schema
+
+inserts `--rows` matches into each in `--batch`-sized executemany calls, and
+reports insert throughput and the table's data and index size from
+information_schema after ANALYZE TABLE. Both tables are dropped afterwards.
+
+    python -m benchmarks.binary_ids --rows 1000000 --batch 1000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from database.mysql import mysql_db
+from models.ids import uuid7
+
+TABLE_LAYOUT = """
+    CREATE TABLE {table} (
+        id {id_type} PRIMARY KEY,
+        user_id VARCHAR(36) NOT NULL,
+        match_date DATETIME NOT NULL,
+        game_mode VARCHAR(20) NOT NULL,
+        map_name VARCHAR(20) NOT NULL,
+        result VARCHAR(10) NOT NULL,
+        kills INT DEFAULT 0,
+        deaths INT DEFAULT 0,
+        assists INT DEFAULT 0,
+        score INT DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_user_match_date (user_id, match_date, id),
+        INDEX idx_match_date (match_date)
+    )
+"""
+
+VARIANTS: Dict[str, tuple] = {
+    "varchar": ("bench_ids_varchar", "VARCHAR(36)", lambda: str(uuid.uuid4())),
+    "binary": ("bench_ids_binary", "BINARY(16)", lambda: uuid7().bytes),
+}
+
+def _rows(count: int, new_key: Callable, user_ids: List[str], seed: int = 7) -> List[tuple]:
+    rng = random.Random(seed)
+    started = datetime(2025, 1, 1)
+    return [
+        (new_key(), rng.choice(user_ids), started + timedelta(minutes=index),
+         rng.choice(["competitive", "premier", "casual"]), rng.choice(["de_dust2", "de_mirage", "de_inferno"]),
+         rng.choice(["win", "loss", "tie"]), rng.randint(0, 40), rng.randint(0, 30), rng.randint(0, 15),
+         rng.randint(0, 100))
+        for index in range(count)
+    ]
+
+async def _run_variant(cursor, name: str, rows: int, batch: int, user_ids: List[str]) -> Dict[str, float]:
+    table, id_type, new_key = VARIANTS[name]
+    await cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    await cursor.execute(TABLE_LAYOUT.format(table=table, id_type=id_type))
+
+    elapsed = 0.0
+    for offset in range(0, rows, batch):
+        # Generate outside the timed section: only the inserts are measured
+        chunk = _rows(min(batch, rows - offset), new_key, user_ids, seed=offset)
+        started = time.perf_counter()
+        await cursor.executemany(
+            f"""INSERT INTO {table} (id, user_id, match_date, game_mode, map_name, result, kills, deaths, assists, score)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+            chunk
+        )
+        await cursor.connection.commit()
+        elapsed += time.perf_counter() - started
+
+    await cursor.execute(f"ANALYZE TABLE {table}")
+    await cursor.fetchall()
+    await cursor.execute(
+        """SELECT data_length, index_length FROM information_schema.tables
+           WHERE table_schema = DATABASE() AND table_name = %s""",
+        (table,)
+    )
+    data_length, index_length = await cursor.fetchone()
+    return {
+        "rows_per_s": rows / elapsed,
+        "data_mib": data_length / 2**20,
+        "index_mib": index_length / 2**20,
+    }
+
+async def main(rows: int, batch: int, users: int, keep: bool):
+    await mysql_db.connect()
+    if not mysql_db.pool:
+        raise SystemExit("MySQL is not available")
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    try:
+        async with mysql_db.write_connection() as conn, conn.cursor() as cursor:
+            print(f"{rows} rows in batches of {batch}, {users} players")
+            for name in VARIANTS:
+                result = await _run_variant(cursor, name, rows, batch, user_ids)
+                print(
+                    f"{name:>8}: {result['rows_per_s']:9.0f} rows/s   "
+                    f"data {result['data_mib']:8.1f} MiB   secondary indexes {result['index_mib']:8.1f} MiB"
+                )
+            if not keep:
+                for table, _, _ in VARIANTS.values():
+                    await cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    finally:
+        await mysql_db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare VARCHAR(36) uuid4 and BINARY(16) uuid7 match keys")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--keep", action="store_true", help="leave the tables in place for inspection")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch, args.users, args.keep))
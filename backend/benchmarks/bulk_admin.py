@@ -0,0 +1,163 @@
+"""
+Per-user vs bulk admin updates
+
+Seeds `--users` throwaway accounts, then times changing all of their roles,
+statuses and tiers:
+
+- per user: the old route flow (load target, update one row, load the acting
+  admin again, insert one audit entry)
+- bulk: one IN lookup, one UPDATE ... WHERE id IN (...), one batched audit write
+
+Runs against MySQL when it is reachable, otherwise the MongoDB fallback, and deletes
+everything it created.
+
+    python -m benchmarks.bulk_admin --users 1000 --rounds 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from database.mysql import mysql_db
+from models.admin import AdminActivityLog, DonationTier
+from models.user import User, UserRole
+from repositories.admin import admin_repository
+from repositories.user import user_repository
+from services.audit_log import audit_log_writer
+
+PREFIX = "bench_bulk_"
+
+def _seed_users(count: int) -> List[User]:
+    # A fixed dummy hash: bcrypt would dominate the seeding time
+    return [
+        User(
+            username=f"{PREFIX}{index}",
+            email=f"{PREFIX}{index}@example.com",
+            password_hash="x",
+            display_name=f"Bulk bench {index}",
+            role=UserRole.ADMIN if index == 0 else UserRole.MEMBER
+        )
+        for index in range(count)
+    ]
+
+async def _insert_users(users: List[User]):
+    if mysql_db.pool:
+        async with mysql_db.write_connection() as conn, conn.cursor() as cursor:
+            await cursor.executemany(
+                """INSERT INTO users (id, username, email, password_hash, display_name, role,
+                                      is_active, is_verified, created_at, updated_at, login_count)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                [(user.id, user.username, user.email, user.password_hash, user.display_name, user.role.value,
+                  user.is_active, user.is_verified, user.created_at, user.updated_at, 0) for user in users]
+            )
+            await cursor.executemany(
+                "INSERT INTO user_preferences (user_id, language) VALUES (%s, %s)",
+                [(user.id, "en") for user in users]
+            )
+        return
+    await user_repository.users_collection.insert_many([
+        {**user.dict(exclude={"preferences"}), "role": user.role.value, "preferences": user.preferences.dict()}
+        for user in users
+    ])
+
+async def _cleanup(user_ids: List[str]):
+    if mysql_db.pool:
+        async with mysql_db.write_connection() as conn, conn.cursor() as cursor:
+            placeholders = ", ".join(["%s"] * len(user_ids))
+            await cursor.execute(f"DELETE FROM user_preferences WHERE user_id IN ({placeholders})", user_ids)
+            await cursor.execute(f"DELETE FROM users WHERE id IN ({placeholders})", user_ids)
+    else:
+        await user_repository.users_collection.delete_many({"id": {"$in": user_ids}})
+    await admin_repository.donations_collection.delete_many({"user_id": {"$in": user_ids}})
+    await admin_repository.user_tiers_collection.delete_many({"_id": {"$in": user_ids}})
+    await admin_repository.activity_logs_collection.delete_many({"admin_user_id": user_ids[0]})
+
+async def _old_audit_entry(admin_id: str, action: str, target_id: str, details: Dict):
+    """The audit write as it was before batching: admin lookup plus insert_one"""
+    admin = await user_repository.get_user_by_id(admin_id)
+    await admin_repository.activity_logs_collection.insert_one(AdminActivityLog(
+        admin_user_id=admin_id, admin_username=admin.username, action=action,
+        target_type="user", target_id=target_id, details=details
+    ).dict())
+
+async def per_user_role(admin: User, user_ids: List[str], role: str):
+    for user_id in user_ids:
+        target = await user_repository.get_user_by_id(user_id)
+        await user_repository.update_user_role(user_id, role)
+        await _old_audit_entry(admin.id, "update_role", user_id, {"old_role": target.role.value, "new_role": role})
+
+async def bulk_role(admin: User, user_ids: List[str], role: str):
+    targets = await user_repository.get_users_by_ids(user_ids)
+    await user_repository.update_users_role(list(targets), role)
+    await admin_repository.log_admin_activities(admin, [
+        {"action": "update_role", "target_type": "user", "target_id": user_id,
+         "details": {"old_role": target.role.value, "new_role": role, "bulk": True}}
+        for user_id, target in targets.items()
+    ])
+    await audit_log_writer.flush()
+
+async def per_user_status(admin: User, user_ids: List[str], is_active: bool):
+    for user_id in user_ids:
+        target = await user_repository.get_user_by_id(user_id)
+        await user_repository.update_user_status(user_id, is_active)
+        await _old_audit_entry(admin.id, "update_status", user_id, {"old_status": target.is_active, "new_status": is_active})
+
+async def bulk_status(admin: User, user_ids: List[str], is_active: bool):
+    targets = await user_repository.get_users_by_ids(user_ids)
+    await user_repository.update_users_status(list(targets), is_active)
+    await admin_repository.log_admin_activities(admin, [
+        {"action": "update_status", "target_type": "user", "target_id": user_id,
+         "details": {"old_status": target.is_active, "new_status": is_active, "bulk": True}}
+        for user_id, target in targets.items()
+    ])
+    await audit_log_writer.flush()
+
+async def per_user_tier(admin: User, user_ids: List[str], tier: DonationTier):
+    for user_id in user_ids:
+        await user_repository.get_user_by_id(user_id)
+        await admin_repository.assign_user_tier(user_id, tier, admin)
+    await audit_log_writer.flush()
+
+async def bulk_tier(admin: User, user_ids: List[str], tier: DonationTier):
+    targets = await user_repository.get_users_by_ids(user_ids)
+    await admin_repository.assign_user_tiers(list(targets), tier, admin)
+    await audit_log_writer.flush()
+
+async def _time(rounds: int, run: Callable[[int], Awaitable]) -> List[float]:
+    timings = []
+    for round_index in range(rounds):
+        started = time.perf_counter()
+        await run(round_index)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+async def main(users: int, rounds: int):
+    await mysql_db.connect()
+    backend = "MySQL" if mysql_db.pool else "MongoDB"
+    seeded = _seed_users(users + 1)
+    admin, targets = seeded[0], [user.id for user in seeded[1:]]
+    await _insert_users(seeded)
+    try:
+        roles = [UserRole.MODERATOR.value, UserRole.MEMBER.value]
+        tiers = [DonationTier.SILVER, DonationTier.GOLD]
+        cases = [
+            ("role", lambda r: per_user_role(admin, targets, roles[r % 2]), lambda r: bulk_role(admin, targets, roles[r % 2])),
+            ("status", lambda r: per_user_status(admin, targets, r % 2 == 1), lambda r: bulk_status(admin, targets, r % 2 == 1)),
+            ("tier", lambda r: per_user_tier(admin, targets, tiers[r % 2]), lambda r: bulk_tier(admin, targets, tiers[r % 2])),
+        ]
+        print(f"{backend}, {users} users, median of {rounds} rounds")
+        for name, per_user, bulk in cases:
+            single = statistics.median(await _time(rounds, per_user))
+            batched = statistics.median(await _time(rounds, bulk))
+            print(f"{name:>6}: per-user {single * 1000:9.1f} ms   bulk {batched * 1000:8.1f} ms   {single / batched:6.1f}x")
+    finally:
+        await _cleanup([user.id for user in seeded])
+        await mysql_db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-user and bulk admin updates")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.rounds))
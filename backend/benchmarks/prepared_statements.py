@@ -0,0 +1,106 @@
+"""
+Plain queries vs server-side prepared statements for the user lookup
+
+The app does not use prepared statements; this measures what they would buy.
+aiomysql only speaks the text protocol, so the prepared path here is SQL-level
+PREPARE once per connection, then `SET @bench_id = ...` and `EXECUTE ... USING @bench_id` per
+lookup (two round trips; a single multi-statement round trip would need
+CLIENT_MULTI_STATEMENTS, which the app's pools do not enable).
+
+Times `--lookups` user-by-id lookups on one connection each way, reporting client
+wall time and, from performance_schema's statement digests, the server time and
+CPU spent (CPU needs MySQL 8.0.28 or later). Run it against an otherwise idle
+server: app traffic with the same digests is counted too.
+
+    python -m benchmarks.prepared_statements --lookups 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+import aiomysql
+
+from database.mysql import mysql_db
+from repositories.user import USER_BY_ID
+
+HANDLE = "bench_user_by_id"
+
+# Digest rows for the statements each path sends
+DIGEST_PATTERNS = {
+    "plain": ["SELECT `u` . `id` %"],
+    "prepared": ["SET @%", "EXECUTE %"],
+}
+
+async def _connect() -> aiomysql.Connection:
+    """A dedicated connection to the primary, with the app's settings"""
+    return await aiomysql.connect(
+        host=mysql_db.host,
+        port=mysql_db.port,
+        user=mysql_db.user,
+        password=mysql_db.password,
+        db=mysql_db.database,
+        connect_timeout=mysql_db.connect_timeout,
+        autocommit=True
+    )
+
+async def _digest_totals(cursor, patterns: List[str]) -> Dict[str, float]:
+    """Summed server time and CPU (ms) of the matching statement digests"""
+    where = " OR ".join(["DIGEST_TEXT LIKE %s"] * len(patterns))
+    await cursor.execute(
+        f"""SELECT COALESCE(SUM(COUNT_STAR), 0), COALESCE(SUM(SUM_TIMER_WAIT), 0), COALESCE(SUM(SUM_CPU_TIME), 0)
+            FROM performance_schema.events_statements_summary_by_digest
+            WHERE SCHEMA_NAME = DATABASE() AND ({where})""",
+        patterns
+    )
+    count, timer, cpu = await cursor.fetchone()
+    # performance_schema timers are in picoseconds
+    return {"statements": int(count), "server_ms": float(timer) / 1e9, "cpu_ms": float(cpu) / 1e9}
+
+async def plain(cursor, user_ids: List[str]):
+    for user_id in user_ids:
+        await cursor.execute(USER_BY_ID, (user_id,))
+        await cursor.fetchall()
+
+async def prepared(cursor, user_ids: List[str]):
+    await cursor.execute(f"PREPARE {HANDLE} FROM %s", (USER_BY_ID.replace("%s", "?"),))
+    try:
+        for user_id in user_ids:
+            await cursor.execute("SET @bench_id = %s", (user_id,))
+            await cursor.execute(f"EXECUTE {HANDLE} USING @bench_id")
+            await cursor.fetchall()
+    finally:
+        await cursor.execute(f"DEALLOCATE PREPARE {HANDLE}")
+
+async def main(lookups: int):
+    conn = await _connect()
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute("SELECT id FROM users LIMIT 1000")
+            ids = [row[0] for row in await cursor.fetchall()]
+            if not ids:
+                raise SystemExit("The users table is empty")
+            user_ids = [random.choice(ids) for _ in range(lookups)]
+
+            print(f"{lookups} user-by-id lookups over {len(ids)} users")
+            for name, run in (("plain", plain), ("prepared", prepared)):
+                before = await _digest_totals(cursor, DIGEST_PATTERNS[name])
+                started = time.perf_counter()
+                await run(cursor, user_ids)
+                elapsed = time.perf_counter() - started
+                after = await _digest_totals(cursor, DIGEST_PATTERNS[name])
+                server = {key: after[key] - before[key] for key in after}
+                print(
+                    f"{name:>9}: wall {elapsed * 1000:9.1f} ms ({lookups / elapsed:8.0f}/s)   "
+                    f"server {server['server_ms']:8.1f} ms   cpu {server['cpu_ms']:8.1f} ms   "
+                    f"{server['statements']} statements"
+                )
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare plain and prepared user lookups")
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.lookups))
@@ -0,0 +1,142 @@
+"""
+Cold start and first-request latency of the player stats snapshot
+
+Writes a synthetic snapshot of `--players` rows. Then, in `--runs` fresh
+interpreter processes, it times:
+
+- mapping the file at startup
+- the first stats lookup and the first leaderboard (ranking built on demand)
+- warm lookups once the pages are resident
+
+With `--mysql`, the same first requests are timed against the configured MySQL
+server on a new connection, which is what a cold worker paid before the snapshot.
+
+    python -m benchmarks.stats_snapshot --players 200000 --runs 5 [--mysql]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from services.stats_snapshot import NUMERIC_COLUMNS, STRING_COLUMNS, PlayerStatsSnapshot, write_snapshot
+from models.ids import new_id
+
+def build_snapshot(path: Path, players: int, seed: int = 7) -> List[str]:
+    """Write a snapshot of random players; returns their sorted user ids"""
+    rng = np.random.default_rng(seed)
+    user_ids = sorted(new_id() for _ in range(players))
+    strings = {
+        "user_id": user_ids,
+        "username": [f"player_{index}" for index in range(players)],
+        "display_name": [f"Player {index}" for index in range(players)],
+        "current_rank": ["Gold Nova I"] * players,
+        "peak_rank": ["Gold Nova III"] * players,
+        "id": [new_id() for _ in range(players)],
+        "favorite_map": ["de_mirage"] * players,
+        "streak_type": ["win"] * players,
+        "recent_matches": ["[]"] * players,
+    }
+    assert list(strings) == STRING_COLUMNS
+    numeric = {
+        name: (rng.random(players) * 100).astype(dtype) if dtype.endswith("f8") else rng.integers(0, 5000, players).astype(dtype)
+        for name, dtype in NUMERIC_COLUMNS.items()
+    }
+    write_snapshot(path, numeric, strings)
+    return user_ids
+
+def measure(path: Path, user_ids: List[str], warm_lookups: int = 1000) -> Dict[str, float]:
+    """Run in a fresh process: time startup mapping and the first requests"""
+    started = time.perf_counter()
+    snapshot = PlayerStatsSnapshot(path)
+    mapped = time.perf_counter()
+    snapshot.get(user_ids[len(user_ids) // 3])
+    first_lookup = time.perf_counter()
+    asyncio.run(snapshot.top("kd_ratio", 100))
+    first_leaderboard = time.perf_counter()
+
+    sample = random.Random(1).sample(user_ids, min(warm_lookups, len(user_ids)))
+    warm = []
+    for user_id in sample:
+        lookup_started = time.perf_counter()
+        snapshot.get(user_id)
+        warm.append(time.perf_counter() - lookup_started)
+    return {
+        "map_ms": (mapped - started) * 1000,
+        "first_lookup_ms": (first_lookup - mapped) * 1000,
+        "first_leaderboard_ms": (first_leaderboard - first_lookup) * 1000,
+        "warm_lookup_p50_us": statistics.median(warm) * 1e6,
+    }
+
+async def measure_mysql(user_id: str) -> Dict[str, float]:
+    """The same first requests served by MySQL on a new connection"""
+    from database.mysql import mysql_db
+    from repositories.cs2_stats import _leaderboard_sql
+
+    started = time.perf_counter()
+    await mysql_db.connect()
+    if not mysql_db.pool:
+        raise SystemExit("MySQL is not available")
+    connected = time.perf_counter()
+    try:
+        async with mysql_db.read_connection() as conn, conn.cursor() as cursor:
+            await cursor.execute("SELECT * FROM cs2_player_stats WHERE user_id = %s", (user_id,))
+            await cursor.fetchall()
+            first_lookup = time.perf_counter()
+            await cursor.execute(_leaderboard_sql("kd_ratio"), (100,))
+            await cursor.fetchall()
+            first_leaderboard = time.perf_counter()
+    finally:
+        await mysql_db.disconnect()
+    return {
+        "connect_ms": (connected - started) * 1000,
+        "first_lookup_ms": (first_lookup - connected) * 1000,
+        "first_leaderboard_ms": (first_leaderboard - first_lookup) * 1000,
+    }
+
+def main(players: int, runs: int, mysql: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "player_stats.snap"
+        started = time.perf_counter()
+        user_ids = build_snapshot(path, players)
+        ids_path = Path(directory) / "ids.json"
+        ids_path.write_text(json.dumps(user_ids))
+        print(f"{players} players, snapshot {path.stat().st_size / 2**20:.1f} MiB written in {time.perf_counter() - started:.2f}s")
+
+        results = []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.stats_snapshot", "--measure", str(path), str(ids_path)],
+                check=True, capture_output=True, text=True, cwd=Path(__file__).parent.parent
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+        print(f"snapshot, median of {runs} fresh processes:")
+        for key in results[0]:
+            print(f"  {key:>22}: {statistics.median(result[key] for result in results):9.3f}")
+
+    if mysql:
+        result = asyncio.run(measure_mysql(user_ids[0]))
+        print("MySQL, new connection:")
+        for key, value in result.items():
+            print(f"  {key:>22}: {value:9.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time snapshot startup and first requests")
+    parser.add_argument("--players", type=int, default=200000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mysql", action="store_true", help="also time the first requests against MySQL")
+    parser.add_argument("--measure", nargs=2, metavar=("SNAPSHOT", "IDS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(measure(Path(args.measure[0]), json.loads(Path(args.measure[1]).read_text()))))
+    else:
+        main(args.players, args.runs, args.mysql)
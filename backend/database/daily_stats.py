@@ -0,0 +1,147 @@
+"""
+Rebuild cs2_player_daily_stats from every match shard and the match archive
+
+Migration 0010 can only backfill from the primary's live partitions: migrations run
+before the shard pools are open, and archived months are files. Run this once after
+that migration (and again after restoring archive files):
+
+    python -m database.daily_stats [--before 2025-06-01]
+
+Days before `--before` (default: today, UTC) are recomputed and overwritten; later
+days are left to add_match, which keeps them current.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import aiomysql
+from dotenv import load_dotenv
+
+# The database and shard settings are read at import time
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from database.mysql import mysql_db
+from database.sharding import shard_router
+from repositories.cs2_stats import ROLLUP_COUNTERS
+from services.match_archive import match_archive
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH = 1000
+
+Totals = Dict[Tuple[str, date], List[int]]
+
+def _match_counters(row: Dict) -> List[int]:
+    """One match as ROLLUP_COUNTERS values"""
+    return [
+        1, int(row["result"] == "win"), int(row["result"] == "loss"), int(row["result"] == "draw"),
+        row["kills"], row["deaths"], row["assists"], row["headshots"], row["damage_dealt"],
+        int(bool(row["mvp"])), row["team_score"] + row["enemy_score"]
+    ]
+
+def _fold(totals: Totals, key: Tuple[str, date], counters):
+    current = totals[key]
+    for index, value in enumerate(counters):
+        current[index] += int(value or 0)
+
+def _fold_archive_file(path: Path, before: date, totals: Totals) -> int:
+    """Add an archive file's matches to `totals`; returns the matches read"""
+    matches = 0
+    with gzip.open(path, "rb") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            day = datetime.fromisoformat(row["match_date"]).date()
+            if day < before:
+                _fold(totals, (row["user_id"], day), _match_counters(row))
+                matches += 1
+    return matches
+
+async def _fold_shard(shard: str, before: date, totals: Totals) -> int:
+    """Add a shard's live matches, grouped per player and day, to `totals`"""
+    groups = 0
+    async with shard_router.shard_connection(shard, read=True) as conn:
+        async with conn.cursor(aiomysql.SSCursor) as cursor:
+            await cursor.execute(
+                """SELECT user_id, DATE(match_date), COUNT(*), SUM(result = 'win'), SUM(result = 'loss'),
+                          SUM(result = 'draw'), SUM(kills), SUM(deaths), SUM(assists), SUM(headshots),
+                          SUM(damage_dealt), SUM(mvp), SUM(team_score + enemy_score)
+                   FROM cs2_matches
+                   WHERE match_date < %s
+                   GROUP BY user_id, DATE(match_date)""",
+                (before,)
+            )
+            while True:
+                rows = await cursor.fetchmany(WRITE_BATCH)
+                if not rows:
+                    break
+                for user_id, day, *counters in rows:
+                    _fold(totals, (user_id, day), counters)
+                groups += len(rows)
+    return groups
+
+async def _write(totals: Totals) -> int:
+    """Overwrite the rollup rows of players that still exist; returns the rows written"""
+    columns = ", ".join(ROLLUP_COUNTERS)
+    updates = ", ".join(f"{column} = VALUES({column})" for column in ROLLUP_COUNTERS)
+    items = sorted(totals.items())
+    written = 0
+    async with mysql_db.get_connection() as conn, conn.cursor() as cursor:
+        for offset in range(0, len(items), WRITE_BATCH):
+            batch = items[offset:offset + WRITE_BATCH]
+            user_ids = sorted({user_id for (user_id, _), _ in batch})
+            await cursor.execute(
+                f"SELECT id FROM users WHERE id IN ({', '.join(['%s'] * len(user_ids))})", user_ids
+            )
+            # Archived matches can belong to deleted accounts
+            existing = {row[0] for row in await cursor.fetchall()}
+            rows = [(user_id, day, *counters) for (user_id, day), counters in batch if user_id in existing]
+            if not rows:
+                continue
+            await cursor.executemany(
+                f"""INSERT INTO cs2_player_daily_stats (user_id, day, {columns})
+                    VALUES ({', '.join(['%s'] * (len(ROLLUP_COUNTERS) + 2))})
+                    ON DUPLICATE KEY UPDATE {updates}""",
+                rows
+            )
+            written += len(rows)
+    return written
+
+async def rebuild(before: date) -> int:
+    """Recompute every player's daily rollups before `before`; returns the rows written"""
+    totals: Totals = defaultdict(lambda: [0] * len(ROLLUP_COUNTERS))
+    for shard in shard_router.names:
+        groups = await _fold_shard(shard, before, totals)
+        logger.info(f"Read {groups} player-days from shard {shard}")
+    for path in match_archive.data_files():
+        matches = await asyncio.to_thread(_fold_archive_file, path, before, totals)
+        logger.info(f"Read {matches} archived matches from {path}")
+    return await _write(totals)
+
+async def _main(before: date) -> int:
+    await mysql_db.connect()
+    if not mysql_db.pool:
+        print("MySQL is not available")
+        return 1
+    try:
+        await shard_router.connect()
+        print(f"Wrote {await rebuild(before)} daily rollup rows before {before}")
+        return 0
+    finally:
+        await shard_router.disconnect()
+        await mysql_db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild per-player daily match rollups")
+    parser.add_argument("--before", type=date.fromisoformat, default=datetime.utcnow().date(),
+                        help="first day to leave untouched (default: today, UTC)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(asyncio.run(_main(args.before)))
@@ -0,0 +1,173 @@
+"""
+EXPLAIN-based index advisor for the repositories' MySQL queries
+
+Repositories register their hot queries with sample parameters; the advisor runs
+EXPLAIN on each and flags filesorts, temporary tables and full table scans.
+
+    python -m database.index_advisor [--seed-users 2000 --matches-per-user 20]
+
+Seeding writes synthetic rows into the configured database, so only use it against
+a scratch database.
+"""
+import argparse
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Sequence
+
+import aiomysql
+
+logger = logging.getLogger(__name__)
+
+class RegisteredQuery:
+    """A repository query with representative parameters"""
+
+    def __init__(self, name: str, sql: str, params: Sequence[Any], allow: Iterable[str]):
+        self.name = name
+        self.sql = sql
+        self.params = tuple(params)
+        self.allow = set(allow)
+
+def plan_issues(rows: List[Dict[str, Any]]) -> List[str]:
+    """Problems in traditional EXPLAIN output: filesort, temporary table, full scan"""
+    issues = []
+    for row in rows:
+        extra = row.get("Extra") or ""
+        table = row.get("table")
+        if "Using filesort" in extra:
+            issues.append(f"filesort on {table}")
+        if "Using temporary" in extra:
+            issues.append(f"temporary on {table}")
+        if row.get("type") == "ALL":
+            issues.append(f"full_scan on {table}")
+    return issues
+
+class IndexAdvisor:
+    """Registry of queries whose plans are checked before deploy"""
+
+    def __init__(self):
+        self.queries: List[RegisteredQuery] = []
+
+    def register(self, name: str, sql: str, params: Sequence[Any] = (), allow: Iterable[str] = ()):
+        """Register a query; `allow` lists accepted issue kinds (filesort, temporary, full_scan)"""
+        self.queries.append(RegisteredQuery(name, sql, params, allow))
+
+    async def explain(self, cursor) -> List[Dict[str, Any]]:
+        """EXPLAIN every registered query and report unaccepted issues"""
+        results = []
+        for query in self.queries:
+            try:
+                await cursor.execute(f"EXPLAIN {query.sql}", query.params)
+                rows = await cursor.fetchall()
+                issues = [issue for issue in plan_issues(rows) if issue.split(" ", 1)[0] not in query.allow]
+                results.append({
+                    "query": query.name,
+                    "plan": [
+                        {key: row.get(key) for key in ("table", "type", "key", "rows", "Extra")}
+                        for row in rows
+                    ],
+                    "issues": issues,
+                })
+            except Exception as e:
+                results.append({"query": query.name, "plan": [], "issues": [f"error: {e}"]})
+        return results
+
+# Global index advisor instance
+index_advisor = IndexAdvisor()
+
+async def seed(cursor, users: int, matches_per_user: int):
+    """Insert synthetic users, stats and matches so EXPLAIN sees realistic cardinalities"""
+    from models.cs2_stats import CS2Map, CS2GameMode
+    from models.ids import new_id, id_to_bytes
+
+    maps = [m.value for m in CS2Map]
+    modes = [m.value for m in CS2GameMode]
+    now = datetime.utcnow()
+
+    for start in range(0, users, 500):
+        user_ids = [new_id() for _ in range(min(500, users - start))]
+        await cursor.executemany(
+            """INSERT INTO users (id, username, email, password_hash, is_active, last_login)
+               VALUES (%s, %s, %s, 'x', %s, %s)""",
+            [
+                (user_id, f"seed_{user_id.replace('-', '')[-24:]}", f"{user_id}@seed.invalid",
+                 random.random() < 0.9, now - timedelta(days=random.randint(0, 120)))
+                for user_id in user_ids
+            ]
+        )
+        await cursor.executemany(
+            """INSERT INTO cs2_player_stats
+                   (id, user_id, total_kills, kd_ratio, win_rate, matches_played,
+                    headshot_percentage, mvp_count, adr, rank_rating)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+            [
+                (id_to_bytes(new_id()), user_id, random.randint(0, 50000), round(random.uniform(0.3, 3), 2),
+                 round(random.uniform(0, 100), 2), random.randint(0, 3000), round(random.uniform(0, 80), 2),
+                 random.randint(0, 500), round(random.uniform(30, 150), 2), random.randint(0, 30000))
+                for user_id in user_ids
+            ]
+        )
+        for user_id in user_ids:
+            await cursor.executemany(
+                """INSERT INTO cs2_matches (id, user_id, match_date, game_mode, map_name, duration_minutes, result)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                [
+                    (id_to_bytes(new_id()), user_id, now - timedelta(minutes=random.randint(0, 525600)),
+                     random.choice(modes), random.choice(maps), random.randint(20, 60),
+                     random.choice(["win", "loss", "draw"]))
+                    for _ in range(matches_per_user)
+                ]
+            )
+
+    for table in ("users", "cs2_player_stats", "cs2_matches"):
+        await cursor.execute(f"ANALYZE TABLE {table}")
+        await cursor.fetchall()
+
+async def _main(seed_users: int, matches_per_user: int) -> int:
+    from database.mysql import mysql_db
+    from database.migrations import run_migrations
+    # Importing the repositories registers their queries. Use the package module's
+    # advisor: under `python -m` this file is also loaded as __main__.
+    import repositories.user  # noqa: F401
+    import repositories.cs2_stats  # noqa: F401
+    import repositories.rank_history  # noqa: F401
+    from database.index_advisor import index_advisor as advisor, seed as seed_tables
+
+    await mysql_db.connect()
+    if not mysql_db.pool:
+        print("MySQL is not available")
+        return 1
+    try:
+        await run_migrations()
+        async with mysql_db.get_connection() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
+            if seed_users:
+                await seed_tables(cursor, seed_users, matches_per_user)
+            results = await advisor.explain(cursor)
+    finally:
+        await mysql_db.disconnect()
+
+    flagged = 0
+    for result in results:
+        steps = " | ".join(
+            f"{step['table']}:{step['type']}:{step['key'] or '-'} {step['Extra'] or ''}".strip()
+            for step in result["plan"]
+        )
+        status = "FLAG" if result["issues"] else "ok"
+        print(f"[{status}] {result['query']}: {steps}")
+        for issue in result["issues"]:
+            print(f"        {issue}")
+        flagged += bool(result["issues"])
+    print(f"{len(results)} queries checked, {flagged} flagged")
+    return flagged
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from dotenv import load_dotenv
+    load_dotenv(Path(__file__).parent.parent / '.env')
+
+    parser = argparse.ArgumentParser(description="Run EXPLAIN on registered repository queries")
+    parser.add_argument("--seed-users", type=int, default=0, help="seed this many synthetic users first")
+    parser.add_argument("--matches-per-user", type=int, default=20)
+    args = parser.parse_args()
+    raise SystemExit(1 if asyncio.run(_main(args.seed_users, args.matches_per_user)) else 0)
@@ -0,0 +1,91 @@
+"""CS2 player stats and match tables"""
+
+from database.migrations import ensure_index, drop_index
+
+async def upgrade(cursor):
+    # Create cs2_player_stats table
+    await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cs2_player_stats (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36) NOT NULL UNIQUE,
+            total_kills INT DEFAULT 0,
+            total_deaths INT DEFAULT 0,
+            total_assists INT DEFAULT 0,
+            kd_ratio DECIMAL(5,2) DEFAULT 0.00,
+            headshot_percentage DECIMAL(5,2) DEFAULT 0.00,
+            accuracy DECIMAL(5,2) DEFAULT 0.00,
+            matches_played INT DEFAULT 0,
+            matches_won INT DEFAULT 0,
+            matches_lost INT DEFAULT 0,
+            matches_drawn INT DEFAULT 0,
+            win_rate DECIMAL(5,2) DEFAULT 0.00,
+            current_rank VARCHAR(50) DEFAULT 'Unranked',
+            rank_rating INT DEFAULT 0,
+            peak_rank VARCHAR(50) DEFAULT 'Unranked',
+            average_score DECIMAL(5,2) DEFAULT 0.00,
+            mvp_count INT DEFAULT 0,
+            adr DECIMAL(5,2) DEFAULT 0.00,
+            kast DECIMAL(5,2) DEFAULT 0.00,
+            total_playtime_hours DECIMAL(10,2) DEFAULT 0.00,
+            last_match_date DATETIME NULL,
+            clutch_wins INT DEFAULT 0,
+            clutch_attempts INT DEFAULT 0,
+            first_kills INT DEFAULT 0,
+            first_deaths INT DEFAULT 0,
+            flashbang_assists INT DEFAULT 0,
+            favorite_map VARCHAR(20) NULL,
+            map_stats TEXT NULL,
+            weapon_stats TEXT NULL,
+            recent_matches TEXT NULL,
+            current_streak INT DEFAULT 0,
+            streak_type VARCHAR(10) DEFAULT 'none',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_user_id (user_id),
+            INDEX idx_kd_ratio (kd_ratio),
+            INDEX idx_win_rate (win_rate),
+            INDEX idx_rank_rating (rank_rating),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Create cs2_matches table
+    await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cs2_matches (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36) NOT NULL,
+            match_date DATETIME NOT NULL,
+            game_mode VARCHAR(20) NOT NULL,
+            map_name VARCHAR(20) NOT NULL,
+            duration_minutes INT NOT NULL,
+            result VARCHAR(10) NOT NULL,
+            team_score INT DEFAULT 0,
+            enemy_score INT DEFAULT 0,
+            kills INT DEFAULT 0,
+            deaths INT DEFAULT 0,
+            assists INT DEFAULT 0,
+            score INT DEFAULT 0,
+            mvp BOOLEAN DEFAULT FALSE,
+            headshots INT DEFAULT 0,
+            damage_dealt INT DEFAULT 0,
+            utility_damage INT DEFAULT 0,
+            enemies_flashed INT DEFAULT 0,
+            money_spent INT DEFAULT 0,
+            equipment_value INT DEFAULT 0,
+            rounds_won INT DEFAULT 0,
+            rounds_lost INT DEFAULT 0,
+            first_kill_rounds INT DEFAULT 0,
+            first_death_rounds INT DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_user_match_date (user_id, match_date, id),
+            INDEX idx_match_date (match_date),
+            INDEX idx_map_name (map_name),
+            INDEX idx_result (result),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Per-player history is read by (user_id, match_date, id); the composite
+    # index replaces the single-column user_id index on older tables
+    await ensure_index(cursor, "cs2_matches", "idx_user_match_date", "user_id, match_date, id")
+    await drop_index(cursor, "cs2_matches", "idx_user_id")
@@ -0,0 +1,135 @@
+"""Normalized per-map and per-weapon aggregate tables, backfilled from the legacy JSON columns"""
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH = int(os.environ.get('MIGRATION_BACKFILL_BATCH', 5000))
+# Rounds assumed per match when a player's map totals have no matches to count rounds from
+ROUNDS_PER_MATCH = 24
+
+def _load_json_list(value, user_id: str, column: str) -> list:
+    if not value:
+        return []
+    try:
+        items = json.loads(value)
+        return items if isinstance(items, list) else []
+    except ValueError:
+        logger.warning(f"Skipping malformed {column} of user {user_id}")
+        return []
+
+async def _backfill(cursor):
+    """Expand cs2_player_stats.map_stats / weapon_stats into the aggregate tables
+
+    The JSON blobs only kept ADR per map, so rounds are counted from the player's
+    matches on that map (or estimated from matches played) and damage is ADR times
+    rounds. Rows are overwritten, so re-running the migration is safe.
+    """
+    last_user_id = ""
+    while True:
+        await cursor.execute(
+            """SELECT user_id, map_stats, weapon_stats FROM cs2_player_stats
+               WHERE user_id > %s AND (map_stats IS NOT NULL OR weapon_stats IS NOT NULL)
+               ORDER BY user_id LIMIT %s""",
+            (last_user_id, BACKFILL_BATCH)
+        )
+        rows = await cursor.fetchall()
+        if not rows:
+            break
+        last_user_id = rows[-1][0]
+
+        user_ids = [row[0] for row in rows]
+        await cursor.execute(
+            f"""SELECT user_id, map_name, SUM(team_score + enemy_score) FROM cs2_matches
+                WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})
+                GROUP BY user_id, map_name""",
+            user_ids
+        )
+        rounds = {(user_id, map_name): int(total or 0) for user_id, map_name, total in await cursor.fetchall()}
+
+        map_rows = []
+        weapon_rows = []
+        for user_id, map_stats, weapon_stats in rows:
+            for stat in _load_json_list(map_stats, user_id, "map_stats"):
+                matches_played = int(stat.get("matches_played") or 0)
+                rounds_played = rounds.get((user_id, stat["map_name"])) or matches_played * ROUNDS_PER_MATCH
+                map_rows.append((
+                    user_id, stat["map_name"], matches_played, int(stat.get("wins") or 0),
+                    int(stat.get("losses") or 0), int(stat.get("draws") or 0), int(stat.get("kills") or 0),
+                    int(stat.get("deaths") or 0), int(stat.get("assists") or 0),
+                    round(float(stat.get("adr") or 0) * rounds_played), rounds_played
+                ))
+            for stat in _load_json_list(weapon_stats, user_id, "weapon_stats"):
+                weapon_rows.append((
+                    user_id, stat["weapon_name"], int(stat.get("kills") or 0), int(stat.get("headshots") or 0),
+                    int(stat.get("shots_fired") or 0), int(stat.get("shots_hit") or 0),
+                    int(stat.get("damage_dealt") or 0)
+                ))
+
+        if map_rows:
+            await cursor.executemany(
+                """INSERT INTO cs2_player_map_stats
+                   (user_id, map_name, matches_played, wins, losses, draws, kills, deaths,
+                    assists, damage_dealt, rounds_played)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                   ON DUPLICATE KEY UPDATE
+                       matches_played = VALUES(matches_played), wins = VALUES(wins),
+                       losses = VALUES(losses), draws = VALUES(draws), kills = VALUES(kills),
+                       deaths = VALUES(deaths), assists = VALUES(assists),
+                       damage_dealt = VALUES(damage_dealt), rounds_played = VALUES(rounds_played)""",
+                map_rows
+            )
+        if weapon_rows:
+            await cursor.executemany(
+                """INSERT INTO cs2_player_weapon_stats
+                   (user_id, weapon_name, kills, headshots, shots_fired, shots_hit, damage_dealt)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)
+                   ON DUPLICATE KEY UPDATE
+                       kills = VALUES(kills), headshots = VALUES(headshots),
+                       shots_fired = VALUES(shots_fired), shots_hit = VALUES(shots_hit),
+                       damage_dealt = VALUES(damage_dealt)""",
+                weapon_rows
+            )
+        logger.info(f"Backfilled map/weapon stats of {len(rows)} players")
+
+async def upgrade(cursor):
+    # Per-player, per-map aggregates maintained incrementally by add_match
+    await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cs2_player_map_stats (
+            user_id VARCHAR(36) NOT NULL,
+            map_name VARCHAR(20) NOT NULL,
+            matches_played INT NOT NULL DEFAULT 0,
+            wins INT NOT NULL DEFAULT 0,
+            losses INT NOT NULL DEFAULT 0,
+            draws INT NOT NULL DEFAULT 0,
+            kills INT NOT NULL DEFAULT 0,
+            deaths INT NOT NULL DEFAULT 0,
+            assists INT NOT NULL DEFAULT 0,
+            damage_dealt BIGINT NOT NULL DEFAULT 0,
+            rounds_played INT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, map_name),
+            INDEX idx_map_name (map_name),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Per-player, per-weapon aggregates maintained incrementally by add_match
+    await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cs2_player_weapon_stats (
+            user_id VARCHAR(36) NOT NULL,
+            weapon_name VARCHAR(50) NOT NULL,
+            kills INT NOT NULL DEFAULT 0,
+            headshots INT NOT NULL DEFAULT 0,
+            shots_fired INT NOT NULL DEFAULT 0,
+            shots_hit INT NOT NULL DEFAULT 0,
+            damage_dealt BIGINT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, weapon_name),
+            INDEX idx_weapon_name (weapon_name),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    await _backfill(cursor)
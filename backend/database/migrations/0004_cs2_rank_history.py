@@ -0,0 +1,16 @@
+"""Packed rank history time series"""
+
+async def upgrade(cursor):
+    # Rank time series: one row per user per day holding packed samples
+    await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cs2_rank_history (
+            user_id VARCHAR(36) NOT NULL,
+            day DATE NOT NULL,
+            resolution ENUM('raw', 'daily') NOT NULL DEFAULT 'raw',
+            point_count INT NOT NULL DEFAULT 0,
+            points MEDIUMBLOB NOT NULL,
+            PRIMARY KEY (user_id, day),
+            INDEX idx_resolution_day (resolution, day),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
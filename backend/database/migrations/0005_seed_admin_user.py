@@ -0,0 +1,7 @@
+"""Default admin account"""
+
+from database.seed import create_admin_user
+
+async def upgrade(cursor):
+    if not await create_admin_user():
+        raise RuntimeError("Could not create the default admin user")
@@ -0,0 +1,23 @@
+"""Composite and covering indexes for match history, leaderboards and active players"""
+
+from database.migrations import ensure_index, drop_index
+
+# Leaderboard stats; (stat, user_id) lets ORDER BY stat DESC LIMIT n read the index alone
+LEADERBOARD_INDEXES = [
+    "kd_ratio", "total_kills", "win_rate", "matches_played",
+    "headshot_percentage", "mvp_count", "adr", "rank_rating"
+]
+
+async def upgrade(cursor):
+    for stat in LEADERBOARD_INDEXES:
+        await ensure_index(cursor, "cs2_player_stats", f"idx_lb_{stat}", f"{stat}, user_id")
+    # Superseded by the covering leaderboard indexes and the UNIQUE(user_id) key
+    for index_name in ("idx_kd_ratio", "idx_win_rate", "idx_rank_rating", "idx_user_id"):
+        await drop_index(cursor, "cs2_player_stats", index_name)
+
+    # Filtered match history pages: equality on the filter, then the keyset order
+    await ensure_index(cursor, "cs2_matches", "idx_user_map_date", "user_id, map_name, match_date, id")
+    await ensure_index(cursor, "cs2_matches", "idx_user_mode_date", "user_id, game_mode, match_date, id")
+
+    # Active player count is answered from the index alone
+    await ensure_index(cursor, "users", "idx_active_last_login", "is_active, last_login")
@@ -0,0 +1,78 @@
+"""Store cs2_matches and cs2_player_stats primary keys as BINARY(16)
+
+The conversion is online: a shadow column is filled in chunks (a trigger keeps rows
+written meanwhile in sync), then a single in-place ALTER swaps the primary key.
+users.id stays VARCHAR(36): it is referenced by every other table's foreign key,
+stored in MongoDB documents and embedded in issued tokens.
+"""
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH = int(os.environ.get('MIGRATION_BACKFILL_BATCH', 5000))
+
+# Secondary indexes that name the id column explicitly and are rebuilt with it
+TABLES = {
+    "cs2_matches": [
+        ("idx_user_match_date", "user_id, match_date, id"),
+        ("idx_user_map_date", "user_id, map_name, match_date, id"),
+        ("idx_user_mode_date", "user_id, game_mode, match_date, id"),
+    ],
+    "cs2_player_stats": [],
+}
+
+async def _column_type(cursor, table: str, column: str):
+    await cursor.execute(
+        """SELECT data_type FROM information_schema.columns
+           WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s""",
+        (table, column)
+    )
+    row = await cursor.fetchone()
+    return row[0] if row else None
+
+async def _convert_primary_key(cursor, table: str, indexes):
+    if await _column_type(cursor, table, "id") == "binary":
+        return
+
+    if await _column_type(cursor, table, "id_bin") is None:
+        await cursor.execute(f"ALTER TABLE {table} ADD COLUMN id_bin BINARY(16) NULL, ALGORITHM=INPLACE, LOCK=NONE")
+
+    trigger = f"{table}_id_bin_sync"
+    await cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    await cursor.execute(
+        f"CREATE TRIGGER {trigger} BEFORE INSERT ON {table} FOR EACH ROW "
+        f"SET NEW.id_bin = COALESCE(NEW.id_bin, UNHEX(REPLACE(NEW.id, '-', '')))"
+    )
+
+    # Backfill in small primary-key ranges so no single statement holds locks for long,
+    # and each chunk starts where the last ended instead of rescanning converted rows
+    converted = 0
+    last_id = ""
+    while True:
+        await cursor.execute(
+            f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id > %s ORDER BY id LIMIT %s) chunk",
+            (last_id, BACKFILL_BATCH)
+        )
+        (chunk_end,) = await cursor.fetchone()
+        if chunk_end is None:
+            break
+        await cursor.execute(
+            f"""UPDATE {table} SET id_bin = UNHEX(REPLACE(id, '-', ''))
+                WHERE id > %s AND id <= %s AND id_bin IS NULL""",
+            (last_id, chunk_end)
+        )
+        converted += cursor.rowcount
+        last_id = chunk_end
+    logger.info(f"Backfilled {converted} binary ids on {table}")
+
+    clauses = ["DROP PRIMARY KEY"]
+    clauses += [f"DROP INDEX {name}" for name, _ in indexes]
+    clauses += ["DROP COLUMN id", "CHANGE COLUMN id_bin id BINARY(16) NOT NULL FIRST", "ADD PRIMARY KEY (id)"]
+    clauses += [f"ADD INDEX {name} ({columns})" for name, columns in indexes]
+    await cursor.execute(f"ALTER TABLE {table} {', '.join(clauses)}, ALGORITHM=INPLACE, LOCK=NONE")
+    await cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+async def upgrade(cursor):
+    for table, indexes in TABLES.items():
+        await _convert_primary_key(cursor, table, indexes)
@@ -0,0 +1,11 @@
+"""Directory of users whose matches live on a shard other than their hash placement"""
+
+async def upgrade(cursor):
+    # Written by the resharding tool (python -m database.sharding), read by every worker
+    await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cs2_shard_directory (
+            user_id VARCHAR(36) PRIMARY KEY,
+            shard VARCHAR(64) NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    ''')
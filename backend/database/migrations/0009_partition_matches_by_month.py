@@ -0,0 +1,10 @@
+"""Partition cs2_matches by month so old months can be archived and dropped
+
+The table is copied once. Foreign keys are not supported on partitioned tables, so
+the cascade from users is dropped (accounts are only ever deactivated, never
+deleted). The primary key becomes (id, match_date).
+"""
+from database.partitions import partition_matches
+
+async def upgrade(cursor):
+    await partition_matches(cursor)
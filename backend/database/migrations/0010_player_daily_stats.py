@@ -0,0 +1,60 @@
+"""Per-player daily match aggregates for trend charts
+
+The backfill here only sees the primary's live matches. Matches on other shards and
+in the archive are added by `python -m database.daily_stats`, run after deploying.
+"""
+import os
+
+BACKFILL_BATCH = int(os.environ.get('MIGRATION_BACKFILL_BATCH', 5000))
+
+async def upgrade(cursor):
+    # One row per player per day; weeks and months are summed from these rows
+    await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cs2_player_daily_stats (
+            user_id VARCHAR(36) NOT NULL,
+            day DATE NOT NULL,
+            matches_played INT NOT NULL DEFAULT 0,
+            wins INT NOT NULL DEFAULT 0,
+            losses INT NOT NULL DEFAULT 0,
+            draws INT NOT NULL DEFAULT 0,
+            kills INT NOT NULL DEFAULT 0,
+            deaths INT NOT NULL DEFAULT 0,
+            assists INT NOT NULL DEFAULT 0,
+            headshots INT NOT NULL DEFAULT 0,
+            damage_dealt BIGINT NOT NULL DEFAULT 0,
+            mvps INT NOT NULL DEFAULT 0,
+            rounds_played INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Backfill from the matches on this server, a batch of players at a time (see database.daily_stats)
+    last_user_id = ""
+    while True:
+        await cursor.execute(
+            "SELECT id FROM users WHERE id > %s ORDER BY id LIMIT %s",
+            (last_user_id, BACKFILL_BATCH)
+        )
+        user_ids = [row[0] for row in await cursor.fetchall()]
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+        await cursor.execute(
+            f'''INSERT INTO cs2_player_daily_stats
+                    (user_id, day, matches_played, wins, losses, draws, kills, deaths,
+                     assists, headshots, damage_dealt, mvps, rounds_played)
+                SELECT user_id, DATE(match_date), COUNT(*), SUM(result = 'win'), SUM(result = 'loss'),
+                       SUM(result = 'draw'), SUM(kills), SUM(deaths), SUM(assists), SUM(headshots),
+                       SUM(damage_dealt), SUM(mvp), SUM(team_score + enemy_score)
+                FROM cs2_matches
+                WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})
+                GROUP BY user_id, DATE(match_date)
+                ON DUPLICATE KEY UPDATE
+                    matches_played = VALUES(matches_played), wins = VALUES(wins),
+                    losses = VALUES(losses), draws = VALUES(draws), kills = VALUES(kills),
+                    deaths = VALUES(deaths), assists = VALUES(assists), headshots = VALUES(headshots),
+                    damage_dealt = VALUES(damage_dealt), mvps = VALUES(mvps),
+                    rounds_played = VALUES(rounds_played)''',
+            user_ids
+        )
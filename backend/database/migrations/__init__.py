@@ -0,0 +1,120 @@
+"""
+Versioned MySQL schema migrations
+
+Each migration is a module in this package named NNNN_description.py that defines
+`async def upgrade(cursor)`. Applied versions are recorded in schema_version, and a
+named MySQL lock ensures only one worker migrates at a time.
+"""
+import importlib
+import logging
+import os
+import pkgutil
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from database.mysql import mysql_db
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = "projecttest_schema_migrations"
+
+def discover_migrations() -> List[Tuple[int, str]]:
+    """(version, module name) of every migration in this package, in order"""
+    migrations = []
+    for module in pkgutil.iter_modules([str(Path(__file__).parent)]):
+        prefix = module.name.split("_", 1)[0]
+        if prefix.isdigit():
+            migrations.append((int(prefix), module.name))
+    return sorted(migrations)
+
+async def _index_exists(cursor, table: str, index_name: str) -> bool:
+    """Check whether an index exists on a table in the current database"""
+    await cursor.execute(
+        """SELECT 1 FROM information_schema.statistics
+           WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+           LIMIT 1""",
+        (table, index_name)
+    )
+    return await cursor.fetchone() is not None
+
+async def ensure_index(cursor, table: str, index_name: str, columns: str):
+    """Add an index online (no table copy, reads and writes continue) if it is missing"""
+    if not await _index_exists(cursor, table, index_name):
+        await cursor.execute(
+            f"ALTER TABLE {table} ADD INDEX {index_name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE"
+        )
+        logger.info(f"Created index {index_name} on {table}")
+
+async def drop_index(cursor, table: str, index_name: str):
+    """Drop an index online if it exists"""
+    if await _index_exists(cursor, table, index_name):
+        await cursor.execute(f"ALTER TABLE {table} DROP INDEX {index_name}, ALGORITHM=INPLACE, LOCK=NONE")
+        logger.info(f"Dropped index {index_name} on {table}")
+
+async def _current_version(cursor) -> int:
+    await cursor.execute(
+        """SELECT 1 FROM information_schema.tables
+           WHERE table_schema = DATABASE() AND table_name = 'schema_version'"""
+    )
+    if await cursor.fetchone() is None:
+        return 0
+    await cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    (version,) = await cursor.fetchone()
+    return version
+
+async def run_migrations() -> bool:
+    """Apply pending migrations; returns immediately when the schema is already current"""
+    if not mysql_db.pool:
+        logger.warning("MySQL not available, migrations will run when connection is established")
+        return False
+
+    migrations = discover_migrations()
+    latest = migrations[-1][0] if migrations else 0
+    lock_timeout = int(os.environ.get('MYSQL_MIGRATION_LOCK_TIMEOUT', 60))
+
+    try:
+        async with mysql_db.get_connection() as conn, conn.cursor() as cursor:
+            # Fast path: one query when nothing is pending
+            if await _current_version(cursor) >= latest:
+                return True
+
+            await cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, lock_timeout))
+            (locked,) = await cursor.fetchone()
+            if locked != 1:
+                logger.error(f"Timed out after {lock_timeout}s waiting for another worker's migrations")
+                return False
+
+            try:
+                await cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INT PRIMARY KEY,
+                        description VARCHAR(255) NOT NULL,
+                        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        duration_ms INT NOT NULL DEFAULT 0
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                """)
+                # Another worker may have finished while we waited for the lock
+                current = await _current_version(cursor)
+                for version, name in migrations:
+                    if version <= current:
+                        continue
+
+                    module = importlib.import_module(f"{__name__}.{name}")
+                    started = time.monotonic()
+                    logger.info(f"Applying migration {name}")
+                    await module.upgrade(cursor)
+                    # DDL commits implicitly, so each migration is recorded as soon as it succeeds
+                    await cursor.execute(
+                        "INSERT INTO schema_version (version, description, duration_ms) VALUES (%s, %s, %s)",
+                        (version, name, int((time.monotonic() - started) * 1000))
+                    )
+                logger.info(f"Schema migrated to version {latest}")
+                return True
+            finally:
+                await cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                await cursor.fetchone()
+
+    except Exception as e:
+        logger.error(f"Error running schema migrations: {e}")
+        return False
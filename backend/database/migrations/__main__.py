@@ -0,0 +1,21 @@
+"""
+Apply pending schema migrations: python -m database.migrations
+"""
+import asyncio
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent.parent.parent / '.env')
+
+from database.mysql import mysql_db
+from database.migrations import run_migrations
+
+async def main():
+    await mysql_db.connect()
+    try:
+        return await run_migrations()
+    finally:
+        await mysql_db.disconnect()
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from pymongo import IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Plan stages that mean a query is not served by an index
+UNINDEXED_STAGES = {"COLLSCAN", "SORT"}
+
+class HotQuery:
+    """A query the backend runs often, checked with explain() against the declared indexes"""
+
+    def __init__(self, name: str, collection: str, filter: Dict[str, Any],
+                 sort: Optional[List] = None, projection: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.collection = collection
+        self.filter = filter
+        self.sort = sort
+        self.projection = projection
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every stage name in an explain() plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+class MongoIndexManager:
+    """Declarative Mongo indexes: repositories register what they need, startup ensures it"""
+
+    def __init__(self):
+        self.indexes: Dict[str, List[IndexModel]] = {}
+        self.queries: List[HotQuery] = []
+
+    def register(self, collection: str, indexes: List[IndexModel]):
+        """Declare indexes required on `collection`"""
+        self.indexes.setdefault(collection, []).extend(indexes)
+
+    def register_query(self, name: str, collection: str, filter: Dict[str, Any],
+                       sort: Optional[List] = None, projection: Optional[Dict[str, Any]] = None):
+        """Declare a hot query that must be served by an index"""
+        self.queries.append(HotQuery(name, collection, filter, sort, projection))
+
+    async def ensure(self, db) -> Dict[str, List[str]]:
+        """Create any missing declared indexes; existing ones are left untouched"""
+        created: Dict[str, List[str]] = {}
+        for collection, indexes in self.indexes.items():
+            try:
+                existing = await db[collection].index_information()
+                missing = [index for index in indexes if index.document["name"] not in existing]
+                for index in indexes:
+                    name = index.document["name"]
+                    ttl = index.document.get("expireAfterSeconds")
+                    # A changed TTL is applied in place instead of rebuilding the index
+                    if name in existing and ttl is not None and existing[name].get("expireAfterSeconds") != ttl:
+                        await db.command({"collMod": collection, "index": {"name": name, "expireAfterSeconds": ttl}})
+                        logger.info(f"Set TTL of Mongo index {collection}.{name} to {ttl}s")
+                if missing:
+                    created[collection] = await db[collection].create_indexes(missing)
+                    logger.info(f"Created Mongo indexes on {collection}: {', '.join(created[collection])}")
+            except Exception as e:
+                logger.error(f"Error ensuring Mongo indexes on {collection}: {e}")
+        return created
+
+    async def report(self, db) -> Dict[str, Dict[str, List[str]]]:
+        """Declared indexes that are missing, and existing indexes never used since the last restart"""
+        report: Dict[str, Dict[str, List[str]]] = {}
+        for collection, indexes in self.indexes.items():
+            try:
+                existing = await db[collection].index_information()
+                declared = {index.document["name"] for index in indexes}
+                usage = {
+                    stats["name"]: stats["accesses"]["ops"]
+                    async for stats in db[collection].aggregate([{"$indexStats": {}}])
+                }
+                report[collection] = {
+                    "missing": sorted(declared - set(existing)),
+                    "undeclared": sorted(set(existing) - declared - {"_id_"}),
+                    "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_"),
+                }
+            except Exception as e:
+                logger.error(f"Error reporting Mongo indexes on {collection}: {e}")
+        return report
+
+    async def explain(self, db) -> List[Dict[str, Any]]:
+        """Run explain() on each hot query and flag collection scans and in-memory sorts"""
+        results = []
+        for query in self.queries:
+            command: Dict[str, Any] = {"find": query.collection, "filter": query.filter}
+            if query.sort:
+                command["sort"] = dict(query.sort)
+            if query.projection:
+                command["projection"] = query.projection
+            try:
+                explained = await db.command({"explain": command, "verbosity": "queryPlanner"})
+                stages = _plan_stages(explained["queryPlanner"]["winningPlan"])
+                results.append({
+                    "query": query.name,
+                    "collection": query.collection,
+                    "stages": stages,
+                    "indexed": not UNINDEXED_STAGES.intersection(stages),
+                    # Covered: answered from the index alone, without fetching documents
+                    "covered": "IXSCAN" in stages and "FETCH" not in stages,
+                })
+            except Exception as e:
+                results.append({"query": query.name, "collection": query.collection, "error": str(e), "indexed": False})
+        return results
+
+# Global index manager instance
+mongo_indexes = MongoIndexManager()
+
+async def _main(ensure: bool):
+    """Ensure indexes (optionally), then print the index report and explain() results"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    # Importing the repositories registers their indexes and hot queries. Use the
+    # package module's manager: under `python -m` this file is also loaded as __main__.
+    import repositories.user  # noqa: F401
+    import repositories.admin  # noqa: F401
+    from database.mongo_indexes import mongo_indexes as manager
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if ensure:
+            await manager.ensure(db)
+        for collection, entry in (await manager.report(db)).items():
+            print(f"{collection}: missing={entry['missing']} unused={entry['unused']} undeclared={entry['undeclared']}")
+
+        failures = 0
+        for result in await manager.explain(db):
+            status = "ok" if result["indexed"] else "NOT INDEXED"
+            detail = result.get("error") or " > ".join(result["stages"])
+            print(f"[{status}] {result['query']} ({result['collection']}): {detail}")
+            failures += not result["indexed"]
+        return failures
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from dotenv import load_dotenv
+    load_dotenv(Path(__file__).parent.parent / '.env')
+
+    parser = argparse.ArgumentParser(description="Check that hot Mongo queries are served by indexes")
+    parser.add_argument("--ensure", action="store_true", help="create missing indexes before checking")
+    args = parser.parse_args()
+    raise SystemExit(1 if asyncio.run(_main(args.ensure)) else 0)
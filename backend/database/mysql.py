@@ -1,46 +1,243 @@
 import aiomysql
+import asyncio
 import os
+import time
 import logging
-from contextlib import asynccontextmanager
-from typing import Optional
+from bisect import bisect_left
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Tuple, Any
 
 logger = logging.getLogger(__name__)
 
+# Upper bounds (ms) of the acquire-latency histogram buckets
+ACQUIRE_LATENCY_BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Per-request flags: a connection could not be acquired in time before any write
+# connection was handed out ("saturated"), and a write connection was handed out ("wrote")
+_pool_saturation: ContextVar[Optional[Dict[str, bool]]] = ContextVar("mysql_pool_saturation", default=None)
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free before the acquire deadline"""
+
+class PoolMetrics:
+    """Acquire counters and latency histogram for one connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.latency_sum = 0.0
+        self.latency_counts = [0] * (len(ACQUIRE_LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        milliseconds = seconds * 1000
+        self.latency_sum += milliseconds
+        self.latency_counts[bisect_left(ACQUIRE_LATENCY_BUCKETS, milliseconds)] += 1
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "min_size": pool.minsize,
+            "max_size": pool.maxsize,
+            "size": pool.size,
+            "in_use": pool.size - pool.freesize,
+            "free": pool.freesize,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "acquire_latency_ms": {
+                "sum": round(self.latency_sum, 3),
+                "buckets": {
+                    **{str(bound): count for bound, count in zip(ACQUIRE_LATENCY_BUCKETS, self.latency_counts)},
+                    "+Inf": self.latency_counts[-1]
+                }
+            }
+        }
+
+def parse_hosts(value: str, default_port: int = 3306) -> List[Tuple[str, int]]:
+    """Parse a comma-separated list of host[:port] entries"""
+    hosts = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+@contextmanager
+def track_pool_saturation():
+    """Collect whether an acquire timed out before the current request started writing"""
+    state = {"saturated": False, "wrote": False}
+    token = _pool_saturation.set(state)
+    try:
+        yield state
+    finally:
+        _pool_saturation.reset(token)
+
+def _mark_saturated():
+    state = _pool_saturation.get()
+    # After a write the request must report its real outcome, not a retryable 503
+    if state is not None and not state["wrote"]:
+        state["saturated"] = True
+
+def mark_request_write():
+    """Record that the current request got a connection it may write with"""
+    state = _pool_saturation.get()
+    if state is not None:
+        state["wrote"] = True
+
+def request_wrote() -> bool:
+    state = _pool_saturation.get()
+    return bool(state and state["wrote"])
+
 class MySQLDatabase:
     def __init__(self):
         self.pool = None
+        self.replica_pools: List = []
         self.host = os.environ.get('MYSQL_HOST', 'localhost')
         self.port = int(os.environ.get('MYSQL_PORT', 3306))
         self.user = os.environ.get('MYSQL_USER', 'root')
         self.password = os.environ.get('MYSQL_PASSWORD', 'password')
         self.database = os.environ.get('MYSQL_DATABASE', 'projecttest_sql')
+        # Pool sizing and timeouts (seconds)
+        self.pool_min_size = int(os.environ.get('MYSQL_POOL_MIN_SIZE', 1))
+        self.pool_max_size = int(os.environ.get('MYSQL_POOL_MAX_SIZE', 10))
+        self.pool_recycle = int(os.environ.get('MYSQL_POOL_RECYCLE', 3600))
+        self.connect_timeout = float(os.environ.get('MYSQL_CONNECT_TIMEOUT', 10))
+        self.acquire_timeout = float(os.environ.get('MYSQL_ACQUIRE_TIMEOUT', 5))
+        # Read replicas share the primary's credentials unless overridden
+        self.replica_hosts = parse_hosts(os.environ.get('MYSQL_REPLICA_HOSTS', ''), self.port)
+        self.replica_user = os.environ.get('MYSQL_REPLICA_USER', self.user)
+        self.replica_password = os.environ.get('MYSQL_REPLICA_PASSWORD', self.password)
+        # Reads for a key written within this many seconds go to the primary. The
+        # record of recent writes is per process: a read served by another worker
+        # can still hit a lagging replica, so reads that must be current (auth,
+        # login) use get_connection() instead of read_connection().
+        self.sticky_window = float(os.environ.get('MYSQL_READ_YOUR_WRITES_WINDOW', 5))
+        self._recent_writes: Dict[str, float] = {}
+        self._next_replica = 0
+        self._metrics: Dict[Any, PoolMetrics] = {}
+
+    async def _create_pool(self, name: str, host: str, port: int, user: str, password: str, database: Optional[str] = None):
+        """Create a pool with the configured sizing and open `minsize` connections up front"""
+        pool = await aiomysql.create_pool(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            db=database or self.database,
+            autocommit=True,
+            minsize=self.pool_min_size,
+            maxsize=self.pool_max_size,
+            pool_recycle=self.pool_recycle,
+            connect_timeout=self.connect_timeout
+        )
+        self._metrics[pool] = PoolMetrics(name)
+        await self._prewarm(pool)
+        return pool
+
+    async def _prewarm(self, pool):
+        """Check out `minsize` connections at once and ping them so none is opened lazily"""
+        connections = await asyncio.gather(*(pool.acquire() for _ in range(pool.minsize)))
+        try:
+            await asyncio.gather(*(conn.ping() for conn in connections))
+        finally:
+            for conn in connections:
+                pool.release(conn)
 
     async def connect(self):
         """Initialize the connection pool"""
         try:
-            self.pool = await aiomysql.create_pool(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                db=self.database,
-                autocommit=True,
-                minsize=1,
-                maxsize=10
+            self.pool = await self._create_pool("primary", self.host, self.port, self.user, self.password)
+            logger.info(
+                f"MySQL connection pool created successfully "
+                f"(min={self.pool_min_size}, max={self.pool_max_size}, acquire_timeout={self.acquire_timeout}s)"
             )
-            logger.info("MySQL connection pool created successfully")
-            await self.create_tables()
         except Exception as e:
             logger.error(f"Failed to create MySQL connection pool: {e}")
             # Don't raise the exception - let the app run with MongoDB only
             self.pool = None
+            return
+
+        for host, port in self.replica_hosts:
+            try:
+                replica_pool = await self._create_pool(
+                    f"replica:{host}:{port}", host, port, self.replica_user, self.replica_password
+                )
+                self.replica_pools.append(replica_pool)
+                logger.info(f"MySQL replica pool created for {host}:{port}")
+            except Exception as e:
+                # Reads fall back to the primary when no replica is reachable
+                logger.error(f"Failed to create MySQL replica pool for {host}:{port}: {e}")
 
     async def disconnect(self):
         """Close the connection pool"""
+        for replica_pool in self.replica_pools:
+            replica_pool.close()
+            await replica_pool.wait_closed()
+        self.replica_pools = []
         if self.pool:
             self.pool.close()
             await self.pool.wait_closed()
             logger.info("MySQL connection pool closed")
+        self._metrics = {}
+
+    async def _acquire(self, pool):
+        """Acquire a connection, giving up after the acquire timeout"""
+        metrics = self._metrics.get(pool) or self._metrics.setdefault(pool, PoolMetrics("unnamed"))
+        metrics.waiting += 1
+        started = time.monotonic()
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            metrics.timeouts += 1
+            raise PoolTimeoutError(
+                f"No MySQL connection available within {self.acquire_timeout}s ({metrics.name})"
+            )
+        finally:
+            metrics.waiting -= 1
+            metrics.observe(time.monotonic() - started)
+        metrics.acquired += 1
+        return conn
+
+    async def _acquire_primary(self):
+        """Acquire from the primary; a timeout flags the current request for a 503"""
+        try:
+            return await self._acquire(self.pool)
+        except PoolTimeoutError:
+            _mark_saturated()
+            raise
+
+    def pool_stats(self) -> List[Dict[str, Any]]:
+        """Occupancy gauges and acquire-latency histogram for every pool (primary, replicas, shards)"""
+        return [metrics.snapshot(pool) for pool, metrics in self._metrics.items() if not pool.closed]
+
+    def mark_write(self, sticky_key: Optional[str]):
+        """Pin reads for this key to the primary for the read-your-writes window"""
+        if not sticky_key:
+            return
+        now = time.monotonic()
+        self._recent_writes[sticky_key] = now
+        if len(self._recent_writes) > 10000:
+            # Drop expired entries so the map stays small
+            self._recent_writes = {
+                key: written_at for key, written_at in self._recent_writes.items()
+                if now - written_at < self.sticky_window
+            }
+
+    def _wrote_recently(self, sticky_key: Optional[str]) -> bool:
+        written_at = self._recent_writes.get(sticky_key) if sticky_key else None
+        return written_at is not None and time.monotonic() - written_at < self.sticky_window
+
+    def _read_pool(self, sticky_key: Optional[str]):
+        """Pick a replica round-robin, or the primary when none is usable"""
+        if not self.replica_pools or self._wrote_recently(sticky_key):
+            return self.pool
+        self._next_replica = (self._next_replica + 1) % len(self.replica_pools)
+        return self.replica_pools[self._next_replica]
 
     @asynccontextmanager
     async def get_connection(self):
@@ -49,92 +246,45 @@ class MySQLDatabase:
             yield None
             return
         
-        async with self.pool.acquire() as conn:
+        conn = await self._acquire_primary()
+        try:
             yield conn
+        finally:
+            self.pool.release(conn)
 
-    async def create_tables(self):
-        """Create necessary tables for user authentication and custom themes"""
+    @asynccontextmanager
+    async def write_connection(self, sticky_key: Optional[str] = None):
+        """Get a primary connection; reads for `sticky_key` stay on the primary for a while afterwards"""
+        try:
+            async with self.get_connection() as conn:
+                if conn:
+                    mark_request_write()
+                yield conn
+        finally:
+            self.mark_write(sticky_key)
+
+    @asynccontextmanager
+    async def read_connection(self, sticky_key: Optional[str] = None):
+        """Get a connection for reads, from a replica unless `sticky_key` was written recently"""
         if not self.pool:
+            yield None
             return
-            
-        async with self.get_connection() as conn:
-            if not conn:
-                return
-                
-            async with conn.cursor() as cursor:
-                # Users table for authentication data
-                await cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        id VARCHAR(36) PRIMARY KEY,
-                        username VARCHAR(30) UNIQUE NOT NULL,
-                        email VARCHAR(255) UNIQUE NOT NULL,
-                        password_hash VARCHAR(255) NOT NULL,
-                        display_name VARCHAR(100),
-                        avatar_url TEXT,
-                        bio TEXT,
-                        role ENUM('admin', 'moderator', 'member', 'banned') DEFAULT 'member',
-                        steam_id VARCHAR(50),
-                        is_active BOOLEAN DEFAULT TRUE,
-                        is_verified BOOLEAN DEFAULT FALSE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                        last_login TIMESTAMP NULL,
-                        login_count INT DEFAULT 0,
-                        INDEX idx_email (email),
-                        INDEX idx_username (username),
-                        INDEX idx_steam_id (steam_id)
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-                """)
-
-                # User preferences table
-                await cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS user_preferences (
-                        user_id VARCHAR(36) PRIMARY KEY,
-                        language VARCHAR(10) DEFAULT 'en',
-                        theme VARCHAR(50) DEFAULT 'darkNeon',
-                        custom_theme_data JSON,
-                        notifications BOOLEAN DEFAULT TRUE,
-                        steam_profile_public BOOLEAN DEFAULT FALSE,
-                        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-                """)
-
-                # Custom themes table
-                await cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS custom_themes (
-                        id VARCHAR(36) PRIMARY KEY,
-                        user_id VARCHAR(36) NOT NULL,
-                        name VARCHAR(50) NOT NULL,
-                        description TEXT,
-                        category VARCHAR(50) DEFAULT 'Custom',
-                        variables JSON NOT NULL,
-                        is_public BOOLEAN DEFAULT FALSE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                        INDEX idx_user_id (user_id),
-                        INDEX idx_public (is_public),
-                        INDEX idx_category (category)
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-                """)
-
-                # User sessions table (for refresh tokens)
-                await cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS user_sessions (
-                        id VARCHAR(36) PRIMARY KEY,
-                        user_id VARCHAR(36) NOT NULL,
-                        refresh_token_hash VARCHAR(255) NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        expires_at TIMESTAMP NOT NULL,
-                        user_agent TEXT,
-                        ip_address VARCHAR(45),
-                        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                        INDEX idx_user_id (user_id),
-                        INDEX idx_expires (expires_at)
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-                """)
-
-                logger.info("MySQL tables created successfully")
+
+        pool = self._read_pool(sticky_key)
+        if pool is self.pool:
+            conn = await self._acquire_primary()
+        else:
+            try:
+                conn = await self._acquire(pool)
+            except Exception as e:
+                logger.warning(f"MySQL replica unavailable, reading from primary: {e}")
+                pool = self.pool
+                conn = await self._acquire_primary()
+
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
 
 # Global MySQL database instance
 mysql_db = MySQLDatabase()
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Monthly RANGE partitions on cs2_matches.match_date
+
+Partitions are named pYYYYMM and hold rows with match_date before the first day of
+the following month; the first one also holds anything older. A trailing pmax
+partition catches dates past the last month created.
+"""
+import logging
+import os
+from datetime import date, datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+TABLE = "cs2_matches"
+MAX_PARTITION = "pmax"
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+def partition_month(name: str) -> Optional[date]:
+    """The month a pYYYYMM partition holds; None for pmax"""
+    if name == MAX_PARTITION:
+        return None
+    return date(int(name[1:5]), int(name[5:7]), 1)
+
+def _definition(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')"
+
+def _months(first: date, last: date) -> List[date]:
+    months = []
+    while first <= last:
+        months.append(first)
+        first = add_months(first, 1)
+    return months
+
+def lookahead_month() -> date:
+    """Last month that should already have a partition"""
+    return add_months(month_start(datetime.utcnow()), int(os.environ.get('MATCH_PARTITION_LOOKAHEAD_MONTHS', 3)))
+
+async def list_partitions(cursor, table: str = TABLE) -> List[str]:
+    """Partition names of a table in order; empty if it is not partitioned"""
+    await cursor.execute(
+        """SELECT partition_name FROM information_schema.partitions
+           WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+           ORDER BY partition_ordinal_position""",
+        (table,)
+    )
+    return [row[0] for row in await cursor.fetchall()]
+
+async def partition_matches(cursor):
+    """Partition cs2_matches by month if it is not yet (copies the table once)"""
+    if await list_partitions(cursor):
+        return
+
+    # Partitioned InnoDB tables cannot have foreign keys, and every unique key
+    # must contain the partitioning column
+    await cursor.execute(
+        """SELECT constraint_name FROM information_schema.referential_constraints
+           WHERE constraint_schema = DATABASE() AND table_name = %s""",
+        (TABLE,)
+    )
+    for (constraint,) in await cursor.fetchall():
+        await cursor.execute(f"ALTER TABLE {TABLE} DROP FOREIGN KEY {constraint}")
+    await cursor.execute(f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, match_date)")
+
+    await cursor.execute(f"SELECT MIN(match_date) FROM {TABLE}")
+    (oldest,) = await cursor.fetchone()
+    months = _months(month_start(oldest or datetime.utcnow()), lookahead_month())
+    definitions = [_definition(month) for month in months]
+    definitions.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    await cursor.execute(f"ALTER TABLE {TABLE} PARTITION BY RANGE COLUMNS(match_date) ({', '.join(definitions)})")
+    logger.info(f"Partitioned {TABLE} into {len(months)} monthly partitions")
+
+async def ensure_future_partitions(cursor) -> int:
+    """Split pmax so every month up to the lookahead has its own partition"""
+    months = [partition_month(name) for name in await list_partitions(cursor)]
+    existing = [month for month in months if month]
+    if not existing:
+        return 0
+    missing = _months(add_months(max(existing), 1), lookahead_month())
+    if missing:
+        definitions = [_definition(month) for month in missing]
+        definitions.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        await cursor.execute(
+            f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAX_PARTITION} INTO ({', '.join(definitions)})"
+        )
+        logger.info(f"Added {len(missing)} partitions to {TABLE}")
+    return len(missing)
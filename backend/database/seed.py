@@ -0,0 +1,56 @@
+"""
+Seed data shared by the MySQL migrations and MongoDB-only deployments
+"""
+import logging
+from database.mysql import mysql_db
+
+logger = logging.getLogger(__name__)
+
+async def create_admin_user():
+    """Create admin test user"""
+    from repositories.user import user_repository
+    from models.user import UserCreate, UserRole
+    
+    try:
+        # Check if admin user already exists
+        existing_admin = await user_repository.get_user_by_email("admin@admin.com")
+        if existing_admin:
+            logger.info("Admin user already exists")
+            return existing_admin
+        
+        # Create admin user
+        admin_data = UserCreate(
+            username="admin",
+            email="admin@admin.com",
+            password="admin123"
+        )
+        
+        admin_user = await user_repository.create_user(admin_data)
+        if admin_user:
+            # Update role to admin if using MySQL
+            if mysql_db.pool:
+                from models.user import UserUpdate
+                await user_repository.update_user(admin_user.id, UserUpdate())
+                # Manually set role (since UserUpdate doesn't include role)
+                async with mysql_db.get_connection() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(
+                            "UPDATE users SET role = %s WHERE id = %s",
+                            (UserRole.ADMIN.value, admin_user.id)
+                        )
+            else:
+                # Update role to admin in MongoDB
+                from repositories.user import get_mongo_db
+                mongo_db_conn = get_mongo_db()
+                if mongo_db_conn is not None:
+                    await mongo_db_conn.users.update_one(
+                        {"id": admin_user.id},
+                        {"$set": {"role": UserRole.ADMIN.value}}
+                    )
+            
+            logger.info("Admin user created successfully - admin@admin.com / admin123")
+            return admin_user
+        
+    except Exception as e:
+        logger.error(f"Error creating admin user: {e}")
+        return None
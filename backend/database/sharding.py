@@ -0,0 +1,341 @@
+"""
+Shard router for cs2_matches
+
+Each user's matches live on one MySQL backend, chosen by a consistent hash of the
+user_id unless the shard directory (cs2_shard_directory on the primary) pins the
+user elsewhere. MYSQL_MATCH_SHARDS lists the shards as comma-separated
+`name=host:port[/database]` entries; the special entry `primary` is the main
+database. Without it, every match stays on the primary.
+
+Resharding (run from the backend directory):
+
+    # Before adding a shard: pin users whose placement would change to where they are now
+    python -m database.sharding pin --shards "primary,s1=127.0.0.1:3307"
+    # After deploying the new MYSQL_MATCH_SHARDS: move pinned users to their new shard
+    python -m database.sharding rebalance
+    # Move a single user
+    python -m database.sharding move --user-id <id> [--to s1]
+"""
+import argparse
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from database.mysql import mysql_db, mark_request_write
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_SHARD = "primary"
+
+class ShardSpec:
+    """Where one shard lives"""
+
+    def __init__(self, name: str, host: Optional[str] = None, port: int = 3306, database: Optional[str] = None):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.database = database
+
+def parse_shards(value: str) -> List[ShardSpec]:
+    """Parse MYSQL_MATCH_SHARDS; an empty value means the primary alone"""
+    specs = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if entry == PRIMARY_SHARD:
+            specs.append(ShardSpec(PRIMARY_SHARD))
+            continue
+        name, _, location = entry.partition('=')
+        address, _, database = location.partition('/')
+        host, _, port = address.partition(':')
+        specs.append(ShardSpec(name.strip(), host, int(port) if port else 3306, database or None))
+    return specs or [ShardSpec(PRIMARY_SHARD)]
+
+def strip_foreign_keys(ddl: str) -> str:
+    """Remove FOREIGN KEY constraints from SHOW CREATE TABLE output (users only exists on the primary)"""
+    lines = [line for line in ddl.split("\n") if "FOREIGN KEY" not in line]
+    # The last definition before the closing parenthesis must not end with a comma
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith(")") and index and lines[index - 1].rstrip().endswith(","):
+            lines[index - 1] = lines[index - 1].rstrip()[:-1]
+    return "\n".join(lines)
+
+class HashRing:
+    """Consistent hash ring with virtual nodes; adding a shard moves about 1/N of users"""
+
+    def __init__(self, names: List[str], virtual_nodes: int = 128):
+        points = sorted(
+            (self._hash(f"{name}#{replica}"), name)
+            for name in names
+            for replica in range(virtual_nodes)
+        )
+        self._keys = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+    def lookup(self, key: str) -> str:
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._names[index]
+
+class ShardRouter:
+    """Routes per-user match queries to one shard and global ones to all of them"""
+
+    def __init__(self, value: Optional[str] = None):
+        self.specs = parse_shards(value if value is not None else os.environ.get('MYSQL_MATCH_SHARDS', ''))
+        self.ring = HashRing([spec.name for spec in self.specs])
+        self.directory: Dict[str, str] = {}
+        self.directory_refresh_interval = float(os.environ.get('MATCH_SHARD_DIRECTORY_REFRESH', 30))
+        self.pools: Dict[str, Any] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return [spec.name for spec in self.specs]
+
+    @property
+    def is_sharded(self) -> bool:
+        return self.names != [PRIMARY_SHARD]
+
+    async def connect(self):
+        """Open a pool per non-primary shard, create its table and load the directory"""
+        for spec in self.specs:
+            if spec.name == PRIMARY_SHARD or spec.name in self.pools:
+                continue
+            try:
+                self.pools[spec.name] = await mysql_db._create_pool(
+                    f"shard:{spec.name}", spec.host, spec.port, mysql_db.user, mysql_db.password, spec.database
+                )
+                logger.info(f"Match shard {spec.name} connected ({spec.host}:{spec.port})")
+            except Exception as e:
+                logger.error(f"Failed to connect match shard {spec.name}: {e}")
+        if self.is_sharded:
+            await self.ensure_schema()
+            await self.load_directory()
+
+    async def disconnect(self):
+        for pool in self.pools.values():
+            pool.close()
+            await pool.wait_closed()
+        self.pools = {}
+
+    async def ensure_schema(self):
+        """Create cs2_matches on every shard from the primary's definition, minus foreign keys"""
+        try:
+            async with mysql_db.get_connection() as conn, conn.cursor() as cursor:
+                await cursor.execute("SHOW CREATE TABLE cs2_matches")
+                _, ddl = await cursor.fetchone()
+            ddl = strip_foreign_keys(ddl).replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1)
+            for name in self.pools:
+                async with self.shard_connection(name) as conn, conn.cursor() as cursor:
+                    await cursor.execute(ddl)
+        except Exception as e:
+            logger.error(f"Error creating cs2_matches on match shards: {e}")
+
+    async def load_directory(self) -> int:
+        """Reload the user -> shard overrides written by the resharding tool"""
+        if not mysql_db.pool:
+            return 0
+        try:
+            async with mysql_db.read_connection() as conn, conn.cursor() as cursor:
+                await cursor.execute("SELECT user_id, shard FROM cs2_shard_directory")
+                self.directory = {user_id: shard for user_id, shard in await cursor.fetchall()}
+            return len(self.directory)
+        except Exception as e:
+            logger.error(f"Error loading match shard directory: {e}")
+            return 0
+
+    def shard_for(self, user_id: str) -> str:
+        """The shard holding a user's matches"""
+        return self.directory.get(user_id) or self.ring.lookup(user_id)
+
+    @asynccontextmanager
+    async def shard_connection(self, name: str, read: bool = False, sticky_key: Optional[str] = None):
+        """Connection to a named shard; the primary shard goes through the replica-aware paths"""
+        if name == PRIMARY_SHARD:
+            connection = mysql_db.read_connection(sticky_key) if read else mysql_db.write_connection(sticky_key)
+            async with connection as conn:
+                yield conn
+            return
+
+        pool = self.pools.get(name)
+        if pool is None:
+            raise RuntimeError(f"Match shard {name} is not connected")
+        conn = await mysql_db._acquire(pool)
+        if not read:
+            mark_request_write()
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+
+    def connection(self, user_id: str, read: bool = False):
+        """Connection to the shard holding `user_id`'s matches"""
+        return self.shard_connection(self.shard_for(user_id), read=read, sticky_key=user_id)
+
+    async def scatter(self, query: Callable[[Any], Awaitable[Any]]) -> List[Any]:
+        """Run `query(conn)` on every shard concurrently and return the per-shard results"""
+        async def run(name: str):
+            async with self.shard_connection(name, read=True) as conn:
+                return await query(conn)
+        return await asyncio.gather(*(run(name) for name in self.names))
+
+    async def _write_directory(self, cursor, user_id: str, shard: Optional[str]):
+        if shard is None:
+            await cursor.execute("DELETE FROM cs2_shard_directory WHERE user_id = %s", (user_id,))
+        else:
+            await cursor.execute(
+                """INSERT INTO cs2_shard_directory (user_id, shard) VALUES (%s, %s)
+                   ON DUPLICATE KEY UPDATE shard = VALUES(shard)""",
+                (user_id, shard)
+            )
+
+    def _cache_directory(self, user_id: str, shard: Optional[str]):
+        if shard is None:
+            self.directory.pop(user_id, None)
+        else:
+            self.directory[user_id] = shard
+
+    async def _set_directory(self, user_id: str, shard: Optional[str]):
+        async with mysql_db.get_connection() as conn, conn.cursor() as cursor:
+            await self._write_directory(cursor, user_id, shard)
+        self._cache_directory(user_id, shard)
+
+    async def lock_placement(self, cursor, user_id: str) -> str:
+        """The user's shard, read under a shared lock on their directory row
+
+        `cursor` must be in a transaction on the primary; the lock lasts until it ends.
+        move_user locks the row exclusively while it switches shards, so a match placed
+        this way cannot be written to a shard the user is leaving.
+        """
+        if not self.is_sharded:
+            return PRIMARY_SHARD
+        await cursor.execute("SELECT shard FROM cs2_shard_directory WHERE user_id = %s LOCK IN SHARE MODE", (user_id,))
+        row = await cursor.fetchone()
+        self._cache_directory(user_id, row[0] if row else None)
+        return self.shard_for(user_id)
+
+    async def _copy_matches(self, user_id: str, source: str, target: str, batch_size: int = 1000) -> int:
+        copied = 0
+        async with self.shard_connection(source) as source_conn, source_conn.cursor() as source_cursor:
+            await source_cursor.execute("SELECT * FROM cs2_matches WHERE user_id = %s", (user_id,))
+            columns = [column[0] for column in source_cursor.description]
+            insert = (
+                f"INSERT IGNORE INTO cs2_matches ({', '.join(columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(columns))})"
+            )
+            async with self.shard_connection(target) as target_conn, target_conn.cursor() as target_cursor:
+                while True:
+                    rows = await source_cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    await target_cursor.executemany(insert, rows)
+                    copied += len(rows)
+        return copied
+
+    async def move_user(self, user_id: str, target: Optional[str] = None) -> str:
+        """Copy a user's matches to `target` (default: their ring shard), switch reads, then clean up"""
+        source = self.shard_for(user_id)
+        target = target or self.ring.lookup(user_id)
+        if target not in self.names:
+            raise ValueError(f"Unknown shard {target}")
+        if source == target:
+            if self.directory.get(user_id) and target == self.ring.lookup(user_id):
+                await self._set_directory(user_id, None)
+            return target
+
+        # Pin the user where they are, so there is a directory row for writers and the switch to lock
+        await self._set_directory(user_id, source)
+        await self._copy_matches(user_id, source, target)
+
+        placement = None if target == self.ring.lookup(user_id) else target
+        async with mysql_db.get_connection() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    # Waits for in-flight add_match transactions and holds off new ones until the switch commits
+                    await cursor.execute("SELECT shard FROM cs2_shard_directory WHERE user_id = %s FOR UPDATE", (user_id,))
+                    await self._copy_matches(user_id, source, target)
+                    await self._write_directory(cursor, user_id, placement)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        self._cache_directory(user_id, placement)
+
+        # New matches now go to the target; give other workers' cached directories time to
+        # reload before match history reads stop finding the old copy
+        await asyncio.sleep(self.directory_refresh_interval)
+        async with self.shard_connection(source) as conn, conn.cursor() as cursor:
+            await cursor.execute("DELETE FROM cs2_matches WHERE user_id = %s", (user_id,))
+        logger.info(f"Moved matches of user {user_id} from shard {source} to {target}")
+        return target
+
+    async def pin_for(self, new_specs: List[ShardSpec]) -> int:
+        """Pin users whose ring placement changes under `new_specs` to their current shard"""
+        new_ring = HashRing([spec.name for spec in new_specs])
+
+        async def user_ids(conn):
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT DISTINCT user_id FROM cs2_matches")
+                return [row[0] for row in await cursor.fetchall()]
+
+        pinned = 0
+        for name, users in zip(self.names, await self.scatter(user_ids)):
+            for user_id in users:
+                if user_id not in self.directory and new_ring.lookup(user_id) != name:
+                    await self._set_directory(user_id, name)
+                    pinned += 1
+        return pinned
+
+    async def rebalance(self) -> int:
+        """Move every pinned user whose ring shard differs from where they are pinned"""
+        moved = 0
+        for user_id, shard in list(self.directory.items()):
+            if shard in self.names and self.ring.lookup(user_id) != shard:
+                await self.move_user(user_id)
+                moved += 1
+        return moved
+
+# Global shard router instance
+shard_router = ShardRouter()
+
+async def _main(args) -> int:
+    await mysql_db.connect()
+    if not mysql_db.pool:
+        print("MySQL is not available")
+        return 1
+    try:
+        await shard_router.connect()
+        await shard_router.load_directory()
+        if args.command == "pin":
+            print(f"Pinned {await shard_router.pin_for(parse_shards(args.shards))} users")
+        elif args.command == "move":
+            print(f"User {args.user_id} now on shard {await shard_router.move_user(args.user_id, args.to)}")
+        elif args.command == "rebalance":
+            print(f"Moved {await shard_router.rebalance()} users")
+        return 0
+    finally:
+        await shard_router.disconnect()
+        await mysql_db.disconnect()
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from dotenv import load_dotenv
+    load_dotenv(Path(__file__).parent.parent / '.env')
+
+    parser = argparse.ArgumentParser(description="Move users' matches between shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pin = commands.add_parser("pin", help="pin users that a new shard list would move")
+    pin.add_argument("--shards", required=True, help="the MYSQL_MATCH_SHARDS value about to be deployed")
+    move = commands.add_parser("move", help="move one user's matches")
+    move.add_argument("--user-id", required=True)
+    move.add_argument("--to", help="target shard (default: the user's ring shard)")
+    commands.add_parser("rebalance", help="move pinned users to their ring shard")
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
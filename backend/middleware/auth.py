@@ -4,6 +4,8 @@ from typing import Optional
 from services.auth import auth_service
 from repositories.user import user_repository
 from models.user import User
+from services.active_users import active_user_tracker
+from services.entitlements import tier_changes, entitlements_for
 import logging
 
 logger = logging.getLogger(__name__)
@@ -39,6 +41,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        active_user_tracker.record(user.id)
         return user
         
     except HTTPException:
@@ -65,6 +68,7 @@ async def get_current_user_optional(credentials: Optional[HTTPAuthorizationCrede
         if not user or not user.is_active:
             return None
         
+        active_user_tracker.record(user.id)
         return user
         
     except Exception as e:
@@ -82,6 +86,38 @@ def require_role(*allowed_roles: str):
         return current_user
     return decorator
 
+async def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Verified access token claims, without loading the user"""
+    payload = auth_service.verify_access_token(credentials.credentials)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+def require_entitlement(entitlement: str):
+    """Dependency that checks a tier perk from the token's entitlement claim, without I/O
+
+    A missing, expired or superseded claim answers 401 so the client refreshes its
+    access token, which re-reads the tier.
+    """
+    def dependency(payload: dict = Depends(get_token_payload)) -> dict:
+        if not tier_changes.is_current(payload['user_id'], payload.get('ent')):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Entitlements changed, refresh the access token",
+                headers={"WWW-Authenticate": 'Bearer error="invalid_token"'},
+            )
+        if entitlement not in entitlements_for(payload['ent'].get('tier')):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Requires the {entitlement} perk"
+            )
+        return payload
+    return dependency
+
 # Common role dependencies
 require_admin = require_role("admin")
 require_moderator = require_role("admin", "moderator")
@@ -0,0 +1,38 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from database.mysql import mysql_db, track_pool_saturation, request_wrote, PoolTimeoutError
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+def pool_busy_response() -> JSONResponse:
+    """503 telling the client to retry once the pool has had time to drain"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry shortly"},
+        headers={"Retry-After": str(max(1, math.ceil(mysql_db.acquire_timeout)))}
+    )
+
+async def pool_saturation_middleware(request: Request, call_next):
+    """Fail fast with 503 when a request could not get a MySQL connection in time
+
+    Repositories swallow database errors and fall back to empty or mock data, so
+    the acquire timeout is recorded per request and checked here instead. Only
+    timeouts before the request took a write connection count: a request that
+    may have committed something returns its own response, since a 503 would
+    invite a retry that repeats the write. MongoDB writes are not tracked.
+    """
+    with track_pool_saturation() as state:
+        response = await call_next(request)
+    if state["saturated"]:
+        logger.warning(f"MySQL pool saturated while serving {request.method} {request.url.path}")
+        return pool_busy_response()
+    return response
+
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError) -> JSONResponse:
+    """Exception handler for acquire timeouts that reach the route unhandled"""
+    if request_wrote():
+        logger.error(f"MySQL pool timeout after a write while serving {request.method} {request.url.path}")
+        return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+    return pool_busy_response()
@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
-import uuid
+from models.ids import new_id
+from models.dates import naive_utc
 
 class DonationTier(str, Enum):
     BRONZE = "bronze"
@@ -40,6 +41,26 @@ class UserStatusUpdate(BaseModel):
     is_active: bool
     reason: Optional[str] = None
 
+class BulkUserRoleUpdate(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    role: str = Field(..., pattern=r"^(admin|moderator|member|banned)$")
+
+class BulkUserStatusUpdate(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    is_active: bool
+    reason: Optional[str] = None
+
+class BulkUserTierUpdate(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    tier: DonationTier
+    expires_at: Optional[datetime] = None
+    notes: Optional[str] = None
+
+class BulkOperationResult(BaseModel):
+    user_id: str
+    success: bool
+    error: Optional[str] = None
+
 class ManualStatsUpdate(BaseModel):
     user_id: str
     stats: Dict[str, Any]
@@ -58,7 +79,7 @@ class ManualMatchCreate(BaseModel):
     notes: Optional[str] = None
 
 class DonationRecord(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     user_id: str
     tier: DonationTier
     amount: float
@@ -95,7 +116,7 @@ class TierBenefits(BaseModel):
     display_order: int
 
 class AdminActivityLog(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     admin_user_id: str
     admin_username: str
     action: str
@@ -106,6 +127,17 @@ class AdminActivityLog(BaseModel):
     user_agent: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class AdminActivityLogFilter(BaseModel):
+    admin_user_id: Optional[str] = None
+    action: Optional[str] = None
+    target_type: Optional[str] = None
+    target_id: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    # Log timestamps are naive UTC; an aware bound would not compare with them
+    _naive_dates = field_validator("date_from", "date_to")(naive_utc)
+
 class AdminActivityLogCreate(BaseModel):
     action: str
     target_type: str
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
-import uuid
+from models.ids import new_id
+from models.dates import naive_utc
 from enum import Enum
 
 class CS2Rank(str, Enum):
@@ -66,7 +67,7 @@ class CS2MapStats(BaseModel):
     win_rate: float = 0.0
 
 class CS2PlayerStats(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     user_id: str
     
     # Overall Statistics
@@ -123,7 +124,7 @@ class CS2PlayerStats(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 class CS2Match(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     user_id: str
     
     # Match Info
@@ -191,4 +192,15 @@ class CS2MatchCreate(BaseModel):
     score: int = 0
     mvp: bool = False
     headshots: int = 0
-    damage_dealt: int = 0
\ No newline at end of file
+    damage_dealt: int = 0
+    weapon_stats: List[CS2WeaponStats] = []
+
+class CS2MatchHistoryFilter(BaseModel):
+    map_name: Optional[CS2Map] = None
+    game_mode: Optional[CS2GameMode] = None
+    result: Optional[str] = Field(None, pattern=r"^(win|loss|draw)$")
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    # Stored match dates are naive UTC; an aware bound would not compare with them
+    _naive_dates = field_validator("date_from", "date_to")(naive_utc)
@@ -0,0 +1,54 @@
+"""
+Time-ordered identifiers (UUIDv7 layout, RFC 9562)
+
+IDs start with a millisecond timestamp, so new rows land at the end of B-tree
+indexes instead of at random positions. Tables that store IDs as BINARY(16)
+convert with id_to_bytes / id_from_bytes at the repository boundary.
+"""
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+
+def uuid7() -> uuid.UUID:
+    """Generate a UUIDv7; IDs from this process are strictly increasing"""
+    global _last_ms, _sequence
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Start each millisecond at a random point in the lower half of the 12-bit counter
+            _sequence = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _sequence += 1
+            if _sequence > 0xFFF:
+                # Counter exhausted: borrow the next millisecond
+                _last_ms += 1
+                _sequence = 0
+        timestamp, sequence = _last_ms, _sequence
+
+    value = (timestamp & 0xFFFFFFFFFFFF) << 80
+    value |= 0x7 << 76
+    value |= sequence << 64
+    value |= 0b10 << 62
+    value |= int.from_bytes(os.urandom(8), "big") & 0x3FFFFFFFFFFFFFFF
+    return uuid.UUID(int=value)
+
+def new_id() -> str:
+    """A new time-ordered ID in canonical string form"""
+    return str(uuid7())
+
+def id_to_bytes(value: str) -> bytes:
+    """Canonical ID string to its 16-byte BINARY(16) form; raises ValueError if malformed"""
+    return uuid.UUID(value).bytes
+
+def id_from_bytes(value: Optional[bytes]) -> Optional[str]:
+    """BINARY(16) column value back to the canonical string form"""
+    if value is None or isinstance(value, str):
+        return value
+    return str(uuid.UUID(bytes=bytes(value)))
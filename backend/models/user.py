@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
-import uuid
+from models.ids import new_id
 from enum import Enum
 
 class UserRole(str, Enum):
@@ -18,7 +18,7 @@ class UserPreferences(BaseModel):
     steam_profile_public: bool = False
 
 class User(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     username: str = Field(..., min_length=3, max_length=30)
     email: EmailStr
     password_hash: str
@@ -76,7 +76,7 @@ class TokenResponse(BaseModel):
     user: UserResponse
 
 class CustomTheme(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     user_id: str
     name: str = Field(..., min_length=1, max_length=50)
     description: Optional[str] = None
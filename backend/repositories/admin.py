@@ -1,19 +1,129 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ReplaceOne, DeleteOne
+from pymongo.errors import BulkWriteError
+from database.mongo_indexes import mongo_indexes
 from models.admin import (
     AdminDashboardStats, UserManagementFilter, DonationRecord, 
     DonationRecordCreate, TierBenefits, DonationTier, AdminActivityLog,
-    AdminActivityLogCreate
+    AdminActivityLogCreate, AdminActivityLogFilter
 )
 from models.user import User, UserRole
 from repositories.user import user_repository
 from repositories.cs2_stats import cs2_stats_repository
-from typing import Optional, List, Dict, Any
+from repositories.platform_rollups import platform_rollup_repository
+from services.entitlements import tier_changes
+from services.audit_log import audit_log_writer
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from datetime import datetime, timedelta
+import base64
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+mongo_indexes.register("donations", [
+    # Effective tiers: each user's completed donations, newest first
+    IndexModel([("user_id", 1), ("status", 1), ("created_at", -1)], name="user_status_created", background=True),
+    IndexModel([("status", 1), ("tier", 1), ("amount", 1)], name="status_tier_amount", background=True),
+    IndexModel([("status", 1), ("expires_at", 1)], name="status_expires_at", background=True),
+])
+mongo_indexes.register("user_tiers", [
+    # Expiry sweep; lookups use _id (the user id)
+    IndexModel([("expires_at", 1)], name="expires_at", background=True),
+])
+# Activity log pages are keyset-ordered on (created_at, id); each filter gets an equality prefix
+mongo_indexes.register("admin_activity_logs", [
+    IndexModel([("created_at", -1), ("id", -1)], name="created_at_id", background=True),
+    IndexModel([("admin_user_id", 1), ("created_at", -1), ("id", -1)], name="admin_created_at_id", background=True),
+    IndexModel([("action", 1), ("created_at", -1), ("id", -1)], name="action_created_at_id", background=True),
+    IndexModel([("target_type", 1), ("created_at", -1), ("id", -1)], name="target_type_created_at_id", background=True),
+    IndexModel([("target_id", 1), ("created_at", -1), ("id", -1)], name="target_id_created_at_id", background=True),
+])
+ADMIN_LOG_TTL_DAYS = int(os.environ.get('ADMIN_LOG_TTL_DAYS', 0))
+if ADMIN_LOG_TTL_DAYS > 0:
+    mongo_indexes.register("admin_activity_logs", [
+        IndexModel([("created_at", 1)], name="created_at_ttl", expireAfterSeconds=ADMIN_LOG_TTL_DAYS * 86400, background=True),
+    ])
+# The find() equivalents of the queries that run: aggregation $match/$sort stages and
+# _activity_log_query's filters, with placeholder values
+_ACTIVE_DONATION = {"status": "completed", "$or": [{"expires_at": {"$gt": datetime(1970, 1, 1)}}, {"expires_at": None}]}
+_ACTIVITY_PAGE_AFTER = {"$or": [{"created_at": {"$lt": datetime(1970, 1, 1)}}, {"created_at": datetime(1970, 1, 1), "id": {"$lt": ""}}]}
+_ACTIVITY_SORT = [("created_at", -1), ("id", -1)]
+mongo_indexes.register_query("effective_tiers", "donations", _ACTIVE_DONATION, sort=[("user_id", 1), ("created_at", -1)])
+mongo_indexes.register_query(
+    "effective_tiers_for_users", "donations", {"user_id": {"$in": [""]}, **_ACTIVE_DONATION},
+    sort=[("user_id", 1), ("created_at", -1)]
+)
+mongo_indexes.register_query(
+    "completed_donations_by_tier", "donations", {"status": "completed"},
+    projection={"_id": 0, "tier": 1, "amount": 1}
+)
+mongo_indexes.register_query("expired_user_tiers", "user_tiers", {"expires_at": {"$lte": datetime(1970, 1, 1)}}, projection={"_id": 1})
+mongo_indexes.register_query("user_tiers_by_ids", "user_tiers", {"_id": {"$in": [""]}})
+mongo_indexes.register_query("recent_admin_activity", "admin_activity_logs", {"created_at": {"$gte": datetime(1970, 1, 1)}})
+mongo_indexes.register_query("admin_activity_newest_first", "admin_activity_logs", {}, sort=_ACTIVITY_SORT)
+mongo_indexes.register_query("admin_activity_page", "admin_activity_logs", _ACTIVITY_PAGE_AFTER, sort=_ACTIVITY_SORT)
+mongo_indexes.register_query(
+    "admin_activity_in_range", "admin_activity_logs",
+    {"created_at": {"$gte": datetime(1970, 1, 1), "$lt": datetime(1970, 1, 2)}}, sort=_ACTIVITY_SORT
+)
+mongo_indexes.register_query("admin_activity_by_admin_page", "admin_activity_logs", {"admin_user_id": "", **_ACTIVITY_PAGE_AFTER}, sort=_ACTIVITY_SORT)
+mongo_indexes.register_query("admin_activity_by_action", "admin_activity_logs", {"action": ""}, sort=_ACTIVITY_SORT)
+mongo_indexes.register_query("admin_activity_by_target_type", "admin_activity_logs", {"target_type": ""}, sort=_ACTIVITY_SORT)
+mongo_indexes.register_query("admin_activity_by_target", "admin_activity_logs", {"target_id": ""}, sort=_ACTIVITY_SORT)
+
+ADMIN_LOG_EXPORT_FIELDS = [
+    "id", "created_at", "admin_user_id", "admin_username", "action",
+    "target_type", "target_id", "details", "ip_address", "user_agent"
+]
+ACTIVITY_LOG_SORT = [("created_at", -1), ("id", -1)]
+
+def encode_activity_cursor(created_at: datetime, log_id: str) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    raw = f"{created_at.isoformat()}|{log_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_activity_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_activity_cursor; raises ValueError if malformed"""
+    try:
+        created_at, log_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), log_id
+    except Exception:
+        raise ValueError("Invalid activity log cursor")
+
+def _activity_log_query(filters: Optional[AdminActivityLogFilter], after: Optional[Tuple[datetime, str]] = None) -> Dict[str, Any]:
+    """Mongo filter shared by activity log pages and exports"""
+    query: Dict[str, Any] = {}
+    if filters:
+        for field in ("admin_user_id", "action", "target_type", "target_id"):
+            if getattr(filters, field):
+                query[field] = getattr(filters, field)
+        created_at = {}
+        if filters.date_from:
+            created_at["$gte"] = filters.date_from
+        if filters.date_to:
+            created_at["$lt"] = filters.date_to
+        if created_at:
+            query["created_at"] = created_at
+    if after:
+        query["$or"] = [
+            {"created_at": {"$lt": after[0]}},
+            {"created_at": after[0], "id": {"$lt": after[1]}},
+        ]
+    return query
+
+def _activity_log_matches(log: Dict[str, Any], filters: Optional[AdminActivityLogFilter], after: Optional[Tuple[datetime, str]]) -> bool:
+    """In-memory twin of _activity_log_query, for logs still queued in the audit log writer"""
+    if filters:
+        for field in ("admin_user_id", "action", "target_type", "target_id"):
+            if getattr(filters, field) and log.get(field) != getattr(filters, field):
+                return False
+        if filters.date_from and log["created_at"] < filters.date_from:
+            return False
+        if filters.date_to and log["created_at"] >= filters.date_to:
+            return False
+    return not after or (log["created_at"], log["id"]) < after
+
 class AdminRepository:
     def __init__(self):
         mongo_url = os.environ['MONGO_URL']
@@ -21,6 +131,10 @@ class AdminRepository:
         self.db = self.client[os.environ['DB_NAME']]
         self.donations_collection = self.db.donations
         self.activity_logs_collection = self.db.admin_activity_logs
+        # Each user's current effective tier, keyed by user id; derived from donations
+        self.user_tiers_collection = self.db.user_tiers
+        self.tier_expiry_interval = float(os.environ.get('TIER_EXPIRY_INTERVAL', 300))
+        self.tier_expiry_batch_size = int(os.environ.get('TIER_EXPIRY_BATCH', 500))
 
     async def get_dashboard_stats(self) -> AdminDashboardStats:
         """Get dashboard statistics for admin overview"""
@@ -106,12 +220,13 @@ class AdminRepository:
                 # Convert ObjectId to string for JSON serialization
                 if "_id" in user_doc:
                     user_doc["_id"] = str(user_doc["_id"])
-                
-                # Get user's current tier
-                tier_info = await self.get_user_tier_info(user_doc["id"])
-                user_doc["current_tier"] = tier_info
                 users.append(user_doc)
             
+            # Current tiers for the whole page in one lookup
+            tiers = await self.get_user_tiers([user_doc["id"] for user_doc in users])
+            for user_doc in users:
+                user_doc["current_tier"] = tiers.get(user_doc["id"])
+            
             return {
                 "users": users,
                 "total_count": total_count,
@@ -130,37 +245,151 @@ class AdminRepository:
                 "total_pages": 0
             }
 
+    def _active_donations_filter(self, now: datetime) -> Dict[str, Any]:
+        """Completed donations that still grant their tier"""
+        return {
+            "status": "completed",
+            "$or": [
+                {"expires_at": {"$gt": now}},
+                {"expires_at": None}  # Lifetime tiers
+            ]
+        }
+
+    def _tier_info(self, tier_doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "tier": tier_doc["tier"],
+            "expires_at": tier_doc.get("expires_at"),
+            "purchased_at": tier_doc["purchased_at"],
+            "amount_paid": tier_doc["amount_paid"]
+        }
+
+    async def _effective_tiers(self, user_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Compute current tiers from the donations history: each user's newest active donation"""
+        match = self._active_donations_filter(datetime.utcnow())
+        if user_ids is not None:
+            match["user_id"] = {"$in": user_ids}
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"user_id": 1, "created_at": -1}},
+            {"$group": {"_id": "$user_id", "donation": {"$first": "$$ROOT"}}},
+        ]
+        tiers = {}
+        async for doc in self.donations_collection.aggregate(pipeline, allowDiskUse=True):
+            donation = doc["donation"]
+            tiers[doc["_id"]] = {
+                "_id": doc["_id"],
+                "tier": donation["tier"],
+                "expires_at": donation.get("expires_at"),
+                "purchased_at": donation["created_at"],
+                "amount_paid": donation["amount"],
+                "donation_id": donation.get("id"),
+            }
+        return tiers
+
+    async def recompute_user_tiers(self, user_ids: List[str]) -> int:
+        """Rewrite the stored tier of these users from their donations; returns documents written"""
+        if not user_ids:
+            return 0
+        tiers = await self._effective_tiers(user_ids)
+        now = datetime.utcnow()
+        operations = [
+            ReplaceOne({"_id": user_id}, {**tiers[user_id], "updated_at": now}, upsert=True)
+            if user_id in tiers else DeleteOne({"_id": user_id})
+            for user_id in set(user_ids)
+        ]
+        result = await self.user_tiers_collection.bulk_write(operations, ordered=False)
+        # Tokens issued before this carry the old tier
+        tier_changes.mark(user_ids)
+        return result.upserted_count + result.modified_count + result.deleted_count
+
     async def get_user_tier_info(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user's current tier information"""
         try:
-            # Find the most recent active donation
-            donation = await self.donations_collection.find_one(
-                {
-                    "user_id": user_id,
-                    "status": "completed",
-                    "$or": [
-                        {"expires_at": {"$gt": datetime.utcnow()}},
-                        {"expires_at": None}  # Lifetime tiers
-                    ]
-                },
-                sort=[("created_at", -1)]
-            )
-            
-            if donation:
-                return {
-                    "tier": donation["tier"],
-                    "expires_at": donation.get("expires_at"),
-                    "purchased_at": donation["created_at"],
-                    "amount_paid": donation["amount"]
-                }
-            
+            tier_doc = await self.user_tiers_collection.find_one({"_id": user_id})
+            # An expired tier may not have been swept yet; the sweep recomputes it
+            if tier_doc and (tier_doc.get("expires_at") is None or tier_doc["expires_at"] > datetime.utcnow()):
+                return self._tier_info(tier_doc)
             return None
             
         except Exception as e:
             logger.error(f"Error getting user tier info: {e}")
             return None
 
-    async def assign_user_tier(self, user_id: str, tier: DonationTier, admin_id: str, expires_at: Optional[datetime] = None, notes: Optional[str] = None) -> bool:
+    async def get_user_tiers(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Current tier information for many users with one query (users without a tier are omitted)"""
+        if not user_ids:
+            return {}
+        try:
+            now = datetime.utcnow()
+            tiers = {}
+            async for tier_doc in self.user_tiers_collection.find({"_id": {"$in": user_ids}}):
+                if tier_doc.get("expires_at") is None or tier_doc["expires_at"] > now:
+                    tiers[tier_doc["_id"]] = self._tier_info(tier_doc)
+            return tiers
+        except Exception as e:
+            logger.error(f"Error getting user tiers: {e}")
+            return {}
+
+    async def expire_user_tiers(self) -> int:
+        """Recompute users whose stored tier has expired, a batch at a time; returns users processed"""
+        processed = 0
+        while True:
+            expired = await self.user_tiers_collection.find(
+                {"expires_at": {"$lte": datetime.utcnow()}}, {"_id": 1}
+            ).limit(self.tier_expiry_batch_size).to_list(self.tier_expiry_batch_size)
+            user_ids = [doc["_id"] for doc in expired]
+            if not user_ids:
+                break
+            await self.recompute_user_tiers(user_ids)
+            processed += len(user_ids)
+            if len(user_ids) < self.tier_expiry_batch_size:
+                break
+        if processed:
+            logger.info(f"Recomputed {processed} expired user tiers")
+        return processed
+
+    async def check_user_tiers(self, repair: bool = False) -> Dict[str, Any]:
+        """Compare stored tiers with the donations history; optionally rewrite mismatched users"""
+        expected = await self._effective_tiers()
+        now = datetime.utcnow()
+        stale, orphaned = [], []
+        seen = set()
+        async for tier_doc in self.user_tiers_collection.find({}):
+            user_id = tier_doc["_id"]
+            seen.add(user_id)
+            wanted = expected.get(user_id)
+            if wanted is None:
+                # Expired-but-unswept documents are expected between sweeps
+                if tier_doc.get("expires_at") is None or tier_doc["expires_at"] > now:
+                    orphaned.append(user_id)
+            elif any(tier_doc.get(field) != wanted[field] for field in ("tier", "expires_at", "donation_id")):
+                stale.append(user_id)
+        missing = [user_id for user_id in expected if user_id not in seen]
+
+        repaired = 0
+        mismatched = missing + stale + orphaned
+        if repair:
+            for start in range(0, len(mismatched), self.tier_expiry_batch_size):
+                repaired += await self.recompute_user_tiers(mismatched[start:start + self.tier_expiry_batch_size])
+        return {
+            "users_with_tier": len(expected),
+            "missing": len(missing),
+            "stale": len(stale),
+            "orphaned": len(orphaned),
+            "sample": mismatched[:20],
+            "repaired": repaired
+        }
+
+    async def ensure_user_tiers(self):
+        """Build the tier table from donations the first time it is needed"""
+        try:
+            if await self.user_tiers_collection.estimated_document_count() == 0:
+                result = await self.check_user_tiers(repair=True)
+                logger.info(f"Built user tiers: {result['repaired']} users")
+        except Exception as e:
+            logger.error(f"Error building user tiers: {e}")
+
+    async def assign_user_tier(self, user_id: str, tier: DonationTier, admin_user: User, expires_at: Optional[datetime] = None, notes: Optional[str] = None) -> bool:
         """Manually assign a tier to a user (admin action)"""
         try:
             # Create a donation record for admin assignment
@@ -171,14 +400,16 @@ class AdminRepository:
                 payment_method="admin_assignment",
                 status="completed",
                 expires_at=expires_at,
-                notes=f"Admin assignment by {admin_id}. {notes or ''}"
+                notes=f"Admin assignment by {admin_user.id}. {notes or ''}"
             )
             
             result = await self.donations_collection.insert_one(donation_record.dict())
+            platform_rollup_repository.record_donations([donation_record.dict()])
+            await self.recompute_user_tiers([user_id])
             
             # Log admin activity
             await self.log_admin_activity(
-                admin_id,
+                admin_user,
                 "assign_tier",
                 "user",
                 user_id,
@@ -191,6 +422,45 @@ class AdminRepository:
             logger.error(f"Error assigning user tier: {e}")
             return False
 
+    async def assign_user_tiers(self, user_ids: List[str], tier: DonationTier, admin_user: User, expires_at: Optional[datetime] = None, notes: Optional[str] = None) -> bool:
+        """Assign a tier to many users with one insert_many (admin action)"""
+        if not user_ids:
+            return True
+        try:
+            donation_records = [
+                DonationRecord(
+                    user_id=user_id,
+                    tier=tier,
+                    amount=0.0,  # Admin assignment
+                    payment_method="admin_assignment",
+                    status="completed",
+                    expires_at=expires_at,
+                    notes=f"Admin assignment by {admin_user.id}. {notes or ''}"
+                ).dict()
+                for user_id in user_ids
+            ]
+            
+            result = await self.donations_collection.insert_many(donation_records, ordered=False)
+            platform_rollup_repository.record_donations(donation_records)
+            await self.recompute_user_tiers(user_ids)
+            
+            # Log admin activity
+            await self.log_admin_activities(admin_user, [
+                {
+                    "action": "assign_tier",
+                    "target_type": "user",
+                    "target_id": user_id,
+                    "details": {"tier": tier, "expires_at": expires_at, "notes": notes, "bulk": True}
+                }
+                for user_id in user_ids
+            ])
+            
+            return len(result.inserted_ids) == len(user_ids)
+            
+        except Exception as e:
+            logger.error(f"Error bulk assigning user tiers: {e}")
+            return False
+
     async def record_donation(self, donation_data: DonationRecordCreate) -> Optional[DonationRecord]:
         """Record a donation/purchase"""
         try:
@@ -198,6 +468,8 @@ class AdminRepository:
             result = await self.donations_collection.insert_one(donation_record.dict())
             
             if result.inserted_id:
+                platform_rollup_repository.record_donations([donation_record.dict()])
+                await self.recompute_user_tiers([donation_record.user_id])
                 return donation_record
             
             return None
@@ -317,45 +589,116 @@ class AdminRepository:
             )
         ]
 
-    async def log_admin_activity(self, admin_id: str, action: str, target_type: str, target_id: str, details: Dict[str, Any], ip_address: Optional[str] = None, user_agent: Optional[str] = None):
-        """Log admin activity for audit trail"""
+    async def log_admin_activity(self, admin_user: User, action: str, target_type: str, target_id: str, details: Dict[str, Any], ip_address: Optional[str] = None, user_agent: Optional[str] = None):
+        """Log admin activity for audit trail (queued; written in batches by the audit log writer)"""
+        await self.log_admin_activities(admin_user, [{
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "details": details
+        }], ip_address, user_agent)
+
+    async def log_admin_activities(self, admin_user: User, entries: List[Dict[str, Any]], ip_address: Optional[str] = None, user_agent: Optional[str] = None):
+        """Queue many admin actions for the audit trail"""
         try:
-            # Get admin username
-            admin_user = await user_repository.get_user_by_id(admin_id)
-            admin_username = admin_user.username if admin_user else "unknown"
-            
-            activity_log = AdminActivityLog(
-                admin_user_id=admin_id,
-                admin_username=admin_username,
-                action=action,
-                target_type=target_type,
-                target_id=target_id,
-                details=details,
-                ip_address=ip_address,
-                user_agent=user_agent
-            )
-            
-            await self.activity_logs_collection.insert_one(activity_log.dict())
-            
+            for entry in entries:
+                activity_log = AdminActivityLog(
+                    admin_user_id=admin_user.id,
+                    admin_username=admin_user.username,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                    **entry
+                ).dict()
+                # The log id doubles as _id so retried batches cannot insert twice
+                activity_log["_id"] = activity_log["id"]
+                # Mongo keeps milliseconds; queued and stored copies must sort (and page) alike
+                created_at = activity_log["created_at"]
+                activity_log["created_at"] = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+                await audit_log_writer.record(activity_log)
         except Exception as e:
-            logger.error(f"Error logging admin activity: {e}")
+            logger.error(f"Error logging admin activities: {e}")
 
-    async def get_admin_activity_logs(self, limit: int = 100) -> List[AdminActivityLog]:
-        """Get recent admin activity logs"""
+    async def insert_activity_logs(self, activity_logs: List[Dict[str, Any]]) -> bool:
+        """Write a batch from the audit log writer; False leaves it queued for a retry
+
+        Rollups are recorded only once the whole batch is stored, for every log in it:
+        a failed attempt records none, so logs it did store are counted on the retry.
+        """
         try:
-            logs_cursor = self.activity_logs_collection.find().sort("created_at", -1).limit(limit)
-            
-            logs = []
+            await self.activity_logs_collection.insert_many(activity_logs, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            # Duplicate ids were written by an earlier, partially failed attempt
+            if e.details.get("writeConcernErrors") or any(error["code"] != 11000 for error in errors):
+                logger.error(f"Error writing admin activity logs: {e}")
+                return False
+        except Exception as e:
+            logger.error(f"Error writing admin activity logs: {e}")
+            return False
+
+        actions_by_day: Dict[datetime, List[str]] = {}
+        for log in activity_logs:
+            day = datetime.combine(log["created_at"].date(), datetime.min.time())
+            actions_by_day.setdefault(day, []).append(log["action"])
+        for day, actions in actions_by_day.items():
+            platform_rollup_repository.record_admin_actions(actions, day)
+        return True
+
+    async def get_admin_activity_logs(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        filters: Optional[AdminActivityLogFilter] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One keyset-paginated page of activity logs, newest first, plus the next page's cursor
+
+        Raises ValueError for a malformed cursor. Logs still queued for writing are
+        included, so an action shows up as soon as it is made.
+        """
+        after = decode_activity_cursor(cursor) if cursor else None
+        try:
+            logs = {
+                log["id"]: {key: value for key, value in log.items() if key != "_id"}
+                for log in audit_log_writer.pending_logs()
+                if _activity_log_matches(log, filters, after)
+            }
+            logs_cursor = self.activity_logs_collection.find(
+                _activity_log_query(filters, after), {"_id": 0}
+            ).sort(ACTIVITY_LOG_SORT).limit(limit + 1)
             async for log_doc in logs_cursor:
-                logs.append(AdminActivityLog(**log_doc))
+                logs.setdefault(log_doc["id"], log_doc)
             
-            return logs
+            page = sorted(logs.values(), key=lambda log: (log["created_at"], log["id"]), reverse=True)
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = encode_activity_cursor(page[-1]["created_at"], page[-1]["id"])
+            return page, next_cursor
             
         except Exception as e:
             logger.error(f"Error getting admin activity logs: {e}")
-            return []
+            return [], None
+
+    async def iter_admin_activity_logs(
+        self,
+        filters: Optional[AdminActivityLogFilter] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream matching activity logs newest first, in Mongo batches, for export"""
+        # Write out queued entries so the export is complete
+        await audit_log_writer.flush()
+        try:
+            logs_cursor = self.activity_logs_collection.find(
+                _activity_log_query(filters), {"_id": 0}
+            ).sort(ACTIVITY_LOG_SORT).batch_size(batch_size)
+            async for log_doc in logs_cursor:
+                yield log_doc
+        except Exception as e:
+            logger.error(f"Error exporting admin activity logs: {e}")
+            # Abort the response: ending the stream here would look like a complete export
+            raise
 
-    async def delete_user_account(self, user_id: str, admin_id: str) -> bool:
+    async def delete_user_account(self, user_id: str, admin_user: User) -> bool:
         """Delete a user account (admin action)"""
         try:
             # First disable the user
@@ -364,7 +707,7 @@ class AdminRepository:
             if success:
                 # Log the action
                 await self.log_admin_activity(
-                    admin_id,
+                    admin_user,
                     "delete_user",
                     "user",
                     user_id,
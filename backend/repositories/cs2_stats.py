@@ -1,49 +1,326 @@
-from typing import Optional, List
-from models.cs2_stats import CS2PlayerStats, CS2Match, CS2StatsUpdate, CS2MatchCreate, CS2Rank, CS2Map, CS2MapStats, CS2WeaponStats, CS2GameMode
+from typing import Optional, List, Tuple, Dict, Any, AsyncIterator
+from models.cs2_stats import CS2PlayerStats, CS2Match, CS2StatsUpdate, CS2MatchCreate, CS2Rank, CS2Map, CS2MapStats, CS2WeaponStats, CS2GameMode, CS2MatchHistoryFilter
 from database.mysql import mysql_db
+from database.sharding import shard_router, PRIMARY_SHARD
+from models.ids import id_to_bytes, id_from_bytes
+from database.index_advisor import index_advisor
+from repositories.rank_history import rank_history_repository
+from services.stats_snapshot import player_stats_snapshot, TIMESTAMP_COLUMNS
+from services.match_archive import match_archive
+from repositories.platform_rollups import platform_rollup_repository
+import aiomysql
+import base64
+import heapq
 import logging
-from datetime import datetime, timedelta
+import math
+from datetime import datetime, date, timedelta
 import json
 import random
 
 logger = logging.getLogger(__name__)
 
+MATCH_COLUMNS = [
+    "id", "user_id", "match_date", "game_mode", "map_name", "duration_minutes",
+    "result", "team_score", "enemy_score", "kills", "deaths", "assists", "score",
+    "mvp", "headshots", "damage_dealt", "utility_damage", "enemies_flashed",
+    "money_spent", "equipment_value", "rounds_won", "rounds_lost",
+    "first_kill_rounds", "first_death_rounds", "created_at"
+]
+
+INSERT_MATCH = f"INSERT INTO cs2_matches ({', '.join(MATCH_COLUMNS)}) VALUES ({', '.join(['%s'] * len(MATCH_COLUMNS))})"
+
+def encode_match_cursor(match_date: datetime, match_id: str) -> str:
+    """Encode a (match_date, id) keyset position as an opaque cursor"""
+    raw = f"{match_date.isoformat()}|{match_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_match_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_match_cursor; raises ValueError if malformed"""
+    try:
+        match_date, match_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        id_to_bytes(match_id)
+        return datetime.fromisoformat(match_date), match_id
+    except Exception:
+        raise ValueError("Invalid match history cursor")
+
+def _match_history_where(user_id: str, filters: Optional[CS2MatchHistoryFilter]) -> Tuple[List[str], List[Any]]:
+    """Build the WHERE clause shared by history pages and exports"""
+    conditions = ["user_id = %s"]
+    params: List[Any] = [user_id]
+    if filters:
+        if filters.map_name:
+            conditions.append("map_name = %s")
+            params.append(filters.map_name.value)
+        if filters.game_mode:
+            conditions.append("game_mode = %s")
+            params.append(filters.game_mode.value)
+        if filters.result:
+            conditions.append("result = %s")
+            params.append(filters.result)
+        if filters.date_from:
+            conditions.append("match_date >= %s")
+            params.append(filters.date_from)
+        if filters.date_to:
+            conditions.append("match_date < %s")
+            params.append(filters.date_to)
+    return conditions, params
+
+def _matches_filters(row: Dict[str, Any], filters: Optional[CS2MatchHistoryFilter]) -> bool:
+    """Apply history filters to an already fetched row (used for archived matches)"""
+    if not filters:
+        return True
+    if filters.map_name and row["map_name"] != filters.map_name.value:
+        return False
+    if filters.game_mode and row["game_mode"] != filters.game_mode.value:
+        return False
+    if filters.result and row["result"] != filters.result:
+        return False
+    if filters.date_from and row["match_date"] < filters.date_from:
+        return False
+    if filters.date_to and row["match_date"] >= filters.date_to:
+        return False
+    return True
+
+def _match_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the BINARY(16) match id of a fetched row to its string form"""
+    row["id"] = id_from_bytes(row["id"])
+    return row
+
+def _match_history_sql(conditions: List[str], paged: bool = True) -> str:
+    """Select a player's matches newest first; paged queries take a trailing LIMIT parameter"""
+    sql = f"""SELECT {', '.join(MATCH_COLUMNS)} FROM cs2_matches
+              WHERE {' AND '.join(conditions)}
+              ORDER BY match_date DESC, id DESC"""
+    return sql + " LIMIT %s" if paged else sql
+
+# Stats the leaderboard can be ranked by; each has a covering (stat, user_id) index
+LEADERBOARD_STATS = [
+    "kd_ratio", "total_kills", "win_rate", "matches_played",
+    "headshot_percentage", "mvp_count", "adr", "rank_rating"
+]
+
+def _leaderboard_sql(stat_type: str) -> str:
+    return f"""SELECT s.user_id, s.{stat_type} AS value, u.username, u.display_name
+               FROM cs2_player_stats s
+               JOIN users u ON s.user_id = u.id
+               ORDER BY s.{stat_type} DESC
+               LIMIT %s"""
+
+# Run on every match shard; usernames are looked up on the primary afterwards
+ALL_RECENT_MATCHES_SQL = f"""SELECT {', '.join(MATCH_COLUMNS)}
+                             FROM cs2_matches
+                             ORDER BY match_date DESC
+                             LIMIT %s"""
+
+MAP_AGGREGATES_SQL = """SELECT map_name, SUM(matches_played) AS matches_played, SUM(wins) AS wins,
+                               SUM(losses) AS losses, SUM(draws) AS draws, SUM(kills) AS kills,
+                               SUM(deaths) AS deaths, SUM(assists) AS assists,
+                               SUM(damage_dealt) AS damage_dealt, SUM(rounds_played) AS rounds_played
+                        FROM cs2_player_map_stats
+                        GROUP BY map_name
+                        ORDER BY matches_played DESC"""
+
+ROLLUP_COUNTERS = (
+    "matches_played", "wins", "losses", "draws", "kills", "deaths", "assists",
+    "headshots", "damage_dealt", "mvps", "rounds_played"
+)
+
+# Trend buckets over the daily rollup rows: the day itself, its Monday, or the 1st of its month
+TREND_BUCKETS = {
+    "day": "day",
+    "week": "DATE_SUB(day, INTERVAL WEEKDAY(day) DAY)",
+    "month": "DATE_SUB(day, INTERVAL DAYOFMONTH(day) - 1 DAY)",
+}
+
+def _trend_sql(granularity: str) -> str:
+    return f"""SELECT {TREND_BUCKETS[granularity]} AS period, SUM(matches_played) AS matches_played,
+                      SUM(wins) AS wins, SUM(losses) AS losses, SUM(draws) AS draws,
+                      SUM(kills) AS kills, SUM(deaths) AS deaths, SUM(assists) AS assists,
+                      SUM(headshots) AS headshots, SUM(damage_dealt) AS damage_dealt,
+                      SUM(mvps) AS mvps, SUM(rounds_played) AS rounds_played
+               FROM cs2_player_daily_stats
+               WHERE user_id = %s AND day BETWEEN %s AND %s
+               GROUP BY period
+               ORDER BY period"""
+
+_SAMPLE_USER = "00000000-0000-0000-0000-000000000000"
+_SAMPLE_DATE = datetime(2024, 1, 1)
+index_advisor.register("match_history_page", _match_history_sql(["user_id = %s"]), (_SAMPLE_USER, 21))
+index_advisor.register(
+    "match_history_next_page",
+    _match_history_sql(["user_id = %s", "(match_date < %s OR (match_date = %s AND id < %s))"]),
+    (_SAMPLE_USER, _SAMPLE_DATE, _SAMPLE_DATE, _SAMPLE_USER, 21)
+)
+index_advisor.register("match_history_by_map", _match_history_sql(["user_id = %s", "map_name = %s"]), (_SAMPLE_USER, "de_dust2", 21))
+index_advisor.register("match_history_by_mode", _match_history_sql(["user_id = %s", "game_mode = %s"]), (_SAMPLE_USER, "competitive", 21))
+index_advisor.register("all_recent_matches", ALL_RECENT_MATCHES_SQL, (50,))
+for _stat in LEADERBOARD_STATS:
+    index_advisor.register(f"leaderboard_{_stat}", _leaderboard_sql(_stat), (100,))
+for _granularity in TREND_BUCKETS:
+    # Weekly and monthly buckets group at most a few hundred rows of one player
+    index_advisor.register(
+        f"player_trend_{_granularity}", _trend_sql(_granularity),
+        (_SAMPLE_USER, _SAMPLE_DATE.date(), _SAMPLE_DATE.date() + timedelta(days=30)),
+        allow=["temporary", "filesort"] if _granularity != "day" else []
+    )
+# Aggregating every row is inherent to this report; it is served to admins only
+index_advisor.register("map_aggregates", MAP_AGGREGATES_SQL, allow=["full_scan", "temporary", "filesort"])
+
 class CS2StatsRepository:
-    async def get_player_stats(self, user_id: str) -> Optional[CS2PlayerStats]:
-        """Get CS2 statistics for a player"""
+    async def get_player_stats(self, user_id: str, primary: bool = False, cached: bool = False) -> Optional[CS2PlayerStats]:
+        """Get CS2 statistics for a player (`primary` skips replicas for read-modify-write callers,
+        `cached` reads the main row from the stats snapshot while it is fresh)"""
         if not mysql_db.pool:
             # Return mock data when MySQL is not available
             return await self._get_mock_stats(user_id)
         
+        snapshot = player_stats_snapshot.current() if cached and not primary else None
+        row = snapshot.get(user_id) if snapshot else None
+        if row:
+            return await self._get_snapshot_stats(row)
+        
         try:
-            async with mysql_db.pool.acquire() as conn:
-                # Get main stats
-                result = await conn.fetchone(
-                    "SELECT * FROM cs2_player_stats WHERE user_id = ?",
-                    (user_id,)
-                )
-                
-                if not result:
-                    # Create default stats for new player
-                    return await self._create_default_stats(user_id)
-                
-                # Convert result to CS2PlayerStats
-                stats_data = dict(result)
-                
-                # Parse JSON fields
-                if stats_data.get('map_stats'):
-                    stats_data['map_stats'] = json.loads(stats_data['map_stats'])
-                if stats_data.get('weapon_stats'):
-                    stats_data['weapon_stats'] = json.loads(stats_data['weapon_stats'])
-                if stats_data.get('recent_matches'):
-                    stats_data['recent_matches'] = json.loads(stats_data['recent_matches'])
-                
-                return CS2PlayerStats(**stats_data)
+            connection = mysql_db.get_connection() if primary else mysql_db.read_connection(user_id)
+            async with connection as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    # Get main stats
+                    await cursor.execute(
+                        "SELECT * FROM cs2_player_stats WHERE user_id = %s",
+                        (user_id,)
+                    )
+                    result = await cursor.fetchone()
+                    
+                    if not result:
+                        # Create default stats for new player
+                        return await self._create_default_stats(user_id)
+                    
+                    # Convert result to CS2PlayerStats
+                    stats_data = dict(result)
+                    stats_data['id'] = id_from_bytes(stats_data['id'])
+                    return await self._build_player_stats(cursor, stats_data)
                 
         except Exception as e:
             logger.error(f"Error fetching CS2 stats for user {user_id}: {e}")
             return await self._get_mock_stats(user_id)
 
+    async def _build_player_stats(self, cursor, stats_data: Dict[str, Any]) -> CS2PlayerStats:
+        """Complete a cs2_player_stats row with its per-map and per-weapon stats"""
+        user_id = stats_data['user_id']
+        
+        # Per-map and per-weapon stats live in their own tables
+        stats_data.pop('map_stats', None)
+        stats_data.pop('weapon_stats', None)
+        stats_data['map_stats'] = await self._fetch_map_stats(cursor, user_id)
+        stats_data['weapon_stats'] = await self._fetch_weapon_stats(cursor, user_id)
+        
+        if not stats_data.get('favorite_map') and stats_data['map_stats']:
+            stats_data['favorite_map'] = stats_data['map_stats'][0].map_name
+        
+        # Parse JSON fields
+        if stats_data.get('recent_matches'):
+            stats_data['recent_matches'] = json.loads(stats_data['recent_matches'])
+        else:
+            stats_data['recent_matches'] = []
+        
+        return CS2PlayerStats(**stats_data)
+
+    async def _get_snapshot_stats(self, row: Dict[str, Any]) -> Optional[CS2PlayerStats]:
+        """Build a player's stats from their snapshot row plus the live per-map and per-weapon tables"""
+        stats_data = {
+            name: value for name, value in row.items()
+            if name not in ('username', 'display_name')
+        }
+        for name in TIMESTAMP_COLUMNS:
+            value = stats_data.pop(name)
+            if not math.isnan(value):
+                stats_data[name] = datetime.utcfromtimestamp(value)
+        # The snapshot stores NULL strings as ''
+        stats_data['favorite_map'] = stats_data['favorite_map'] or None
+        
+        try:
+            async with mysql_db.read_connection(row['user_id']) as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    return await self._build_player_stats(cursor, stats_data)
+        except Exception as e:
+            logger.error(f"Error fetching CS2 stats for user {row['user_id']}: {e}")
+            return await self._get_mock_stats(row['user_id'])
+
+    async def get_player_stat_values(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """A player's scalar stats, from the stats snapshot while it is fresh"""
+        snapshot = player_stats_snapshot.current()
+        row = snapshot.get(user_id) if snapshot else None
+        if row:
+            return row
+        stats = await self.get_player_stats(user_id)
+        return stats.dict() if stats else None
+
+    async def _fetch_map_stats(self, cursor, user_id: str) -> List[CS2MapStats]:
+        """Read a player's per-map aggregates, most played first"""
+        await cursor.execute(
+            """SELECT map_name, matches_played, wins, losses, draws, kills, deaths,
+                      assists, damage_dealt, rounds_played
+               FROM cs2_player_map_stats
+               WHERE user_id = %s
+               ORDER BY matches_played DESC""",
+            (user_id,)
+        )
+        return [self._row_to_map_stats(row) for row in await cursor.fetchall()]
+
+    async def _fetch_weapon_stats(self, cursor, user_id: str) -> List[CS2WeaponStats]:
+        """Read a player's per-weapon aggregates, most kills first"""
+        await cursor.execute(
+            """SELECT weapon_name, kills, headshots, shots_fired, shots_hit, damage_dealt
+               FROM cs2_player_weapon_stats
+               WHERE user_id = %s
+               ORDER BY kills DESC""",
+            (user_id,)
+        )
+        return [CS2WeaponStats(**row) for row in await cursor.fetchall()]
+
+    def _row_to_map_stats(self, row: dict) -> CS2MapStats:
+        """Convert an aggregate row into CS2MapStats, deriving ADR and win rate"""
+        matches_played = int(row["matches_played"] or 0)
+        rounds_played = int(row["rounds_played"] or 0)
+        return CS2MapStats(
+            map_name=row["map_name"],
+            matches_played=matches_played,
+            wins=int(row["wins"] or 0),
+            losses=int(row["losses"] or 0),
+            draws=int(row["draws"] or 0),
+            kills=int(row["kills"] or 0),
+            deaths=int(row["deaths"] or 0),
+            assists=int(row["assists"] or 0),
+            adr=round(int(row["damage_dealt"] or 0) / rounds_played, 1) if rounds_played else 0.0,
+            win_rate=round(int(row["wins"] or 0) / matches_played * 100, 1) if matches_played else 0.0
+        )
+
+    async def get_player_map_stats(self, user_id: str) -> List[CS2MapStats]:
+        """Get a player's per-map breakdown"""
+        if not mysql_db.pool:
+            return []
+        
+        try:
+            async with mysql_db.read_connection(user_id) as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    return await self._fetch_map_stats(cursor, user_id)
+        except Exception as e:
+            logger.error(f"Error fetching map stats for user {user_id}: {e}")
+            return []
+
+    async def get_map_aggregates(self) -> List[CS2MapStats]:
+        """Get per-map totals across all players from the normalized map stats table"""
+        if not mysql_db.pool:
+            return []
+        
+        try:
+            async with mysql_db.read_connection() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(MAP_AGGREGATES_SQL)
+                    return [self._row_to_map_stats(row) for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error fetching map aggregates: {e}")
+            return []
+
     async def update_player_stats(self, user_id: str, stats_update: CS2StatsUpdate) -> Optional[CS2PlayerStats]:
         """Update CS2 statistics for a player"""
         if not mysql_db.pool:
@@ -52,29 +329,29 @@ class CS2StatsRepository:
             return stats
         
         try:
-            async with mysql_db.pool.acquire() as conn:
-                # Get current stats
-                current_stats = await self.get_player_stats(user_id)
-                if not current_stats:
-                    current_stats = await self._create_default_stats(user_id)
-                
-                # Update fields
-                update_data = stats_update.dict(exclude_unset=True)
-                for field, value in update_data.items():
-                    setattr(current_stats, field, value)
-                
-                # Recalculate derived stats
-                if current_stats.total_deaths > 0:
-                    current_stats.kd_ratio = round(current_stats.total_kills / current_stats.total_deaths, 2)
-                
-                if current_stats.matches_played > 0:
-                    current_stats.win_rate = round((current_stats.matches_won / current_stats.matches_played) * 100, 1)
-                
-                current_stats.updated_at = datetime.utcnow()
-                
-                # Save to database
-                await self._save_stats_to_db(current_stats)
-                return current_stats
+            # Get current stats
+            current_stats = await self.get_player_stats(user_id, primary=True)
+            if not current_stats:
+                current_stats = await self._create_default_stats(user_id)
+            
+            # Update fields
+            update_data = stats_update.dict(exclude_unset=True)
+            for field, value in update_data.items():
+                setattr(current_stats, field, value)
+            
+            # Recalculate derived stats
+            if current_stats.total_deaths > 0:
+                current_stats.kd_ratio = round(current_stats.total_kills / current_stats.total_deaths, 2)
+            
+            if current_stats.matches_played > 0:
+                current_stats.win_rate = round((current_stats.matches_won / current_stats.matches_played) * 100, 1)
+            
+            current_stats.updated_at = datetime.utcnow()
+            
+            # Save to database
+            await self._save_stats_to_db(current_stats)
+            await rank_history_repository.record(user_id, current_stats.rank_rating, current_stats.current_rank)
+            return current_stats
                 
         except Exception as e:
             logger.error(f"Error updating CS2 stats for user {user_id}: {e}")
@@ -87,88 +364,290 @@ class CS2StatsRepository:
             match = CS2Match(
                 user_id=user_id,
                 match_date=datetime.utcnow(),
-                **match_data.dict()
+                **match_data.dict(exclude={"weapon_stats"})
             )
             return match
         
         try:
-            async with mysql_db.pool.acquire() as conn:
-                # Create match record
-                match = CS2Match(
-                    user_id=user_id,
-                    match_date=datetime.utcnow(),
-                    **match_data.dict()
-                )
-                
-                # Insert match into database
-                await conn.execute(
-                    """INSERT INTO cs2_matches 
-                       (id, user_id, match_date, game_mode, map_name, duration_minutes, 
-                        result, team_score, enemy_score, kills, deaths, assists, score, 
-                        mvp, headshots, damage_dealt, utility_damage, enemies_flashed,
-                        money_spent, equipment_value, rounds_won, rounds_lost, 
-                        first_kill_rounds, first_death_rounds, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (match.id, match.user_id, match.match_date, match.game_mode.value, 
-                     match.map_name.value, match.duration_minutes, match.result, 
-                     match.team_score, match.enemy_score, match.kills, match.deaths, 
-                     match.assists, match.score, match.mvp, match.headshots, 
-                     match.damage_dealt, match.utility_damage, match.enemies_flashed,
-                     match.money_spent, match.equipment_value, match.rounds_won, 
-                     match.rounds_lost, match.first_kill_rounds, match.first_death_rounds,
-                     match.created_at)
-                )
-                
-                # Update player stats based on match
-                await self._update_stats_from_match(user_id, match)
-                
-                return match
+            # Create match record
+            match = CS2Match(
+                user_id=user_id,
+                match_date=datetime.utcnow(),
+                **match_data.dict(exclude={"weapon_stats"})
+            )
+            
+            shard = None
+            async with mysql_db.write_connection(user_id) as conn:
+                await conn.begin()
+                try:
+                    async with conn.cursor() as cursor:
+                        # Holds the user's shard placement until commit, so a move cannot strand this match
+                        shard = await shard_router.lock_placement(cursor, user_id)
+                        if shard == PRIMARY_SHARD:
+                            await self._insert_match(cursor, match)
+                        else:
+                            # The match row lives on another server, so it cannot share the aggregates' transaction
+                            async with shard_router.shard_connection(shard) as shard_conn:
+                                async with shard_conn.cursor() as shard_cursor:
+                                    await self._insert_match(shard_cursor, match)
+                        
+                        # Fold the match into the per-map, per-weapon and per-day aggregates
+                        await self._upsert_map_stats(cursor, match)
+                        await self._upsert_daily_stats(cursor, match)
+                        await self._upsert_weapon_stats(cursor, user_id, match_data.weapon_stats)
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    if shard not in (None, PRIMARY_SHARD):
+                        await self._delete_match(shard, match.id)
+                    raise
+            
+            platform_rollup_repository.record_match(match.match_date)
+            
+            # Update player stats based on match
+            await self._update_stats_from_match(user_id, match)
+            
+            return match
                 
         except Exception as e:
             logger.error(f"Error adding CS2 match for user {user_id}: {e}")
             return None
 
+    async def _insert_match(self, cursor, match: CS2Match):
+        """Insert a match row on the cursor's server"""
+        await cursor.execute(
+            INSERT_MATCH,
+            (id_to_bytes(match.id), match.user_id, match.match_date, match.game_mode.value, 
+             match.map_name.value, match.duration_minutes, match.result, 
+             match.team_score, match.enemy_score, match.kills, match.deaths, 
+             match.assists, match.score, match.mvp, match.headshots, 
+             match.damage_dealt, match.utility_damage, match.enemies_flashed,
+             match.money_spent, match.equipment_value, match.rounds_won, 
+             match.rounds_lost, match.first_kill_rounds, match.first_death_rounds,
+             match.created_at)
+        )
+
+    async def _delete_match(self, shard: str, match_id: str):
+        """Compensate a shard insert whose aggregate update failed"""
+        try:
+            async with shard_router.shard_connection(shard) as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("DELETE FROM cs2_matches WHERE id = %s", (id_to_bytes(match_id),))
+        except Exception as e:
+            logger.error(f"Error removing match {match_id} from shard {shard}: {e}")
+
+    async def _upsert_map_stats(self, cursor, match: CS2Match):
+        """Add one match to the player's row for that map"""
+        await cursor.execute(
+            """INSERT INTO cs2_player_map_stats
+               (user_id, map_name, matches_played, wins, losses, draws, kills, deaths,
+                assists, damage_dealt, rounds_played)
+               VALUES (%s, %s, 1, %s, %s, %s, %s, %s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE
+                   matches_played = matches_played + 1,
+                   wins = wins + VALUES(wins),
+                   losses = losses + VALUES(losses),
+                   draws = draws + VALUES(draws),
+                   kills = kills + VALUES(kills),
+                   deaths = deaths + VALUES(deaths),
+                   assists = assists + VALUES(assists),
+                   damage_dealt = damage_dealt + VALUES(damage_dealt),
+                   rounds_played = rounds_played + VALUES(rounds_played)""",
+            (match.user_id, match.map_name.value,
+             int(match.result == "win"), int(match.result == "loss"), int(match.result == "draw"),
+             match.kills, match.deaths, match.assists, match.damage_dealt,
+             match.team_score + match.enemy_score)
+        )
+
+    async def _upsert_daily_stats(self, cursor, match: CS2Match):
+        """Add one match to the player's rollup row for its day"""
+        await cursor.execute(
+            """INSERT INTO cs2_player_daily_stats
+               (user_id, day, matches_played, wins, losses, draws, kills, deaths,
+                assists, headshots, damage_dealt, mvps, rounds_played)
+               VALUES (%s, %s, 1, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE
+                   matches_played = matches_played + 1,
+                   wins = wins + VALUES(wins),
+                   losses = losses + VALUES(losses),
+                   draws = draws + VALUES(draws),
+                   kills = kills + VALUES(kills),
+                   deaths = deaths + VALUES(deaths),
+                   assists = assists + VALUES(assists),
+                   headshots = headshots + VALUES(headshots),
+                   damage_dealt = damage_dealt + VALUES(damage_dealt),
+                   mvps = mvps + VALUES(mvps),
+                   rounds_played = rounds_played + VALUES(rounds_played)""",
+            (match.user_id, match.match_date.date(),
+             int(match.result == "win"), int(match.result == "loss"), int(match.result == "draw"),
+             match.kills, match.deaths, match.assists, match.headshots, match.damage_dealt,
+             int(match.mvp), match.team_score + match.enemy_score)
+        )
+
+    def _trend_point(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Summed rollup counters plus the ratios charts plot"""
+        point = {"period": row["period"], **{key: int(row[key] or 0) for key in ROLLUP_COUNTERS}}
+        point["kd_ratio"] = round(point["kills"] / point["deaths"], 2) if point["deaths"] else float(point["kills"])
+        point["win_rate"] = round(point["wins"] / point["matches_played"] * 100, 1) if point["matches_played"] else 0.0
+        point["headshot_percentage"] = round(point["headshots"] / point["kills"] * 100, 1) if point["kills"] else 0.0
+        point["adr"] = round(point["damage_dealt"] / point["rounds_played"], 1) if point["rounds_played"] else 0.0
+        return point
+
+    async def get_player_trends(
+        self,
+        user_id: str,
+        date_from: date,
+        date_to: date,
+        granularity: str = "day"
+    ) -> Dict[str, Any]:
+        """Sum a player's daily rollups into day, week or month buckets, plus the whole window"""
+        points: List[Dict[str, Any]] = []
+        if mysql_db.pool:
+            try:
+                async with mysql_db.read_connection(user_id) as conn:
+                    async with conn.cursor(aiomysql.DictCursor) as cursor:
+                        await cursor.execute(_trend_sql(granularity), (user_id, date_from, date_to))
+                        points = [self._trend_point(row) for row in await cursor.fetchall()]
+            except Exception as e:
+                logger.error(f"Error fetching trends for user {user_id}: {e}")
+        
+        totals = {key: sum(point[key] for point in points) for key in ROLLUP_COUNTERS}
+        return {"points": points, "totals": self._trend_point({"period": date_from, **totals})}
+
+    async def _upsert_weapon_stats(self, cursor, user_id: str, weapon_stats: List[CS2WeaponStats]):
+        """Add a match's per-weapon numbers to the player's weapon rows"""
+        if not weapon_stats:
+            return
+        await cursor.executemany(
+            """INSERT INTO cs2_player_weapon_stats
+               (user_id, weapon_name, kills, headshots, shots_fired, shots_hit, damage_dealt)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE
+                   kills = kills + VALUES(kills),
+                   headshots = headshots + VALUES(headshots),
+                   shots_fired = shots_fired + VALUES(shots_fired),
+                   shots_hit = shots_hit + VALUES(shots_hit),
+                   damage_dealt = damage_dealt + VALUES(damage_dealt)""",
+            [
+                (user_id, weapon.weapon_name, weapon.kills, weapon.headshots,
+                 weapon.shots_fired, weapon.shots_hit, weapon.damage_dealt)
+                for weapon in weapon_stats
+            ]
+        )
+
     async def get_recent_matches(self, user_id: str, limit: int = 10) -> List[CS2Match]:
         """Get recent matches for a player"""
+        matches, _ = await self.get_match_history(user_id, limit)
+        return matches
+
+    async def get_match_history(
+        self,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        filters: Optional[CS2MatchHistoryFilter] = None
+    ) -> Tuple[List[CS2Match], Optional[str]]:
+        """Get one page of a player's matches, newest first, and the cursor of the next page"""
+        after = decode_match_cursor(cursor) if cursor else None
+        
         if not mysql_db.pool:
             # Return mock matches
-            return await self._get_mock_matches(user_id, limit)
+            matches = await self._get_mock_matches(user_id, limit)
+            matches.sort(key=lambda m: (m.match_date, m.id), reverse=True)
+            return matches, None
         
         try:
-            async with mysql_db.pool.acquire() as conn:
-                results = await conn.fetchall(
-                    "SELECT * FROM cs2_matches WHERE user_id = ? ORDER BY match_date DESC LIMIT ?",
-                    (user_id, limit)
+            conditions, params = _match_history_where(user_id, filters)
+            if after:
+                # Keyset: continue strictly after the last (match_date, id) already returned
+                conditions.append("(match_date < %s OR (match_date = %s AND id < %s))")
+                params.extend([after[0], after[0], id_to_bytes(after[1])])
+            
+            async with shard_router.connection(user_id, read=True) as conn:
+                async with conn.cursor(aiomysql.DictCursor) as db_cursor:
+                    await db_cursor.execute(_match_history_sql(conditions), (*params, limit + 1))
+                    rows = [_match_row(row) for row in await db_cursor.fetchall()]
+            
+            if len(rows) <= limit:
+                # The page reaches past the live partitions; continue in archived months
+                position = (rows[-1]["match_date"], rows[-1]["id"]) if rows else after
+                rows += await match_archive.find_user_matches(
+                    user_id, limit + 1 - len(rows), position,
+                    lambda row: _matches_filters(row, filters),
+                    since=filters.date_from if filters else None
                 )
+            
+            matches = [CS2Match(**row) for row in rows[:limit]]
+            next_cursor = None
+            if len(rows) > limit:
+                last = matches[-1]
+                next_cursor = encode_match_cursor(last.match_date, last.id)
+            
+            return matches, next_cursor
                 
-                matches = []
-                for result in results:
-                    match_data = dict(result)
-                    matches.append(CS2Match(**match_data))
-                
-                return matches
-                
         except Exception as e:
-            logger.error(f"Error fetching recent matches for user {user_id}: {e}")
-            return await self._get_mock_matches(user_id, limit)
+            logger.error(f"Error fetching match history for user {user_id}: {e}")
+            return await self._get_mock_matches(user_id, limit), None
+
+    async def iter_match_history(
+        self,
+        user_id: str,
+        filters: Optional[CS2MatchHistoryFilter] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a player's full match history, newest first: live rows through a server-side cursor, then archived months"""
+        if not mysql_db.pool:
+            for match in await self._get_mock_matches(user_id, 10):
+                yield match.dict()
+            return
+        
+        try:
+            conditions, params = _match_history_where(user_id, filters)
+            async with shard_router.connection(user_id, read=True) as conn:
+                async with conn.cursor(aiomysql.SSDictCursor) as db_cursor:
+                    await db_cursor.execute(_match_history_sql(conditions, paged=False), params)
+                    while True:
+                        rows = await db_cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield _match_row(row)
+            
+            async for row in match_archive.iter_user_matches(user_id, since=filters.date_from if filters else None):
+                if _matches_filters(row, filters):
+                    yield row
+                            
+        except Exception as e:
+            logger.error(f"Error exporting match history for user {user_id}: {e}")
+            # Abort the response: ending the stream here would look like a complete export
+            raise
 
     async def get_leaderboard(self, stat_type: str = "kd_ratio", limit: int = 100) -> List[dict]:
         """Get leaderboard for specific stat"""
+        # Serve from the memory-mapped snapshot while it is fresh
+        snapshot = player_stats_snapshot.current()
+        if snapshot and stat_type in snapshot.columns:
+            return [
+                {
+                    "user_id": row["user_id"],
+                    "username": row["username"],
+                    "display_name": row["display_name"] or None,
+                    "rank": position,
+                    "value": row[stat_type],
+                    "stat_type": stat_type
+                }
+                for position, row in enumerate(await snapshot.top(stat_type, limit), start=1)
+            ]
+        
         if not mysql_db.pool:
             return await self._get_mock_leaderboard(stat_type, limit)
         
         try:
-            async with mysql_db.pool.acquire() as conn:
-                # Join with users table to get usernames
-                query = f"""
-                    SELECT cs2_stats.*, users.username, users.display_name 
-                    FROM cs2_player_stats cs2_stats
-                    JOIN users ON cs2_stats.user_id = users.id
-                    ORDER BY cs2_stats.{stat_type} DESC
-                    LIMIT ?
-                """
-                
-                results = await conn.fetchall(query, (limit,))
+            async with mysql_db.read_connection() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    # Only the ranked stat is read, so the (stat, user_id) index covers the scan
+                    await cursor.execute(_leaderboard_sql(stat_type), (limit,))
+                    results = await cursor.fetchall()
                 
                 leaderboard = []
                 for result in results:
@@ -177,7 +656,7 @@ class CS2StatsRepository:
                         "username": result["username"],
                         "display_name": result["display_name"],
                         "rank": len(leaderboard) + 1,
-                        "value": result[stat_type],
+                        "value": result["value"],
                         "stat_type": stat_type
                     })
                 
@@ -193,10 +672,14 @@ class CS2StatsRepository:
             # Return mock count when MySQL is not available
             return 1547  # Mock total matches
         
-        try:
-            async with mysql_db.pool.acquire() as conn:
-                result = await conn.fetchone("SELECT COUNT(*) FROM cs2_matches")
+        async def count(conn) -> int:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT COUNT(*) FROM cs2_matches")
+                result = await cursor.fetchone()
                 return result[0] if result else 0
+        
+        try:
+            return sum(await shard_router.scatter(count))
                 
         except Exception as e:
             logger.error(f"Error getting total matches count: {e}")
@@ -208,24 +691,34 @@ class CS2StatsRepository:
             # Return mock data when MySQL is not available
             return await self._get_mock_recent_matches_all(limit)
         
+        async def recent(conn) -> List[Dict[str, Any]]:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(ALL_RECENT_MATCHES_SQL, (limit,))
+                return [_match_row(dict(row)) for row in await cursor.fetchall()]
+        
         try:
-            async with mysql_db.pool.acquire() as conn:
-                # Get recent matches with user info
-                results = await conn.fetchall(
-                    """SELECT m.*, u.username 
-                       FROM cs2_matches m 
-                       JOIN users u ON m.user_id = u.id 
-                       ORDER BY m.date DESC 
-                       LIMIT ?""",
-                    (limit,)
-                )
-                
-                matches = []
-                for result in results:
-                    match_data = dict(result)
-                    matches.append(match_data)
-                
-                return matches
+            # Each shard returns its newest `limit` matches; the overall newest are among them
+            per_shard = await shard_router.scatter(recent)
+            matches = heapq.nlargest(limit, (row for rows in per_shard for row in rows), key=lambda row: row["match_date"])
+            
+            # Attach usernames from the users table on the primary
+            user_ids = list({match["user_id"] for match in matches})
+            usernames: Dict[str, str] = {}
+            if user_ids:
+                async with mysql_db.read_connection() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(
+                            f"SELECT id, username FROM users WHERE id IN ({', '.join(['%s'] * len(user_ids))})",
+                            user_ids
+                        )
+                        usernames = dict(await cursor.fetchall())
+            
+            # Matches of deleted users (no cascade across shards) are left out
+            return [
+                {**match, "username": usernames[match["user_id"]]}
+                for match in matches
+                if match["user_id"] in usernames
+            ]
                 
         except Exception as e:
             logger.error(f"Error getting all recent matches: {e}")
@@ -275,42 +768,57 @@ class CS2StatsRepository:
             return
         
         try:
-            async with mysql_db.pool.acquire() as conn:
-                # Serialize complex fields
-                map_stats_json = json.dumps([stat.dict() for stat in stats.map_stats])
-                weapon_stats_json = json.dumps([stat.dict() for stat in stats.weapon_stats])
-                recent_matches_json = json.dumps(stats.recent_matches)
-                
-                await conn.execute(
-                    """INSERT OR REPLACE INTO cs2_player_stats 
-                       (id, user_id, total_kills, total_deaths, total_assists, kd_ratio,
-                        headshot_percentage, accuracy, matches_played, matches_won, matches_lost,
-                        matches_drawn, win_rate, current_rank, rank_rating, peak_rank,
-                        average_score, mvp_count, adr, kast, total_playtime_hours,
-                        last_match_date, clutch_wins, clutch_attempts, first_kills,
-                        first_deaths, flashbang_assists, favorite_map, map_stats,
-                        weapon_stats, recent_matches, current_streak, streak_type,
-                        created_at, updated_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (stats.id, stats.user_id, stats.total_kills, stats.total_deaths,
-                     stats.total_assists, stats.kd_ratio, stats.headshot_percentage,
-                     stats.accuracy, stats.matches_played, stats.matches_won,
-                     stats.matches_lost, stats.matches_drawn, stats.win_rate,
-                     stats.current_rank.value, stats.rank_rating, stats.peak_rank.value,
-                     stats.average_score, stats.mvp_count, stats.adr, stats.kast,
-                     stats.total_playtime_hours, stats.last_match_date, stats.clutch_wins,
-                     stats.clutch_attempts, stats.first_kills, stats.first_deaths,
-                     stats.flashbang_assists, stats.favorite_map.value if stats.favorite_map else None,
-                     map_stats_json, weapon_stats_json, recent_matches_json,
-                     stats.current_streak, stats.streak_type, stats.created_at, stats.updated_at)
-                )
+            async with mysql_db.write_connection(stats.user_id) as conn:
+                async with conn.cursor() as cursor:
+                    # Map and weapon stats are maintained incrementally in their own tables
+                    recent_matches_json = json.dumps(stats.recent_matches)
+                    
+                    await cursor.execute(
+                        """INSERT INTO cs2_player_stats 
+                           (id, user_id, total_kills, total_deaths, total_assists, kd_ratio,
+                            headshot_percentage, accuracy, matches_played, matches_won, matches_lost,
+                            matches_drawn, win_rate, current_rank, rank_rating, peak_rank,
+                            average_score, mvp_count, adr, kast, total_playtime_hours,
+                            last_match_date, clutch_wins, clutch_attempts, first_kills,
+                            first_deaths, flashbang_assists, favorite_map, recent_matches,
+                            current_streak, streak_type, created_at, updated_at)
+                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                           ON DUPLICATE KEY UPDATE
+                               total_kills = VALUES(total_kills), total_deaths = VALUES(total_deaths),
+                               total_assists = VALUES(total_assists), kd_ratio = VALUES(kd_ratio),
+                               headshot_percentage = VALUES(headshot_percentage), accuracy = VALUES(accuracy),
+                               matches_played = VALUES(matches_played), matches_won = VALUES(matches_won),
+                               matches_lost = VALUES(matches_lost), matches_drawn = VALUES(matches_drawn),
+                               win_rate = VALUES(win_rate), current_rank = VALUES(current_rank),
+                               rank_rating = VALUES(rank_rating), peak_rank = VALUES(peak_rank),
+                               average_score = VALUES(average_score), mvp_count = VALUES(mvp_count),
+                               adr = VALUES(adr), kast = VALUES(kast),
+                               total_playtime_hours = VALUES(total_playtime_hours),
+                               last_match_date = VALUES(last_match_date), clutch_wins = VALUES(clutch_wins),
+                               clutch_attempts = VALUES(clutch_attempts), first_kills = VALUES(first_kills),
+                               first_deaths = VALUES(first_deaths), flashbang_assists = VALUES(flashbang_assists),
+                               favorite_map = VALUES(favorite_map), recent_matches = VALUES(recent_matches),
+                               current_streak = VALUES(current_streak), streak_type = VALUES(streak_type),
+                               updated_at = VALUES(updated_at)""",
+                        (id_to_bytes(stats.id), stats.user_id, stats.total_kills, stats.total_deaths,
+                         stats.total_assists, stats.kd_ratio, stats.headshot_percentage,
+                         stats.accuracy, stats.matches_played, stats.matches_won,
+                         stats.matches_lost, stats.matches_drawn, stats.win_rate,
+                         stats.current_rank.value, stats.rank_rating, stats.peak_rank.value,
+                         stats.average_score, stats.mvp_count, stats.adr, stats.kast,
+                         stats.total_playtime_hours, stats.last_match_date, stats.clutch_wins,
+                         stats.clutch_attempts, stats.first_kills, stats.first_deaths,
+                         stats.flashbang_assists, stats.favorite_map.value if stats.favorite_map else None,
+                         recent_matches_json, stats.current_streak, stats.streak_type,
+                         stats.created_at, stats.updated_at)
+                    )
                 
         except Exception as e:
             logger.error(f"Error saving CS2 stats to database: {e}")
 
     async def _update_stats_from_match(self, user_id: str, match: CS2Match):
         """Update player statistics based on a completed match"""
-        stats = await self.get_player_stats(user_id)
+        stats = await self.get_player_stats(user_id, primary=True)
         if not stats:
             return
         
@@ -351,6 +859,7 @@ class CS2StatsRepository:
         stats.recent_matches = ([match.id] + stats.recent_matches)[:10]
         
         await self._save_stats_to_db(stats)
+        await rank_history_repository.record(user_id, stats.rank_rating, stats.current_rank, match.match_date)
 
     async def _get_mock_stats(self, user_id: str) -> CS2PlayerStats:
         """Generate realistic mock CS2 statistics"""
@@ -0,0 +1,252 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from database.mysql import mysql_db
+from database.sharding import shard_router
+from services.match_archive import match_archive
+from typing import Optional, List, Dict, Any, Set
+from datetime import datetime, date, time, timedelta
+import asyncio
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+def day_key(value: date) -> str:
+    """Bucket id of a day (documents are keyed by ISO date, so ranges are _id scans)"""
+    return value.strftime("%Y-%m-%d")
+
+def _day_start(value: date) -> datetime:
+    return datetime.combine(value, time())
+
+def _empty_bucket(day: date) -> Dict[str, Any]:
+    return {
+        "date": day_key(day),
+        "signups": 0,
+        "matches": 0,
+        "donation_count": 0,
+        "donation_amount": 0.0,
+        "donations": {},
+        "admin_action_count": 0,
+        "admin_actions": {},
+    }
+
+class PlatformRollupRepository:
+    """Daily platform counters (signups, matches, revenue per tier, admin actions) in MongoDB
+
+    Writes add to the bucket of their day with $inc; backfill recomputes whole past
+    days from the source collections and tables.
+    """
+
+    def __init__(self):
+        mongo_url = os.environ['MONGO_URL']
+        self.client = AsyncIOMotorClient(mongo_url)
+        self.db = self.client[os.environ['DB_NAME']]
+        self.collection = self.db.platform_daily_rollups
+        self.backfill_days = int(os.environ.get('ROLLUP_BACKFILL_CHUNK_DAYS', 30))
+        # Activity logs older than this are removed by the TTL index (0 keeps them forever)
+        self.admin_log_ttl_days = int(os.environ.get('ADMIN_LOG_TTL_DAYS', 0))
+        self._pending: Set[asyncio.Task] = set()
+        self.backfill_task: Optional[asyncio.Task] = None
+
+    def _track(self, when: datetime, counters: Dict[str, Any]):
+        """Add to a day's counters in the background so writes do not wait on MongoDB"""
+        task = asyncio.create_task(self.increment(when, counters))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def increment(self, when: datetime, counters: Dict[str, Any]) -> bool:
+        """Atomically add `counters` (dotted paths allowed) to the bucket of `when`'s day"""
+        try:
+            await self.collection.update_one(
+                {"_id": day_key(when)},
+                {"$inc": counters, "$setOnInsert": {"day": _day_start(when.date())}},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error updating platform rollup for {day_key(when)}: {e}")
+            return False
+
+    async def flush(self):
+        """Wait for in-flight increments (called on shutdown)"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def record_signup(self, created_at: datetime):
+        self._track(created_at, {"signups": 1})
+
+    def record_match(self, match_date: datetime):
+        self._track(match_date, {"matches": 1})
+
+    def record_donations(self, donations: List[Dict[str, Any]]):
+        """Count completed donations (dicts of DonationRecord) towards revenue per tier"""
+        counters: Dict[datetime, Dict[str, Any]] = {}
+        for donation in donations:
+            if donation.get("status") != "completed":
+                continue
+            day = _day_start(donation["created_at"].date())
+            tier = getattr(donation["tier"], "value", donation["tier"])
+            bucket = counters.setdefault(day, {})
+            for key, value in (
+                ("donation_count", 1), ("donation_amount", donation["amount"]),
+                (f"donations.{tier}.count", 1), (f"donations.{tier}.amount", donation["amount"])
+            ):
+                bucket[key] = bucket.get(key, 0) + value
+        for day, bucket in counters.items():
+            self._track(day, bucket)
+
+    def record_admin_actions(self, actions: List[str], when: Optional[datetime] = None):
+        counters: Dict[str, Any] = {"admin_action_count": len(actions)}
+        for action in actions:
+            counters[f"admin_actions.{action}"] = counters.get(f"admin_actions.{action}", 0) + 1
+        if actions:
+            self._track(when or datetime.utcnow(), counters)
+
+    async def get_trends(self, date_from: date, date_to: date) -> List[Dict[str, Any]]:
+        """One bucket per day in the range (inclusive), zero-filled where nothing happened"""
+        buckets = {}
+        try:
+            cursor = self.collection.find({"_id": {"$gte": day_key(date_from), "$lte": day_key(date_to)}})
+            async for doc in cursor:
+                buckets[doc["_id"]] = doc
+        except Exception as e:
+            logger.error(f"Error reading platform rollups: {e}")
+
+        days = []
+        day = date_from
+        while day <= date_to:
+            bucket = _empty_bucket(day)
+            stored = buckets.get(bucket["date"], {})
+            bucket.update({key: value for key, value in stored.items() if key in bucket})
+            days.append(bucket)
+            day += timedelta(days=1)
+        return days
+
+    async def backfill(self, date_from: date, date_to: Optional[date] = None) -> int:
+        """Recompute past days from the sources, `backfill_days` at a time; returns days written
+
+        Today is never recomputed: its bucket is still receiving increments. Admin action
+        counts are kept as recorded for days the activity log TTL has started to expire.
+        """
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        logs_complete_from = (
+            datetime.utcnow() - timedelta(days=self.admin_log_ttl_days) if self.admin_log_ttl_days > 0 else None
+        )
+        date_to = min(date_to or yesterday, yesterday)
+        written = 0
+        start = date_from
+        while start <= date_to:
+            end = min(start + timedelta(days=self.backfill_days - 1), date_to)
+            buckets = {}
+            day = start
+            while day <= end:
+                buckets[day_key(day)] = _empty_bucket(day)
+                day += timedelta(days=1)
+
+            since, until = _day_start(start), _day_start(end + timedelta(days=1))
+            await self._count_signups(buckets, since, until)
+            await self._count_matches(buckets, since, until)
+            await self._count_donations(buckets, since, until)
+            await self._count_admin_actions(buckets, since, until)
+
+            updates = []
+            for key, bucket in buckets.items():
+                day_start = _day_start(date.fromisoformat(key))
+                fields = {field: value for field, value in bucket.items() if field != "date"}
+                if logs_complete_from and day_start < logs_complete_from:
+                    fields.pop("admin_action_count")
+                    fields.pop("admin_actions")
+                updates.append(UpdateOne(
+                    {"_id": key}, {"$set": fields, "$setOnInsert": {"day": day_start}}, upsert=True
+                ))
+            await self.collection.bulk_write(updates, ordered=False)
+            written += len(buckets)
+            logger.info(f"Backfilled platform rollups {day_key(start)}..{day_key(end)}")
+            start = end + timedelta(days=1)
+        return written
+
+    def start_backfill(self, date_from: date, date_to: Optional[date] = None) -> bool:
+        """Run a backfill in the background; False if one is already running"""
+        if self.backfill_task and not self.backfill_task.done():
+            return False
+        self.backfill_task = asyncio.create_task(self._run_backfill(date_from, date_to))
+        return True
+
+    async def _run_backfill(self, date_from: date, date_to: Optional[date]):
+        try:
+            days = await self.backfill(date_from, date_to)
+            logger.info(f"Platform rollup backfill finished: {days} days")
+        except Exception as e:
+            logger.error(f"Platform rollup backfill failed: {e}")
+
+    async def _count_signups(self, buckets: Dict[str, Dict[str, Any]], since: datetime, until: datetime):
+        if mysql_db.pool:
+            async with mysql_db.read_connection() as conn, conn.cursor() as cursor:
+                await cursor.execute(
+                    """SELECT DATE(created_at), COUNT(*) FROM users
+                       WHERE created_at >= %s AND created_at < %s
+                       GROUP BY DATE(created_at)""",
+                    (since, until)
+                )
+                for day, count in await cursor.fetchall():
+                    buckets[day_key(day)]["signups"] = count
+            return
+        from repositories.user import user_repository
+        pipeline = [
+            {"$match": {"created_at": {"$gte": since, "$lt": until}}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}},
+        ]
+        async for doc in user_repository.users_collection.aggregate(pipeline):
+            buckets[doc["_id"]]["signups"] = doc["count"]
+
+    async def _count_matches(self, buckets: Dict[str, Dict[str, Any]], since: datetime, until: datetime):
+        """Matches still in MySQL on every shard, plus those in archived months"""
+        if not mysql_db.pool:
+            return
+
+        async def per_day(conn):
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """SELECT DATE(match_date), COUNT(*) FROM cs2_matches
+                       WHERE match_date >= %s AND match_date < %s
+                       GROUP BY DATE(match_date)""",
+                    (since, until)
+                )
+                return await cursor.fetchall()
+
+        for rows in await shard_router.scatter(per_day):
+            for day, count in rows:
+                buckets[day_key(day)]["matches"] += count
+        # Partitions older than MATCH_RETENTION_MONTHS only exist as archive files
+        for key, count in (await match_archive.matches_per_day(since, until)).items():
+            buckets[key]["matches"] += count
+
+    async def _count_donations(self, buckets: Dict[str, Dict[str, Any]], since: datetime, until: datetime):
+        pipeline = [
+            {"$match": {"status": "completed", "created_at": {"$gte": since, "$lt": until}}},
+            {"$group": {
+                "_id": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "tier": "$tier"},
+                "count": {"$sum": 1},
+                "amount": {"$sum": "$amount"},
+            }},
+        ]
+        async for doc in self.db.donations.aggregate(pipeline):
+            bucket = buckets[doc["_id"]["day"]]
+            bucket["donations"][doc["_id"]["tier"]] = {"count": doc["count"], "amount": doc["amount"]}
+            bucket["donation_count"] += doc["count"]
+            bucket["donation_amount"] += doc["amount"]
+
+    async def _count_admin_actions(self, buckets: Dict[str, Dict[str, Any]], since: datetime, until: datetime):
+        pipeline = [
+            {"$match": {"created_at": {"$gte": since, "$lt": until}}},
+            {"$group": {
+                "_id": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "action": "$action"},
+                "count": {"$sum": 1},
+            }},
+        ]
+        async for doc in self.db.admin_activity_logs.aggregate(pipeline):
+            bucket = buckets[doc["_id"]["day"]]
+            bucket["admin_actions"][doc["_id"]["action"]] = doc["count"]
+            bucket["admin_action_count"] += doc["count"]
+
+platform_rollup_repository = PlatformRollupRepository()
@@ -0,0 +1,133 @@
+from typing import Optional, List, Dict, Any, Tuple
+from models.cs2_stats import CS2Rank
+from database.mysql import mysql_db
+from database.index_advisor import index_advisor
+from datetime import datetime, date, timedelta, time
+import logging
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+# One point: seconds since midnight (uint32), rank rating (int32), rank index (uint8)
+POINT_FORMAT = struct.Struct("<IiB")
+RANKS = list(CS2Rank)
+
+def pack_point(recorded_at: datetime, rank_rating: int, rank: CS2Rank) -> bytes:
+    """Pack a rank sample into its fixed-width binary form"""
+    seconds = recorded_at.hour * 3600 + recorded_at.minute * 60 + recorded_at.second
+    return POINT_FORMAT.pack(seconds, rank_rating, RANKS.index(rank))
+
+def unpack_points(day: date, points: bytes) -> List[Tuple[datetime, int, CS2Rank]]:
+    """Unpack all samples stored in one day's row"""
+    start = datetime.combine(day, time())
+    return [
+        (start + timedelta(seconds=seconds), rank_rating, RANKS[rank_index])
+        for seconds, rank_rating, rank_index in POINT_FORMAT.iter_unpack(points)
+    ]
+
+RANK_PROGRESSION_SQL = """SELECT day, points FROM cs2_rank_history
+                          WHERE user_id = %s AND day BETWEEN %s AND %s
+                          ORDER BY day"""
+
+index_advisor.register(
+    "rank_progression", RANK_PROGRESSION_SQL,
+    ("00000000-0000-0000-0000-000000000000", date(2024, 1, 1), date(2024, 1, 31))
+)
+
+class RankHistoryRepository:
+    """Append-only rank time series: one packed row per user per day"""
+
+    def __init__(self):
+        self.raw_retention_days = int(os.environ.get('RANK_HISTORY_RAW_DAYS', 30))
+        self.downsample_batch_size = int(os.environ.get('RANK_HISTORY_DOWNSAMPLE_BATCH', 1000))
+        self.downsample_interval = float(os.environ.get('RANK_HISTORY_DOWNSAMPLE_INTERVAL', 3600))
+
+    async def record(self, user_id: str, rank_rating: int, rank: CS2Rank, recorded_at: Optional[datetime] = None) -> bool:
+        """Append a rank sample to the user's row for the day"""
+        if not mysql_db.pool:
+            return False
+
+        recorded_at = recorded_at or datetime.utcnow()
+        try:
+            async with mysql_db.write_connection(user_id) as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        """INSERT INTO cs2_rank_history (user_id, day, resolution, point_count, points)
+                           VALUES (%s, %s, 'raw', 1, %s)
+                           ON DUPLICATE KEY UPDATE
+                               points = CONCAT(points, VALUES(points)),
+                               point_count = point_count + 1""",
+                        (user_id, recorded_at.date(), pack_point(recorded_at, rank_rating, rank))
+                    )
+                    return True
+        except Exception as e:
+            logger.error(f"Error recording rank history for user {user_id}: {e}")
+            return False
+
+    async def get_progression(self, user_id: str, date_from: date, date_to: date) -> List[Dict[str, Any]]:
+        """Get rank samples for a date range (inclusive), oldest first"""
+        if not mysql_db.pool:
+            return []
+
+        try:
+            async with mysql_db.read_connection(user_id) as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(RANK_PROGRESSION_SQL, (user_id, date_from, date_to))
+                    rows = await cursor.fetchall()
+
+            return [
+                {
+                    "timestamp": recorded_at,
+                    "rank_rating": rank_rating,
+                    "current_rank": rank.value
+                }
+                for day, points in rows
+                for recorded_at, rank_rating, rank in unpack_points(day, points)
+            ]
+        except Exception as e:
+            logger.error(f"Error fetching rank progression for user {user_id}: {e}")
+            return []
+
+    async def downsample(self) -> int:
+        """Collapse raw rows older than the retention window to one daily closing sample"""
+        if not mysql_db.pool:
+            return 0
+
+        cutoff = datetime.utcnow().date() - timedelta(days=self.raw_retention_days)
+        total = 0
+        try:
+            async with mysql_db.get_connection() as conn:
+                async with conn.cursor() as cursor:
+                    while True:
+                        await cursor.execute(
+                            """SELECT user_id, day, points FROM cs2_rank_history
+                               WHERE resolution = 'raw' AND day < %s
+                               LIMIT %s""",
+                            (cutoff, self.downsample_batch_size)
+                        )
+                        rows = await cursor.fetchall()
+                        if not rows:
+                            break
+
+                        # Keep the last sample of each day (the daily close)
+                        await cursor.executemany(
+                            """UPDATE cs2_rank_history
+                               SET resolution = 'daily', point_count = %s, points = %s
+                               WHERE user_id = %s AND day = %s""",
+                            [
+                                (1 if points else 0, points[-POINT_FORMAT.size:], user_id, day)
+                                for user_id, day, points in rows
+                            ]
+                        )
+                        total += len(rows)
+
+            if total:
+                logger.info(f"Downsampled {total} rank history rows")
+            return total
+        except Exception as e:
+            logger.error(f"Error downsampling rank history: {e}")
+            return total
+
+# Global repository instance
+rank_history_repository = RankHistoryRepository()
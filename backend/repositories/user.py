@@ -1,9 +1,16 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, AsyncIterator
 import json
+import aiomysql
 from datetime import datetime
 from models.user import User, UserCreate, UserUpdate, UserPreferences, CustomTheme, CustomThemeCreate, UserRole
 from database.mysql import mysql_db
+from database.index_advisor import index_advisor
 from services.auth import auth_service
+from services.login_activity import login_activity_buffer, LoginBatch
+from services.active_users import active_user_tracker
+from repositories.platform_rollups import platform_rollup_repository
+from pymongo import ReturnDocument, UpdateOne, IndexModel
+from database.mongo_indexes import mongo_indexes
 import logging
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -22,6 +29,55 @@ def get_mongo_db():
         logger.error(f"Error connecting to MongoDB: {e}")
         return None
 
+# Single-user lookups by id and by email
+_USER_SELECT = """
+    SELECT u.id, u.username, u.email, u.password_hash, u.display_name,
+           u.avatar_url, u.bio, u.role, u.steam_id, u.is_active, u.is_verified,
+           u.created_at, u.updated_at, u.last_login, u.login_count,
+           p.language, p.theme, p.custom_theme_data, p.notifications, p.steam_profile_public
+    FROM users u
+    LEFT JOIN user_preferences p ON u.id = p.user_id
+"""
+USER_BY_ID = _USER_SELECT + "WHERE u.id = %s"
+USER_BY_EMAIL = _USER_SELECT + "WHERE u.email = %s"
+
+def _active_players_sql(pending: int) -> str:
+    """Active player count; users with `pending` buffered logins count even before the flush"""
+    if not pending:
+        return "SELECT COUNT(*) FROM users WHERE last_login >= %s AND is_active = TRUE"
+    placeholders = ", ".join(["%s"] * pending)
+    return f"SELECT COUNT(*) FROM users WHERE is_active = TRUE AND (last_login >= %s OR id IN ({placeholders}))"
+
+index_advisor.register("user_by_id", _USER_SELECT + "WHERE u.id = %s", ("00000000-0000-0000-0000-000000000000",))
+index_advisor.register("user_by_email", _USER_SELECT + "WHERE u.email = %s", ("admin@admin.com",))
+index_advisor.register("active_players", _active_players_sql(0), (datetime(2024, 1, 1),))
+index_advisor.register(
+    "active_players_pending", _active_players_sql(3),
+    (datetime(2024, 1, 1), *["00000000-0000-0000-0000-000000000000"] * 3)
+)
+
+# Columns included in admin user exports (never the password hash)
+USER_EXPORT_FIELDS = [
+    "id", "username", "email", "display_name", "role", "steam_id",
+    "is_active", "is_verified", "created_at", "updated_at",
+    "last_login", "login_count", "language"
+]
+
+mongo_indexes.register("users", [
+    IndexModel([("id", 1)], name="id_unique", unique=True, background=True),
+    IndexModel([("email", 1)], name="email_unique", unique=True, background=True),
+    IndexModel([("created_at", -1)], name="created_at_desc", background=True),
+    IndexModel([("last_login", -1)], name="last_login_desc", background=True),
+])
+mongo_indexes.register_query("user_by_id", "users", {"id": ""})
+mongo_indexes.register_query("user_by_email", "users", {"email": ""})
+mongo_indexes.register_query("users_newest_first", "users", {}, sort=[("created_at", -1)])
+mongo_indexes.register_query("users_by_ids", "users", {"id": {"$in": [""]}})
+mongo_indexes.register_query(
+    "active_players", "users",
+    {"is_active": True, "$or": [{"last_login": {"$gte": datetime(1970, 1, 1)}}, {"id": {"$in": [""]}}]}
+)
+
 class UserRepository:
     def __init__(self):
         self.users_collection = None
@@ -41,7 +97,7 @@ class UserRepository:
         """Get total number of users"""
         try:
             if mysql_db.pool:
-                async with mysql_db.get_connection() as conn:
+                async with mysql_db.read_connection() as conn:
                     if not conn:
                         return 0
                     async with conn.cursor() as cursor:
@@ -60,23 +116,32 @@ class UserRepository:
         try:
             from datetime import datetime, timedelta
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+            # Estimate from the daily sketches once they cover the whole window
+            today = datetime.utcnow().date()
+            if await active_user_tracker.covers(today - timedelta(days=29)):
+                return await active_user_tracker.unique_users(today - timedelta(days=29), today)
+            
+            # Users with buffered logins count as active even before the flush
+            pending_ids = login_activity_buffer.pending_user_ids()
             
             if mysql_db.pool:
-                async with mysql_db.get_connection() as conn:
+                async with mysql_db.read_connection() as conn:
                     if not conn:
                         return 0
                     async with conn.cursor() as cursor:
                         await cursor.execute(
-                            "SELECT COUNT(*) FROM users WHERE last_login >= %s AND is_active = TRUE",
-                            (thirty_days_ago,)
+                            _active_players_sql(len(pending_ids)), (thirty_days_ago, *pending_ids)
                         )
                         result = await cursor.fetchone()
                         return result[0] if result else 0
             else:
                 # MongoDB fallback
                 return await self.users_collection.count_documents({
-                    "last_login": {"$gte": thirty_days_ago},
-                    "is_active": True
+                    "is_active": True,
+                    "$or": [
+                        {"last_login": {"$gte": thirty_days_ago}},
+                        {"id": {"$in": pending_ids}}
+                    ]
                 })
         except Exception as e:
             logger.error(f"Error getting active players count: {e}")
@@ -86,7 +151,7 @@ class UserRepository:
         """Update user role"""
         try:
             if mysql_db.pool:
-                async with mysql_db.get_connection() as conn:
+                async with mysql_db.write_connection(user_id) as conn:
                     if not conn:
                         return False
                     async with conn.cursor() as cursor:
@@ -110,7 +175,7 @@ class UserRepository:
         """Update user active status"""
         try:
             if mysql_db.pool:
-                async with mysql_db.get_connection() as conn:
+                async with mysql_db.write_connection(user_id) as conn:
                     if not conn:
                         return False
                     async with conn.cursor() as cursor:
@@ -129,19 +194,162 @@ class UserRepository:
         except Exception as e:
             logger.error(f"Error updating user status: {e}")
             return False
+    
+    async def get_users_by_ids(self, user_ids: List[str]) -> Dict[str, User]:
+        """Get many users by ID with a single query, keyed by ID"""
+        if not user_ids:
+            return {}
+        try:
+            if mysql_db.pool:
+                async with mysql_db.read_connection() as conn:
+                    if not conn:
+                        return {}
+                    async with conn.cursor() as cursor:
+                        placeholders = ", ".join(["%s"] * len(user_ids))
+                        await cursor.execute(f"""
+                            SELECT u.id, u.username, u.email, u.password_hash, u.display_name,
+                                   u.avatar_url, u.bio, u.role, u.steam_id, u.is_active, u.is_verified,
+                                   u.created_at, u.updated_at, u.last_login, u.login_count,
+                                   p.language, p.theme, p.custom_theme_data, p.notifications, p.steam_profile_public
+                            FROM users u
+                            LEFT JOIN user_preferences p ON u.id = p.user_id
+                            WHERE u.id IN ({placeholders})
+                        """, user_ids)
+                        rows = await cursor.fetchall()
+                        users = [self._row_to_user(row) for row in rows]
+            else:
+                # MongoDB fallback
+                users = [
+                    self._doc_to_user(doc)
+                    async for doc in self.users_collection.find({"id": {"$in": user_ids}})
+                ]
+            return {user.id: login_activity_buffer.apply(user) for user in users}
+        except Exception as e:
+            logger.error(f"Error getting users by IDs: {e}")
+            return {}
+
+    async def update_users_role(self, user_ids: List[str], role: str) -> bool:
+        """Update the role of many users with one statement"""
+        return await self._update_users_field(user_ids, "role", role)
+
+    async def update_users_status(self, user_ids: List[str], is_active: bool) -> bool:
+        """Update the active status of many users with one statement"""
+        return await self._update_users_field(user_ids, "is_active", is_active)
+
+    async def _update_users_field(self, user_ids: List[str], field: str, value) -> bool:
+        """Set one column to the same value for a set of users"""
+        if not user_ids:
+            return True
+        try:
+            if mysql_db.pool:
+                async with mysql_db.write_connection() as conn:
+                    if not conn:
+                        return False
+                    async with conn.cursor() as cursor:
+                        placeholders = ", ".join(["%s"] * len(user_ids))
+                        await cursor.execute(
+                            f"UPDATE users SET {field} = %s, updated_at = %s WHERE id IN ({placeholders})",
+                            (value, datetime.utcnow(), *user_ids)
+                        )
+                    for user_id in user_ids:
+                        mysql_db.mark_write(user_id)
+                    return True
+            else:
+                # MongoDB fallback
+                await self.users_collection.update_many(
+                    {"id": {"$in": user_ids}},
+                    {"$set": {field: value, "updated_at": datetime.utcnow()}}
+                )
+                return True
+        except Exception as e:
+            logger.error(f"Error bulk updating user {field}: {e}")
+            return False
+
+    async def iter_users_for_export(
+        self,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        search_query: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream users for export without loading them all (server-side cursor / Mongo batches)"""
+        try:
+            if mysql_db.pool:
+                conditions = []
+                params = []
+                if role:
+                    conditions.append("u.role = %s")
+                    params.append(role)
+                if is_active is not None:
+                    conditions.append("u.is_active = %s")
+                    params.append(is_active)
+                if search_query:
+                    conditions.append("(u.username LIKE %s OR u.email LIKE %s OR u.display_name LIKE %s)")
+                    params.extend([f"%{search_query}%"] * 3)
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                
+                async with mysql_db.read_connection() as conn:
+                    if not conn:
+                        raise RuntimeError("No MySQL connection available")
+                    # Unbuffered cursor: rows are pulled from the server batch by batch
+                    async with conn.cursor(aiomysql.SSCursor) as cursor:
+                        await cursor.execute(f"""
+                            SELECT u.id, u.username, u.email, u.display_name, u.role, u.steam_id,
+                                   u.is_active, u.is_verified, u.created_at, u.updated_at,
+                                   u.last_login, u.login_count, p.language
+                            FROM users u
+                            LEFT JOIN user_preferences p ON u.id = p.user_id
+                            {where}
+                        """, params)
+                        while True:
+                            rows = await cursor.fetchmany(batch_size)
+                            if not rows:
+                                break
+                            for row in rows:
+                                yield dict(zip(USER_EXPORT_FIELDS, row))
+            else:
+                # MongoDB fallback
+                query = {}
+                if role:
+                    query["role"] = role
+                if is_active is not None:
+                    query["is_active"] = is_active
+                if search_query:
+                    query["$or"] = [
+                        {"username": {"$regex": search_query, "$options": "i"}},
+                        {"email": {"$regex": search_query, "$options": "i"}},
+                        {"display_name": {"$regex": search_query, "$options": "i"}}
+                    ]
+                projection = {field: 1 for field in USER_EXPORT_FIELDS if field != "language"}
+                projection.update({"_id": 0, "preferences.language": 1})
+                
+                cursor = self.users_collection.find(query, projection).batch_size(batch_size)
+                async for doc in cursor:
+                    doc["language"] = doc.pop("preferences", {}).get("language")
+                    yield doc
+                    
+        except Exception as e:
+            logger.error(f"Error exporting users: {e}")
+            # Abort the response: ending the stream here would look like a complete export
+            raise
+
     async def create_user(self, user_data: UserCreate) -> Optional[User]:
         """Create a new user in MySQL database or MongoDB as fallback"""
         # Try MySQL first
         if mysql_db.pool:
-            return await self._create_user_mysql(user_data)
+            user = await self._create_user_mysql(user_data)
         else:
             # Fall back to MongoDB
-            return await self._create_user_mongodb(user_data)
+            user = await self._create_user_mongodb(user_data)
+        
+        if user:
+            platform_rollup_repository.record_signup(user.created_at)
+        return user
     
     async def _create_user_mysql(self, user_data: UserCreate) -> Optional[User]:
         """Create a new user in MySQL database"""
         try:
-            async with mysql_db.get_connection() as conn:
+            async with mysql_db.write_connection(user_data.email) as conn:
                 if not conn:
                     return None
                     
@@ -178,6 +386,7 @@ class UserRepository:
                         user.preferences.notifications, user.preferences.steam_profile_public
                     ))
                     
+                mysql_db.mark_write(user.id)
                 logger.info(f"User created successfully in MySQL: {user.username}")
                 return user
                 
@@ -242,28 +451,22 @@ class UserRepository:
         """Get user by email from MySQL database or MongoDB as fallback"""
         # Try MySQL first
         if mysql_db.pool:
-            return await self._get_user_by_email_mysql(email)
+            user = await self._get_user_by_email_mysql(email)
         else:
             # Fall back to MongoDB
-            return await self._get_user_by_email_mongodb(email)
+            user = await self._get_user_by_email_mongodb(email)
+        return login_activity_buffer.apply(user)
     
     async def _get_user_by_email_mysql(self, email: str) -> Optional[User]:
         """Get user by email from MySQL database"""
         try:
+            # Auth and login read role, status and password hash: never from a lagging replica
             async with mysql_db.get_connection() as conn:
                 if not conn:
                     return None
                     
                 async with conn.cursor() as cursor:
-                    await cursor.execute("""
-                        SELECT u.id, u.username, u.email, u.password_hash, u.display_name,
-                               u.avatar_url, u.bio, u.role, u.steam_id, u.is_active, u.is_verified,
-                               u.created_at, u.updated_at, u.last_login, u.login_count,
-                               p.language, p.theme, p.custom_theme_data, p.notifications, p.steam_profile_public
-                        FROM users u
-                        LEFT JOIN user_preferences p ON u.id = p.user_id
-                        WHERE u.email = %s
-                    """, (email,))
+                    await cursor.execute(USER_BY_EMAIL, (email,))
                     
                     row = await cursor.fetchone()
                     if not row:
@@ -295,28 +498,22 @@ class UserRepository:
         """Get user by ID from MySQL database or MongoDB as fallback"""
         # Try MySQL first
         if mysql_db.pool:
-            return await self._get_user_by_id_mysql(user_id)
+            user = await self._get_user_by_id_mysql(user_id)
         else:
             # Fall back to MongoDB
-            return await self._get_user_by_id_mongodb(user_id)
+            user = await self._get_user_by_id_mongodb(user_id)
+        return login_activity_buffer.apply(user)
     
     async def _get_user_by_id_mysql(self, user_id: str) -> Optional[User]:
         """Get user by ID from MySQL database"""
         try:
+            # Auth and login read role, status and password hash: never from a lagging replica
             async with mysql_db.get_connection() as conn:
                 if not conn:
                     return None
                     
                 async with conn.cursor() as cursor:
-                    await cursor.execute("""
-                        SELECT u.id, u.username, u.email, u.password_hash, u.display_name,
-                               u.avatar_url, u.bio, u.role, u.steam_id, u.is_active, u.is_verified,
-                               u.created_at, u.updated_at, u.last_login, u.login_count,
-                               p.language, p.theme, p.custom_theme_data, p.notifications, p.steam_profile_public
-                        FROM users u
-                        LEFT JOIN user_preferences p ON u.id = p.user_id
-                        WHERE u.id = %s
-                    """, (user_id,))
+                    await cursor.execute(USER_BY_ID, (user_id,))
                     
                     row = await cursor.fetchone()
                     if not row:
@@ -345,129 +542,171 @@ class UserRepository:
             return None
 
     async def update_user_login(self, user_id: str) -> bool:
-        """Update user's last login and increment login count"""
+        """Record a login; last_login and login_count are written by the login activity buffer"""
+        login_activity_buffer.record(user_id)
+        active_user_tracker.record(user_id)
+        return True
+
+    async def apply_login_activity(self, batch: LoginBatch) -> bool:
+        """Persist buffered login activity in batched writes"""
+        if not batch:
+            return True
         try:
-            async with mysql_db.get_connection() as conn:
-                if not conn:
-                    return False
-                    
-                async with conn.cursor() as cursor:
-                    await cursor.execute("""
-                        UPDATE users 
-                        SET last_login = %s, login_count = login_count + 1, updated_at = %s
-                        WHERE id = %s
-                    """, (datetime.utcnow(), datetime.utcnow(), user_id))
-                    
-                    return cursor.rowcount > 0
+            if mysql_db.pool:
+                async with mysql_db.write_connection() as conn:
+                    if not conn:
+                        return False
+                    async with conn.cursor() as cursor:
+                        items = list(batch.items())
+                        # One UPDATE ... JOIN per chunk keeps statements under max_allowed_packet
+                        for start in range(0, len(items), 500):
+                            chunk = items[start:start + 500]
+                            rows = " UNION ALL ".join(
+                                ["SELECT %s AS id, %s AS last_login, %s AS logins"] * len(chunk)
+                            )
+                            params = []
+                            for user_id, (last_login, count) in chunk:
+                                params.extend([user_id, last_login, count])
+                            await cursor.execute(f"""
+                                UPDATE users u
+                                JOIN ({rows}) AS b ON u.id = b.id
+                                SET u.last_login = GREATEST(COALESCE(u.last_login, b.last_login), b.last_login),
+                                    u.login_count = u.login_count + b.logins
+                            """, params)
+                return True
+            else:
+                # MongoDB fallback
+                await self.users_collection.bulk_write([
+                    UpdateOne(
+                        {"id": user_id},
+                        {"$max": {"last_login": last_login}, "$inc": {"login_count": count}}
+                    )
+                    for user_id, (last_login, count) in batch.items()
+                ], ordered=False)
+                return True
                     
         except Exception as e:
-            logger.error(f"Error updating user login: {e}")
+            logger.error(f"Error applying login activity: {e}")
             return False
 
-    async def update_user(self, user_id: str, user_data: UserUpdate) -> Optional[User]:
-        """Update user information"""
+    async def update_user(self, user_id: str, user_data: UserUpdate, current_user: Optional[User] = None) -> Optional[User]:
+        """Update user information; when the current user is passed, the result is merged in memory instead of re-read"""
         # Try MySQL first
         if mysql_db.pool:
-            return await self._update_user_mysql(user_id, user_data)
+            return await self._update_user_mysql(user_id, user_data, current_user)
         else:
             # Fall back to MongoDB
-            return await self._update_user_mongodb(user_id, user_data)
+            return await self._update_user_mongodb(user_id, user_data, current_user)
+
+    def _user_changes(self, user_data: UserUpdate) -> dict:
+        """Profile fields that were provided in the update"""
+        return {
+            field: getattr(user_data, field)
+            for field in ("display_name", "bio", "avatar_url")
+            if getattr(user_data, field) is not None
+        }
+
+    def _preference_changes(self, user_data: UserUpdate) -> dict:
+        """Preference fields the client actually sent (partial update)"""
+        if not user_data.preferences:
+            return {}
+        return user_data.preferences.dict(exclude_unset=True)
+
+    def _merge_user(self, current_user: User, user_changes: dict, preference_changes: dict, updated_at: datetime) -> User:
+        """Apply an update to an already loaded user without re-reading it"""
+        preferences = current_user.preferences.copy(update=preference_changes)
+        return current_user.copy(update={**user_changes, "preferences": preferences, "updated_at": updated_at})
     
-    async def _update_user_mysql(self, user_id: str, user_data: UserUpdate) -> Optional[User]:
-        """Update user information in MySQL"""
+    async def _update_user_mysql(self, user_id: str, user_data: UserUpdate, current_user: Optional[User] = None) -> Optional[User]:
+        """Update user information in MySQL with a single statement"""
         try:
-            async with mysql_db.get_connection() as conn:
-                if not conn:
-                    return None
-                    
-                async with conn.cursor() as cursor:
-                    # Update user basic info
-                    update_fields = []
-                    update_values = []
-                    
-                    if user_data.display_name is not None:
-                        update_fields.append("display_name = %s")
-                        update_values.append(user_data.display_name)
-                    
-                    if user_data.bio is not None:
-                        update_fields.append("bio = %s")
-                        update_values.append(user_data.bio)
-                    
-                    if user_data.avatar_url is not None:
-                        update_fields.append("avatar_url = %s")
-                        update_values.append(user_data.avatar_url)
-                    
-                    if update_fields:
-                        update_fields.append("updated_at = %s")
-                        update_values.extend([datetime.utcnow(), user_id])
+            user_changes = self._user_changes(user_data)
+            preference_changes = self._preference_changes(user_data)
+            now = datetime.utcnow()
+
+            if user_changes or preference_changes:
+                async with mysql_db.write_connection(user_id) as conn:
+                    if not conn:
+                        return None
                         
-                        query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = %s"
+                    async with conn.cursor() as cursor:
+                        update_fields = []
+                        update_values = []
+                        
+                        for field, value in user_changes.items():
+                            update_fields.append(f"u.{field} = %s")
+                            update_values.append(value)
+                        
+                        # Only the preference columns that changed are written
+                        for field, value in preference_changes.items():
+                            if field == "custom_theme":
+                                update_fields.append("p.custom_theme_data = %s")
+                                update_values.append(json.dumps(value) if value else None)
+                            else:
+                                update_fields.append(f"p.{field} = %s")
+                                update_values.append(value)
+                        
+                        update_fields.append("u.updated_at = %s")
+                        update_values.extend([now, user_id])
+                        
+                        # Users and preferences are written by one multi-table UPDATE
+                        query = f"""
+                            UPDATE users u
+                            LEFT JOIN user_preferences p ON p.user_id = u.id
+                            SET {', '.join(update_fields)}
+                            WHERE u.id = %s
+                        """
                         await cursor.execute(query, update_values)
-                    
-                    # Update preferences if provided
-                    if user_data.preferences:
-                        await cursor.execute("""
-                            UPDATE user_preferences 
-                            SET language = %s, theme = %s, custom_theme_data = %s, 
-                                notifications = %s, steam_profile_public = %s
-                            WHERE user_id = %s
-                        """, (
-                            user_data.preferences.language,
-                            user_data.preferences.theme,
-                            json.dumps(user_data.preferences.custom_theme) if user_data.preferences.custom_theme else None,
-                            user_data.preferences.notifications,
-                            user_data.preferences.steam_profile_public,
-                            user_id
-                        ))
-                    
-                    # Return updated user
-                    return await self.get_user_by_id(user_id)
+            
+            # Return updated user
+            if current_user:
+                return self._merge_user(current_user, user_changes, preference_changes, now)
+            return await self.get_user_by_id(user_id)
                     
         except Exception as e:
             logger.error(f"Error updating user in MySQL: {e}")
             return None
     
-    async def _update_user_mongodb(self, user_id: str, user_data: UserUpdate) -> Optional[User]:
+    async def _update_user_mongodb(self, user_id: str, user_data: UserUpdate, current_user: Optional[User] = None) -> Optional[User]:
         """Update user information in MongoDB as fallback"""
         try:
             mongo_db = get_mongo_db()
             if mongo_db is None:
                 return None
             
-            # Build update document
-            update_doc = {"updated_at": datetime.utcnow()}
-            
-            if user_data.display_name is not None:
-                update_doc["display_name"] = user_data.display_name
+            user_changes = self._user_changes(user_data)
+            preference_changes = self._preference_changes(user_data)
+            now = datetime.utcnow()
             
-            if user_data.bio is not None:
-                update_doc["bio"] = user_data.bio
+            # Build update document; preferences are set field by field
+            update_doc = {**user_changes, "updated_at": now}
+            for field, value in preference_changes.items():
+                update_doc[f"preferences.{field}"] = value
             
-            if user_data.avatar_url is not None:
-                update_doc["avatar_url"] = user_data.avatar_url
-            
-            if user_data.preferences:
-                update_doc["preferences"] = {
-                    "language": user_data.preferences.language,
-                    "theme": user_data.preferences.theme,
-                    "custom_theme": user_data.preferences.custom_theme,
-                    "notifications": user_data.preferences.notifications,
-                    "steam_profile_public": user_data.preferences.steam_profile_public
-                }
+            if current_user:
+                result = await mongo_db.users.update_one(
+                    {"id": user_id},
+                    {"$set": update_doc}
+                )
+                if result.matched_count == 0:
+                    logger.warning(f"No user found to update in MongoDB: {user_id}")
+                    return None
+                
+                logger.info(f"User updated successfully in MongoDB: {user_id}")
+                return self._merge_user(current_user, user_changes, preference_changes, now)
             
-            # Update user in MongoDB
-            result = await mongo_db.users.update_one(
+            # Update and read back in one round trip
+            user_doc = await mongo_db.users.find_one_and_update(
                 {"id": user_id},
-                {"$set": update_doc}
+                {"$set": update_doc},
+                return_document=ReturnDocument.AFTER
             )
-            
-            if result.modified_count > 0:
-                logger.info(f"User updated successfully in MongoDB: {user_id}")
-                # Return updated user
-                return await self.get_user_by_id(user_id)
-            else:
+            if not user_doc:
                 logger.warning(f"No user found to update in MongoDB: {user_id}")
                 return None
+            
+            logger.info(f"User updated successfully in MongoDB: {user_id}")
+            return login_activity_buffer.apply(self._doc_to_user(user_doc))
                 
         except Exception as e:
             logger.error(f"Error updating user in MongoDB: {e}")
@@ -554,7 +793,7 @@ class CustomThemeRepository:
     async def create_theme(self, user_id: str, theme_data: CustomThemeCreate) -> Optional[CustomTheme]:
         """Create a new custom theme"""
         try:
-            async with mysql_db.get_connection() as conn:
+            async with mysql_db.write_connection(user_id) as conn:
                 if not conn:
                     return None
                     
@@ -587,7 +826,7 @@ class CustomThemeRepository:
     async def get_user_themes(self, user_id: str) -> List[CustomTheme]:
         """Get all themes created by a user"""
         try:
-            async with mysql_db.get_connection() as conn:
+            async with mysql_db.read_connection(user_id) as conn:
                 if not conn:
                     return []
                     
@@ -609,7 +848,7 @@ class CustomThemeRepository:
     async def get_public_themes(self) -> List[CustomTheme]:
         """Get all public themes"""
         try:
-            async with mysql_db.get_connection() as conn:
+            async with mysql_db.read_connection() as conn:
                 if not conn:
                     return []
                     
@@ -1,14 +1,23 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
+from datetime import datetime, date, timedelta
 from models.admin import (
     AdminDashboardStats, UserManagementFilter, UserRoleUpdate, 
     UserTierUpdate, UserStatusUpdate, DonationRecord, DonationRecordCreate,
-    TierBenefits, ManualStatsUpdate, ManualMatchCreate, AdminActivityLogCreate
+    TierBenefits, ManualStatsUpdate, ManualMatchCreate, AdminActivityLogCreate,
+    BulkUserRoleUpdate, BulkUserStatusUpdate, BulkUserTierUpdate, BulkOperationResult,
+    AdminActivityLogFilter
 )
-from repositories.admin import admin_repository
-from repositories.user import user_repository
+from repositories.admin import admin_repository, ADMIN_LOG_EXPORT_FIELDS
+from repositories.user import user_repository, USER_EXPORT_FIELDS
 from repositories.cs2_stats import cs2_stats_repository
+from repositories.platform_rollups import platform_rollup_repository
+from services.active_users import active_user_tracker
+from services.audit_log import audit_log_writer
 from middleware.auth import get_current_user
+from services.export import streaming_export_response
+from database.mysql import mysql_db
+from database.mongo_indexes import mongo_indexes
 from models.user import User, UserRole
 import logging
 
@@ -38,6 +47,70 @@ async def get_admin_dashboard(admin_user: User = Depends(require_admin_role)):
             detail="Failed to fetch dashboard statistics"
         )
 
+@router.get("/trends")
+async def get_platform_trends(
+    date_from: Optional[date] = Query(None, description="First day (defaults to 30 days ago)"),
+    date_to: Optional[date] = Query(None, description="Last day (defaults to today)"),
+    admin_user: User = Depends(require_admin_role)
+):
+    """Get signups, matches, donation revenue per tier and admin actions per day"""
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to or (date_to - date_from).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must be before date_to and at most 366 days earlier"
+        )
+    
+    days = await platform_rollup_repository.get_trends(date_from, date_to)
+    return {"date_from": date_from, "date_to": date_to, "days": days}
+
+@router.get("/active-users")
+async def get_active_users(
+    day: Optional[date] = Query(None, description="Last day of the windows (defaults to today)"),
+    days: int = Query(30, ge=1, le=366, description="Days of daily active users to include"),
+    admin_user: User = Depends(require_admin_role)
+):
+    """Get estimated DAU, WAU and MAU plus daily active users for charting"""
+    day = day or datetime.utcnow().date()
+    return {
+        "date": day,
+        **await active_user_tracker.summary(day),
+        "daily": await active_user_tracker.daily_active(day - timedelta(days=days - 1), day)
+    }
+
+@router.get("/active-users/unique")
+async def get_unique_active_users(
+    date_from: date = Query(..., description="First day"),
+    date_to: date = Query(..., description="Last day"),
+    admin_user: User = Depends(require_admin_role)
+):
+    """Get the estimated number of distinct users active in a date range"""
+    if date_from > date_to or (date_to - date_from).days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must be before date_to and at most 366 days earlier"
+        )
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "unique_users": await active_user_tracker.unique_users(date_from, date_to)
+    }
+
+@router.post("/trends/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def backfill_platform_trends(
+    date_from: date = Query(..., description="First day to recompute"),
+    date_to: Optional[date] = Query(None, description="Last day to recompute (defaults to yesterday)"),
+    admin_user: User = Depends(require_admin_role)
+):
+    """Recompute daily trend buckets from the source data in the background"""
+    if not platform_rollup_repository.start_backfill(date_from, date_to):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A backfill is already running"
+        )
+    return {"message": "Backfill started", "date_from": date_from, "date_to": date_to}
+
 @router.get("/users")
 async def get_users_for_management(
     role: Optional[str] = Query(None, description="Filter by role"),
@@ -68,6 +141,26 @@ async def get_users_for_management(
             detail="Failed to fetch users"
         )
 
+@router.get("/users/export")
+async def export_users(
+    format: str = Query("csv", pattern=r"^(csv|ndjson)$", description="Export format"),
+    compress: bool = Query(True, description="Gzip the export"),
+    role: Optional[str] = Query(None, description="Filter by role"),
+    is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    search: Optional[str] = Query(None, description="Search users by name/email"),
+    admin_user: User = Depends(require_admin_role)
+):
+    """Stream all matching users as CSV or NDJSON"""
+    await admin_repository.log_admin_activities(admin_user, [{
+        "action": "export_users",
+        "target_type": "user",
+        "target_id": "*",
+        "details": {"format": format, "role": role, "is_active": is_active, "search": search}
+    }])
+    
+    rows = user_repository.iter_users_for_export(role, is_active, search)
+    return streaming_export_response(rows, "users", format, USER_EXPORT_FIELDS, compress)
+
 @router.put("/users/{user_id}/role")
 async def update_user_role(
     user_id: str,
@@ -94,7 +187,7 @@ async def update_user_role(
         
         # Log admin activity
         await admin_repository.log_admin_activity(
-            admin_user.id,
+            admin_user,
             "update_role",
             "user",
             user_id,
@@ -131,7 +224,7 @@ async def assign_user_tier(
         success = await admin_repository.assign_user_tier(
             user_id, 
             tier_update.tier, 
-            admin_user.id,
+            admin_user,
             tier_update.expires_at,
             tier_update.notes
         )
@@ -178,7 +271,7 @@ async def update_user_status(
         
         # Log admin activity
         await admin_repository.log_admin_activity(
-            admin_user.id,
+            admin_user,
             "update_status",
             "user",
             user_id,
@@ -223,7 +316,7 @@ async def delete_user_account(
             )
         
         # Delete user account (actually just disables it)
-        success = await admin_repository.delete_user_account(user_id, admin_user.id)
+        success = await admin_repository.delete_user_account(user_id, admin_user)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -240,6 +333,132 @@ async def delete_user_account(
             detail="Failed to delete user account"
         )
 
+async def _resolve_bulk_targets(
+    user_ids: List[str],
+    admin_user: User,
+    allow_self: bool = True
+) -> Tuple[List[User], Dict[str, BulkOperationResult]]:
+    """Load all targets of a bulk operation in one query and reject the ones that cannot be changed"""
+    unique_ids = list(dict.fromkeys(user_ids))
+    users = await user_repository.get_users_by_ids(unique_ids)
+    
+    targets = []
+    results = {}
+    for user_id in unique_ids:
+        if user_id not in users:
+            results[user_id] = BulkOperationResult(user_id=user_id, success=False, error="User not found")
+        elif not allow_self and user_id == admin_user.id:
+            results[user_id] = BulkOperationResult(user_id=user_id, success=False, error="Cannot change your own admin account")
+        else:
+            targets.append(users[user_id])
+    return targets, results
+
+def _bulk_response(user_ids: List[str], targets: List[User], results: Dict[str, BulkOperationResult], success: bool) -> dict:
+    """Build the per-item response of a bulk operation"""
+    for target in targets:
+        results[target.id] = BulkOperationResult(
+            user_id=target.id,
+            success=success,
+            error=None if success else "Update failed"
+        )
+    ordered = [results[user_id] for user_id in dict.fromkeys(user_ids)]
+    return {
+        "success": all(result.success for result in ordered),
+        "updated_count": sum(1 for result in ordered if result.success),
+        "failed_count": sum(1 for result in ordered if not result.success),
+        "results": [result.dict() for result in ordered]
+    }
+
+@router.post("/users/bulk/role")
+async def bulk_update_user_role(
+    role_update: BulkUserRoleUpdate,
+    admin_user: User = Depends(require_admin_role)
+):
+    """Update the role of many users at once"""
+    try:
+        targets, results = await _resolve_bulk_targets(role_update.user_ids, admin_user, allow_self=False)
+        
+        success = await user_repository.update_users_role([t.id for t in targets], role_update.role)
+        
+        if success:
+            await admin_repository.log_admin_activities(admin_user, [
+                {
+                    "action": "update_role",
+                    "target_type": "user",
+                    "target_id": target.id,
+                    "details": {"old_role": target.role.value, "new_role": role_update.role, "bulk": True}
+                }
+                for target in targets
+            ])
+        
+        return _bulk_response(role_update.user_ids, targets, results, success)
+    except Exception as e:
+        logger.error(f"Error bulk updating user roles: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update user roles"
+        )
+
+@router.post("/users/bulk/status")
+async def bulk_update_user_status(
+    status_update: BulkUserStatusUpdate,
+    admin_user: User = Depends(require_admin_role)
+):
+    """Enable or disable many user accounts at once"""
+    try:
+        targets, results = await _resolve_bulk_targets(status_update.user_ids, admin_user, allow_self=False)
+        
+        success = await user_repository.update_users_status([t.id for t in targets], status_update.is_active)
+        
+        if success:
+            await admin_repository.log_admin_activities(admin_user, [
+                {
+                    "action": "update_status",
+                    "target_type": "user",
+                    "target_id": target.id,
+                    "details": {
+                        "old_status": target.is_active,
+                        "new_status": status_update.is_active,
+                        "reason": status_update.reason,
+                        "bulk": True
+                    }
+                }
+                for target in targets
+            ])
+        
+        return _bulk_response(status_update.user_ids, targets, results, success)
+    except Exception as e:
+        logger.error(f"Error bulk updating user status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update user status"
+        )
+
+@router.post("/users/bulk/tier")
+async def bulk_assign_user_tier(
+    tier_update: BulkUserTierUpdate,
+    admin_user: User = Depends(require_admin_role)
+):
+    """Assign a donation tier to many users at once"""
+    try:
+        targets, results = await _resolve_bulk_targets(tier_update.user_ids, admin_user)
+        
+        success = await admin_repository.assign_user_tiers(
+            [t.id for t in targets],
+            tier_update.tier,
+            admin_user,
+            tier_update.expires_at,
+            tier_update.notes
+        )
+        
+        return _bulk_response(tier_update.user_ids, targets, results, success)
+    except Exception as e:
+        logger.error(f"Error bulk assigning user tiers: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to assign user tiers"
+        )
+
 @router.get("/matches/recent")
 async def get_recent_matches_all(
     limit: int = Query(50, ge=1, le=100, description="Number of recent matches"),
@@ -296,7 +515,7 @@ async def create_manual_match(
         
         # Log admin activity
         await admin_repository.log_admin_activity(
-            admin_user.id,
+            admin_user,
             "create_manual_match",
             "match",
             match.id,
@@ -326,18 +545,100 @@ async def get_tier_benefits(admin_user: User = Depends(require_admin_role)):
             detail="Failed to fetch tier benefits"
         )
 
+@router.get("/system/db-pool")
+async def get_db_pool_stats(admin_user: User = Depends(require_admin_role)):
+    """Get MySQL pool occupancy and acquire-latency metrics"""
+    return {
+        "acquire_timeout": mysql_db.acquire_timeout,
+        "pools": mysql_db.pool_stats()
+    }
+
+@router.get("/system/mongo-indexes")
+async def get_mongo_index_report(admin_user: User = Depends(require_admin_role)):
+    """Get missing/unused Mongo indexes and the explain() check of every hot query"""
+    return {
+        "indexes": await mongo_indexes.report(admin_repository.db),
+        "queries": await mongo_indexes.explain(admin_repository.db)
+    }
+
+@router.get("/system/audit-log")
+async def get_audit_log_metrics(admin_user: User = Depends(require_admin_role)):
+    """Get queue depth, throughput and spill metrics of the buffered audit log writer"""
+    return audit_log_writer.metrics()
+
+@router.get("/system/user-tiers")
+async def check_user_tiers(
+    repair: bool = Query(False, description="Rewrite users whose stored tier does not match their donations"),
+    admin_user: User = Depends(require_admin_role)
+):
+    """Check the precomputed user tiers against the donations history"""
+    try:
+        return await admin_repository.check_user_tiers(repair)
+    except Exception as e:
+        logger.error(f"Error checking user tiers: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to check user tiers"
+        )
+
+def activity_log_filter(
+    admin_user_id: Optional[str] = Query(None, description="Filter by acting admin"),
+    action: Optional[str] = Query(None, description="Filter by action"),
+    target_type: Optional[str] = Query(None, description="Filter by target type"),
+    target_id: Optional[str] = Query(None, description="Filter by target id"),
+    date_from: Optional[datetime] = Query(None, description="Logs created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Logs created before this time")
+) -> AdminActivityLogFilter:
+    """Query parameters shared by activity log endpoints"""
+    return AdminActivityLogFilter(
+        admin_user_id=admin_user_id,
+        action=action,
+        target_type=target_type,
+        target_id=target_id,
+        # Converted to naive UTC by the model
+        date_from=date_from,
+        date_to=date_to
+    )
+
+@router.get("/activity-logs/export")
+async def export_admin_activity_logs(
+    format: str = Query("ndjson", pattern=r"^(csv|ndjson)$", description="Export format"),
+    compress: bool = Query(True, description="Gzip the export"),
+    filters: AdminActivityLogFilter = Depends(activity_log_filter),
+    admin_user: User = Depends(require_admin_role)
+):
+    """Stream all matching activity logs as CSV or NDJSON"""
+    await admin_repository.log_admin_activities(admin_user, [{
+        "action": "export_activity_logs",
+        "target_type": "activity_log",
+        "target_id": "*",
+        "details": {"format": format, **filters.dict(exclude_none=True)}
+    }])
+    
+    rows = admin_repository.iter_admin_activity_logs(filters)
+    return streaming_export_response(rows, "admin_activity_logs", format, ADMIN_LOG_EXPORT_FIELDS, compress)
+
 @router.get("/activity-logs")
 async def get_admin_activity_logs(
-    limit: int = Query(100, ge=1, le=500, description="Number of logs to fetch"),
+    limit: int = Query(100, ge=1, le=500, description="Number of logs per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    filters: AdminActivityLogFilter = Depends(activity_log_filter),
     admin_user: User = Depends(require_admin_role)
 ):
-    """Get admin activity logs for audit trail"""
+    """Get admin activity logs for audit trail, one keyset-paginated page at a time"""
     try:
-        logs = await admin_repository.get_admin_activity_logs(limit)
+        logs, next_cursor = await admin_repository.get_admin_activity_logs(limit, cursor, filters)
         return {
-            "logs": [log.dict() for log in logs],
+            "logs": logs,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
             "total_count": len(logs)
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error getting admin activity logs: {e}")
         raise HTTPException(
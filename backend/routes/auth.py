@@ -2,8 +2,10 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from models.user import UserCreate, UserLogin, UserUpdate, UserResponse, TokenResponse
 from repositories.user import user_repository
+from repositories.admin import admin_repository
+from services.entitlements import tier_changes, entitlements_for
 from services.auth import auth_service
-from middleware.auth import get_current_user, security
+from middleware.auth import get_current_user, security, get_token_payload
 from typing import Optional
 import logging
 
@@ -11,6 +13,10 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+async def entitlement_claim(user_id: str) -> dict:
+    """Entitlement claim for a new access token (one user_tiers lookup)"""
+    return tier_changes.claim(await admin_repository.get_user_tier_info(user_id))
+
 @router.post("/register", response_model=TokenResponse)
 async def register(user_data: UserCreate):
     """Register a new user"""
@@ -34,8 +40,8 @@ async def register(user_data: UserCreate):
         # Update login stats
         await user_repository.update_user_login(user.id)
         
-        # Create tokens
-        access_token = auth_service.create_access_token(user.id, user.username, user.role)
+        # Create tokens (a new account has no tier yet)
+        access_token = auth_service.create_access_token(user.id, user.username, user.role, tier_changes.claim(None))
         refresh_token = auth_service.create_refresh_token(user.id)
         
         # Create user response
@@ -112,7 +118,9 @@ async def login(login_data: UserLogin):
         logger.info(f"Creating tokens for user: {user.username}, role: {user.role}")
         
         # Create tokens
-        access_token = auth_service.create_access_token(user.id, user.username, user.role)
+        access_token = auth_service.create_access_token(
+            user.id, user.username, user.role, await entitlement_claim(user.id)
+        )
         refresh_token = auth_service.create_refresh_token(user.id)
         
         logger.info(f"Tokens created successfully for user: {user.username}")
@@ -174,7 +182,9 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(secu
             )
         
         # Create new tokens
-        access_token = auth_service.create_access_token(user.id, user.username, user.role)
+        access_token = auth_service.create_access_token(
+            user.id, user.username, user.role, await entitlement_claim(user.id)
+        )
         new_refresh_token = auth_service.create_refresh_token(user.id)
         
         # Create user response
@@ -231,6 +241,17 @@ async def get_current_user_info(current_user = Depends(get_current_user)):
         login_count=current_user.login_count
     )
 
+@router.get("/entitlements")
+async def get_my_entitlements(payload: dict = Depends(get_token_payload)):
+    """Get the tier and perks carried by the current access token"""
+    claim = payload.get('ent') or {}
+    return {
+        "tier": claim.get("tier"),
+        "entitlements": entitlements_for(claim.get("tier")),
+        "expires_at": claim.get("exp"),
+        "refresh_required": not tier_changes.is_current(payload['user_id'], payload.get('ent'))
+    }
+
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     user_update: UserUpdate,
@@ -238,7 +259,7 @@ async def update_current_user(
 ):
     """Update current user information"""
     try:
-        updated_user = await user_repository.update_user(current_user.id, user_update)
+        updated_user = await user_repository.update_user(current_user.id, user_update, current_user)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,15 +1,29 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Optional, List
-from models.cs2_stats import CS2StatsResponse, CS2StatsUpdate, CS2MatchCreate, CS2Match
-from repositories.cs2_stats import cs2_stats_repository
+from datetime import datetime, date, timedelta
+from models.cs2_stats import CS2StatsResponse, CS2StatsUpdate, CS2MatchCreate, CS2Match, CS2MatchHistoryFilter, CS2Map, CS2GameMode, CS2MapStats
+from repositories.cs2_stats import cs2_stats_repository, LEADERBOARD_STATS, TREND_BUCKETS
 from middleware.auth import get_current_user, get_current_user_optional
 from repositories.user import user_repository
+from repositories.rank_history import rank_history_repository
+from services.export import streaming_export_response
+from services.stats_analytics import stats_distribution_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/cs2", tags=["CS2 Statistics"])
 
+# Days of rank history embedded in stats responses
+RANK_PROGRESSION_DAYS = 30
+
+async def recent_rank_progression(user_id: str) -> List[dict]:
+    """Rank samples for the last RANK_PROGRESSION_DAYS days"""
+    today = datetime.utcnow().date()
+    return await rank_history_repository.get_progression(
+        user_id, today - timedelta(days=RANK_PROGRESSION_DAYS), today
+    )
+
 @router.get("/stats/me", response_model=CS2StatsResponse)
 async def get_my_cs2_stats(current_user = Depends(get_current_user)):
     """Get CS2 statistics for the current user"""
@@ -28,7 +42,7 @@ async def get_my_cs2_stats(current_user = Depends(get_current_user)):
             username=current_user.username,
             stats=stats,
             recent_matches=recent_matches,
-            rank_progression=[]  # TODO: Implement rank progression tracking
+            rank_progression=await recent_rank_progression(current_user.id)
         )
         
     except HTTPException:
@@ -40,6 +54,49 @@ async def get_my_cs2_stats(current_user = Depends(get_current_user)):
             detail="Failed to fetch CS2 statistics"
         )
 
+@router.get("/stats/me/percentiles")
+async def get_my_percentiles(current_user = Depends(get_current_user)):
+    """Get where the current user's stats rank among all players (e.g. K/D better than 83%)"""
+    if not stats_distribution_service.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Statistics snapshot not available yet"
+        )
+    
+    try:
+        stats = await cs2_stats_repository.get_player_stat_values(current_user.id)
+        if not stats:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="CS2 statistics not found"
+            )
+        
+        return {
+            "user_id": current_user.id,
+            "percentiles": stats_distribution_service.percentiles_for(stats),
+            "player_count": stats_distribution_service.summary["player_count"],
+            "generated_at": stats_distribution_service.summary["generated_at"]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching percentiles: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch percentiles"
+        )
+
+@router.get("/distributions")
+async def get_stat_distributions():
+    """Get percentiles, histograms and per-rank averages for player stats"""
+    if not stats_distribution_service.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Statistics snapshot not available yet"
+        )
+    return stats_distribution_service.summary
+
 @router.get("/stats/{user_id}", response_model=CS2StatsResponse)
 async def get_user_cs2_stats(
     user_id: str,
@@ -55,7 +112,8 @@ async def get_user_cs2_stats(
                 detail="User not found"
             )
         
-        stats = await cs2_stats_repository.get_player_stats(user_id)
+        # Other players' stats can lag by a snapshot interval, like the leaderboard
+        stats = await cs2_stats_repository.get_player_stats(user_id, cached=True)
         if not stats:
             # Create default stats for the user
             stats = await cs2_stats_repository._create_default_stats(user_id)
@@ -67,7 +125,7 @@ async def get_user_cs2_stats(
             username=user.username,
             stats=stats,
             recent_matches=recent_matches,
-            rank_progression=[]
+            rank_progression=await recent_rank_progression(user_id)
         )
         
     except HTTPException:
@@ -79,6 +137,96 @@ async def get_user_cs2_stats(
             detail="Failed to fetch CS2 statistics"
         )
 
+@router.get("/stats/{user_id}/maps", response_model=List[CS2MapStats])
+async def get_user_map_stats(
+    user_id: str,
+    current_user = Depends(get_current_user_optional)
+):
+    """Get a player's per-map breakdown"""
+    try:
+        return await cs2_stats_repository.get_player_map_stats(user_id)
+    except Exception as e:
+        logger.error(f"Error fetching map stats for user {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch map statistics"
+        )
+
+@router.get("/stats/{user_id}/rank-progression")
+async def get_user_rank_progression(
+    user_id: str,
+    date_from: Optional[date] = Query(None, description="First day (defaults to 90 days ago)"),
+    date_to: Optional[date] = Query(None, description="Last day (defaults to today)"),
+    current_user = Depends(get_current_user_optional)
+):
+    """Get a player's rank rating and rank over time for charting"""
+    try:
+        date_to = date_to or datetime.utcnow().date()
+        date_from = date_from or date_to - timedelta(days=90)
+        if date_from > date_to:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from must not be after date_to"
+            )
+        
+        points = await rank_history_repository.get_progression(user_id, date_from, date_to)
+        return {
+            "user_id": user_id,
+            "date_from": date_from,
+            "date_to": date_to,
+            "points": points
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching rank progression for user {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch rank progression"
+        )
+
+@router.get("/stats/{user_id}/trends")
+async def get_user_trends(
+    user_id: str,
+    granularity: str = Query("day", description="Bucket size: day, week or month"),
+    date_from: Optional[date] = Query(None, description="First day (defaults to 30 days ago)"),
+    date_to: Optional[date] = Query(None, description="Last day (defaults to today)"),
+    current_user = Depends(get_current_user_optional)
+):
+    """Get a player's K/D, win rate, ADR and totals per day, week or month for charting"""
+    try:
+        if granularity not in TREND_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid granularity. Must be one of: {', '.join(TREND_BUCKETS)}"
+            )
+        date_to = date_to or datetime.utcnow().date()
+        date_from = date_from or date_to - timedelta(days=30)
+        if date_from > date_to:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from must not be after date_to"
+            )
+        
+        trends = await cs2_stats_repository.get_player_trends(user_id, date_from, date_to, granularity)
+        return {
+            "user_id": user_id,
+            "granularity": granularity,
+            "date_from": date_from,
+            "date_to": date_to,
+            **trends
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching trends for user {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch trends"
+        )
+
 @router.put("/stats/me", response_model=CS2StatsResponse)
 async def update_my_cs2_stats(
     stats_update: CS2StatsUpdate,
@@ -100,7 +248,7 @@ async def update_my_cs2_stats(
             username=current_user.username,
             stats=stats,
             recent_matches=recent_matches,
-            rank_progression=[]
+            rank_progression=await recent_rank_progression(current_user.id)
         )
         
     except HTTPException:
@@ -158,6 +306,63 @@ async def get_my_matches(
             detail="Failed to fetch matches"
         )
 
+def match_history_filter(
+    map_name: Optional[CS2Map] = Query(None, description="Filter by map"),
+    game_mode: Optional[CS2GameMode] = Query(None, description="Filter by game mode"),
+    result: Optional[str] = Query(None, pattern=r"^(win|loss|draw)$", description="Filter by result"),
+    date_from: Optional[datetime] = Query(None, description="Matches played at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Matches played before this time")
+) -> CS2MatchHistoryFilter:
+    """Query parameters shared by match history endpoints"""
+    return CS2MatchHistoryFilter(
+        map_name=map_name,
+        game_mode=game_mode,
+        result=result,
+        date_from=date_from,
+        date_to=date_to
+    )
+
+@router.get("/matches/me/history")
+async def get_my_match_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    filters: CS2MatchHistoryFilter = Depends(match_history_filter),
+    current_user = Depends(get_current_user)
+):
+    """Get the current user's match history, one keyset-paginated page at a time"""
+    try:
+        matches, next_cursor = await cs2_stats_repository.get_match_history(
+            current_user.id, limit, cursor, filters
+        )
+        return {
+            "matches": matches,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+            "user_id": current_user.id
+        }
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error fetching match history: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch match history"
+        )
+
+@router.get("/matches/me/export")
+async def export_my_matches(
+    compress: bool = Query(False, description="Gzip the export"),
+    filters: CS2MatchHistoryFilter = Depends(match_history_filter),
+    current_user = Depends(get_current_user)
+):
+    """Stream the current user's entire match history as NDJSON"""
+    rows = cs2_stats_repository.iter_match_history(current_user.id, filters)
+    return streaming_export_response(rows, "matches", "ndjson", compress=compress)
+
 @router.get("/leaderboard")
 async def get_leaderboard(
     stat_type: str = Query("kd_ratio", description="Statistic to rank by"),
@@ -167,10 +372,7 @@ async def get_leaderboard(
     """Get CS2 leaderboard"""
     try:
         # Validate stat type
-        valid_stats = [
-            "kd_ratio", "total_kills", "win_rate", "matches_played", 
-            "headshot_percentage", "mvp_count", "adr", "rank_rating"
-        ]
+        valid_stats = LEADERBOARD_STATS
         
         if stat_type not in valid_stats:
             raise HTTPException(
@@ -195,6 +397,18 @@ async def get_leaderboard(
             detail="Failed to fetch leaderboard"
         )
 
+@router.get("/maps/stats", response_model=List[CS2MapStats])
+async def get_map_aggregates():
+    """Get per-map totals across all players"""
+    try:
+        return await cs2_stats_repository.get_map_aggregates()
+    except Exception as e:
+        logger.error(f"Error fetching map aggregates: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch map statistics"
+        )
+
 @router.get("/ranks")
 async def get_cs2_ranks():
     """Get list of CS2 ranks"""
@@ -1,13 +1,14 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Query
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
+from pymongo import IndexModel
 from typing import List
-import uuid
 from datetime import datetime
 
 # Load environment variables BEFORE importing modules that use them
@@ -15,7 +16,23 @@ ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # Import new modules AFTER loading environment variables
-from database.mysql import mysql_db
+from database.mysql import mysql_db, PoolTimeoutError
+from models.ids import new_id
+from database.mongo_indexes import mongo_indexes
+from database.migrations import run_migrations
+from database.sharding import shard_router
+from database.seed import create_admin_user
+from middleware.db_pool import pool_saturation_middleware, pool_timeout_handler
+from services.scheduler import scheduler
+from services.login_activity import login_activity_buffer
+from services.audit_log import audit_log_writer
+from services.active_users import active_user_tracker
+from repositories.rank_history import rank_history_repository
+from services.stats_analytics import stats_distribution_service
+from services.stats_snapshot import player_stats_snapshot
+from services.match_archive import match_archive
+from repositories.platform_rollups import platform_rollup_repository
+from repositories.admin import admin_repository
 from routes.auth import router as auth_router
 from routes.themes import router as themes_router
 from routes.steam import router as steam_router
@@ -37,13 +54,18 @@ api_router = APIRouter(prefix="/api")
 
 # Define Models (keeping existing models for backwards compatibility)
 class StatusCheck(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=new_id)
     client_name: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+mongo_indexes.register("status_checks", [
+    IndexModel([("timestamp", -1)], name="timestamp_desc", background=True)
+])
+mongo_indexes.register_query("status_checks_recent", "status_checks", {}, sort=[("timestamp", -1)])
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -57,8 +79,8 @@ async def create_status_check(input: StatusCheckCreate):
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+async def get_status_checks(limit: int = Query(100, ge=1, le=1000)):
+    status_checks = await db.status_checks.find().sort("timestamp", -1).limit(limit).to_list(limit)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
 # Health check endpoint
@@ -68,6 +90,7 @@ async def health_check():
         "status": "healthy",
         "mongodb": "connected",
         "mysql": "connected" if mysql_db.pool else "disconnected",
+        "mysql_replicas": len(mysql_db.replica_pools),
         "version": "1.0.0"
     }
 
@@ -82,6 +105,10 @@ api_router.include_router(tiers_router)
 # Include the router in the main app
 app.include_router(api_router)
 
+# Fail fast with 503 when the MySQL pool is saturated (added first so CORS wraps it)
+app.middleware("http")(pool_saturation_middleware)
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -105,25 +132,60 @@ async def startup_event():
     # Initialize MySQL connection
     await mysql_db.connect()
     
-    # Initialize CS2 tables and admin user
-    try:
-        from database.init_cs2_tables import create_cs2_tables, create_admin_user
-        await create_cs2_tables()
+    # Bring the MySQL schema up to date (a single version check when it already is);
+    # MongoDB-only deployments just need the admin account
+    if mysql_db.pool:
+        await run_migrations()
+        await shard_router.connect()
+    else:
         await create_admin_user()
-    except Exception as e:
-        logger.warning(f"Could not initialize CS2 tables or admin user: {e}")
     
     logger.info("Database connections initialized")
+    
+    # Create any missing Mongo indexes declared by the repositories, without delaying startup
+    asyncio.create_task(mongo_indexes.ensure(db))
+    
+    # Build the effective tier table on first start after it was introduced
+    asyncio.create_task(admin_repository.ensure_user_tiers())
+    
+    # Map the last player stats snapshot so the first requests do not hit MySQL
+    if not player_stats_snapshot.load():
+        asyncio.create_task(player_stats_snapshot.refresh())
+    
+    # Serve percentiles from the last snapshot until the first refresh
+    if not stats_distribution_service.load():
+        asyncio.create_task(stats_distribution_service.refresh())
+    
+    # Start background jobs
+    scheduler.add("login_activity_flush", login_activity_buffer.flush_interval, login_activity_buffer.flush)
+    scheduler.add("audit_log_flush", audit_log_writer.flush_interval, audit_log_writer.flush)
+    scheduler.add("active_users_flush", active_user_tracker.flush_interval, active_user_tracker.flush)
+    scheduler.add("rank_history_downsample", rank_history_repository.downsample_interval, rank_history_repository.downsample)
+    scheduler.add("player_stats_snapshot_refresh", player_stats_snapshot.refresh_interval, player_stats_snapshot.refresh)
+    scheduler.add("stats_distribution_refresh", stats_distribution_service.refresh_interval, stats_distribution_service.refresh)
+    scheduler.add("match_archive", match_archive.archive_interval, match_archive.archive)
+    scheduler.add("user_tier_expiry", admin_repository.tier_expiry_interval, admin_repository.expire_user_tiers)
+    if shard_router.is_sharded:
+        scheduler.add("match_shard_directory_refresh", shard_router.directory_refresh_interval, shard_router.load_directory)
+    scheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up database connections on shutdown"""
     logger.info("Shutting down ProjectTest API...")
     
+    # Stop background jobs and persist buffered writes
+    await scheduler.stop()
+    await login_activity_buffer.flush()
+    await audit_log_writer.close()
+    await active_user_tracker.flush()
+    await platform_rollup_repository.flush()
+    
     # Close MongoDB connection
     client.close()
     
-    # Close MySQL connection
+    # Close MySQL connections
+    await shard_router.disconnect()
     await mysql_db.disconnect()
     
     logger.info("Database connections closed")
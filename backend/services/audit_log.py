@@ -0,0 +1,201 @@
+"""
+Buffered writer for the admin audit log
+
+Admin actions enqueue their AdminActivityLog documents here instead of inserting
+them inline. The queue is written with insert_many once it holds
+AUDIT_LOG_BATCH_SIZE entries, and every AUDIT_LOG_FLUSH_INTERVAL seconds otherwise.
+Documents use the log id as _id, so retrying a partially written batch cannot
+duplicate entries.
+
+The queue holds at most AUDIT_LOG_MAX_PENDING entries. Past that (MongoDB down),
+the oldest batch is appended to a spill file, and so is whatever is still queued
+at shutdown. The next successful flush writes the spill file back.
+
+Every worker shares the spill file, so appends and claims hold an flock on a lock
+file next to it. A worker claims the spill file by renaming it to a recovering file
+named after its host and pid, and deletes that once the logs are in MongoDB. If the
+worker dies first, another worker on the same host claims the file again.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from services.export import ndjson_line
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_PATH = Path(__file__).parent.parent / "data" / "audit_log_spill.ndjson"
+
+def _parse_log(line: bytes) -> Dict[str, Any]:
+    log = json.loads(line)
+    log["created_at"] = datetime.fromisoformat(log["created_at"])
+    return log
+
+class AuditLogWriter:
+    """Queues admin activity logs in memory and writes them in batches"""
+
+    def __init__(self):
+        self.flush_interval = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 2))
+        self.batch_size = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 100))
+        self.max_pending = int(os.environ.get('AUDIT_LOG_MAX_PENDING', 10000))
+        self.spill_path = Path(os.environ.get('AUDIT_LOG_SPILL_PATH', DEFAULT_SPILL_PATH))
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self.stats = {"enqueued": 0, "written": 0, "flushes": 0, "failed_flushes": 0, "spilled": 0, "recovered": 0}
+        self.last_flush_at: Optional[datetime] = None
+        self.last_flush_ms: Optional[float] = None
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Recovering files whose logs are queued in this process
+        self._claimed: List[Path] = []
+        self._claims = 0
+
+    async def record(self, log: Dict[str, Any]):
+        """Queue one activity log document; flushes early once a batch is full"""
+        if len(self.pending) >= self.max_pending:
+            # Keep memory bounded without losing entries while MongoDB is unavailable
+            overflow = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+            await asyncio.to_thread(self._spill, overflow)
+
+        self.pending.append(log)
+        self.stats["enqueued"] += 1
+
+        if len(self.pending) >= self.batch_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def pending_logs(self) -> List[Dict[str, Any]]:
+        """Queued documents that are not yet in MongoDB"""
+        return list(self.pending)
+
+    async def flush(self) -> int:
+        """Write queued logs batch by batch; a failed batch stays at the head of the queue"""
+        async with self._flush_lock:
+            if not self.pending:
+                await asyncio.to_thread(self._load_spill)
+            if not self.pending:
+                return 0
+
+            from repositories.admin import admin_repository
+            started = time.monotonic()
+            written = 0
+            while self.pending:
+                batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+                try:
+                    inserted = await admin_repository.insert_activity_logs(batch)
+                except BaseException:
+                    # Cancelled mid-insert: keep the batch; ids make a repeated insert harmless
+                    self.pending.extendleft(reversed(batch))
+                    raise
+                if not inserted:
+                    self.pending.extendleft(reversed(batch))
+                    self.stats["failed_flushes"] += 1
+                    break
+                written += len(batch)
+
+            if written:
+                self.stats["written"] += written
+                self.stats["flushes"] += 1
+                self.last_flush_at = datetime.utcnow()
+                self.last_flush_ms = round((time.monotonic() - started) * 1000, 1)
+            if not self.pending:
+                self._release_claims()
+            return written
+
+    async def close(self):
+        """Flush on shutdown, spilling to disk whatever MongoDB did not accept"""
+        await self.flush()
+        if self.pending:
+            logs, self.pending = list(self.pending), deque()
+            await asyncio.to_thread(self._spill, logs)
+            # Claimed logs are in the spill file again
+            self._release_claims()
+            logger.warning(f"Spilled {len(logs)} unwritten admin activity logs to {self.spill_path}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self.pending),
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "last_flush_at": self.last_flush_at,
+            "last_flush_ms": self.last_flush_ms,
+            "spill_file_bytes": self.spill_path.stat().st_size if self.spill_path.exists() else 0,
+        }
+
+    @contextmanager
+    def _spill_lock(self):
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path.with_name(self.spill_path.name + ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _recovering_prefix(self, host: str) -> str:
+        return f"{self.spill_path.name}.recovering.{host}."
+
+    def _spill(self, logs: List[Dict[str, Any]]):
+        with self._spill_lock(), open(self.spill_path, "ab") as handle:
+            handle.write(b"".join(ndjson_line(log) for log in logs))
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.stats["spilled"] += len(logs)
+
+    def _orphaned(self) -> List[Path]:
+        """Recovering files left by dead workers on this host"""
+        prefix = self._recovering_prefix(socket.gethostname())
+        orphaned = []
+        for path in self.spill_path.parent.glob(prefix + "*"):
+            pid = path.name[len(prefix):].split(".")[0]
+            if not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                orphaned.append(path)
+            except PermissionError:
+                pass
+        return orphaned
+
+    def _load_spill(self):
+        """Claim and queue spilled logs; claimed files are removed once they are all written"""
+        with self._spill_lock():
+            sources = self._orphaned()
+            if self.spill_path.exists():
+                sources.append(self.spill_path)
+            claimed = []
+            for source in sources:
+                self._claims += 1
+                target = self.spill_path.with_name(
+                    f"{self._recovering_prefix(socket.gethostname())}{os.getpid()}.{self._claims}"
+                )
+                os.replace(source, target)
+                claimed.append(target)
+
+        logs = []
+        for path in claimed:
+            with open(path, "rb") as handle:
+                logs.extend(_parse_log(line) for line in handle if line.strip())
+        self._claimed.extend(claimed)
+        if logs:
+            self.pending.extend(logs)
+            self.stats["recovered"] += len(logs)
+            logger.info(f"Recovered {len(logs)} spilled admin activity logs")
+
+    def _release_claims(self):
+        for path in self._claimed:
+            path.unlink(missing_ok=True)
+        self._claimed = []
+
+# Global audit log writer instance
+audit_log_writer = AuditLogWriter()
@@ -40,8 +40,8 @@ class AuthService:
         """Verify a password against its hash"""
         return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
-    def create_access_token(self, user_id: str, username: str, role) -> str:
-        """Create a JWT access token"""
+    def create_access_token(self, user_id: str, username: str, role, entitlements: Optional[dict] = None) -> str:
+        """Create a JWT access token, optionally carrying an entitlement claim (see services.entitlements)"""
         import logging
         logger = logging.getLogger(__name__)
         
@@ -62,6 +62,8 @@ class AuthService:
                 'exp': int(exp_time.timestamp()),
                 'iat': int(now.timestamp())
             }
+            if entitlements is not None:
+                payload['ent'] = entitlements
             
             logger.info(f"JWT payload created: {payload}")
             logger.info(f"JWT secret available: {'YES' if self.jwt_secret else 'NO'}")
@@ -0,0 +1,80 @@
+"""
+Tier entitlements carried in access tokens
+
+Access tokens embed a compact claim, `ent: {"tier": ..., "iat": ..., "exp": ...}`.
+Perk checks read the claim instead of querying donations. The claim expires after
+ENTITLEMENT_CLAIM_TTL (or when the tier does, if sooner). A tier change on this
+worker invalidates older claims at once. Other workers pick up the change when
+the claim expires.
+"""
+import math
+import os
+import time
+from datetime import timezone
+from typing import Any, Dict, List, Optional
+
+from models.admin import DonationTier
+
+TIER_ORDER = [
+    DonationTier.BRONZE, DonationTier.SILVER, DonationTier.GOLD,
+    DonationTier.PLATINUM, DonationTier.DIAMOND, DonationTier.ELITE
+]
+
+# Lowest tier that grants each perk; higher tiers include everything below them
+ENTITLEMENT_MIN_TIER = {
+    "supporter_chat": DonationTier.BRONZE,
+    "priority_matchmaking": DonationTier.SILVER,
+    "exclusive_statistics": DonationTier.SILVER,
+    "advanced_analytics": DonationTier.GOLD,
+    "beta_features": DonationTier.GOLD,
+    "custom_profile_themes": DonationTier.PLATINUM,
+    "performance_reports": DonationTier.PLATINUM,
+    "private_match_hosting": DonationTier.PLATINUM,
+    "tournament_hosting": DonationTier.DIAMOND,
+    "statistics_backup": DonationTier.DIAMOND,
+    "custom_servers": DonationTier.ELITE,
+}
+
+def entitlements_for(tier: Optional[str]) -> List[str]:
+    """Perks granted by a tier (none without one)"""
+    if not tier:
+        return []
+    rank = TIER_ORDER.index(DonationTier(tier))
+    return [name for name, minimum in ENTITLEMENT_MIN_TIER.items() if TIER_ORDER.index(minimum) <= rank]
+
+class TierChangeRegistry:
+    """When each user's tier last changed on this worker, kept for one claim lifetime"""
+
+    def __init__(self):
+        self.claim_ttl = int(os.environ.get('ENTITLEMENT_CLAIM_TTL', 300))
+        self.changed_at: Dict[str, float] = {}
+
+    def mark(self, user_ids: List[str]):
+        now = time.time()
+        # Claims issued before now - claim_ttl have expired anyway
+        if len(self.changed_at) > 10000:
+            self.changed_at = {user_id: at for user_id, at in self.changed_at.items() if at > now - self.claim_ttl}
+        for user_id in user_ids:
+            self.changed_at[user_id] = now
+
+    def claim(self, tier_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the `ent` claim from get_user_tier_info output"""
+        now = time.time()
+        expires = now + self.claim_ttl
+        tier = None
+        if tier_info:
+            tier = getattr(tier_info["tier"], "value", tier_info["tier"])
+            tier_expires_at = tier_info.get("expires_at")
+            if tier_expires_at:
+                expires = min(expires, tier_expires_at.replace(tzinfo=timezone.utc).timestamp())
+        # Rounded down: a claim issued just before a tier change must not look newer than it
+        return {"tier": tier, "iat": math.floor(now * 1000) / 1000, "exp": int(expires)}
+
+    def is_current(self, user_id: str, claim: Optional[Dict[str, Any]]) -> bool:
+        """False if the claim is missing, expired or older than the user's last tier change"""
+        if not claim or claim.get("exp", 0) <= time.time():
+            return False
+        return claim.get("iat", 0) >= self.changed_at.get(user_id, 0)
+
+# Global tier change registry
+tier_changes = TierChangeRegistry()
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+# Rows are buffered into chunks of roughly this size before being sent
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _json_default(value: Any):
+    """Serialize values the json module does not handle natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+def _csv_value(value: Any):
+    """Flatten a value into a CSV cell"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+def ndjson_line(row: Dict[str, Any]) -> bytes:
+    """Encode a single row as one NDJSON line"""
+    return (json.dumps(row, default=_json_default) + "\n").encode("utf-8")
+
+async def encode_ndjson(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding chunks of about CHUNK_SIZE bytes"""
+    buffer = bytearray()
+    async for row in rows:
+        buffer += ndjson_line(row)
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+async def encode_csv(rows: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+    """Encode rows as CSV with a header line, yielding chunks of about CHUNK_SIZE bytes"""
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    async for row in rows:
+        writer.writerow({field: _csv_value(row.get(field)) for field in fields})
+        if text.tell() >= CHUNK_SIZE:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip a stream of chunks without holding more than one chunk in memory"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def streaming_export_response(
+    rows: AsyncIterator[Dict[str, Any]],
+    filename: str,
+    export_format: str = "ndjson",
+    fields: Optional[List[str]] = None,
+    compress: bool = True
+) -> StreamingResponse:
+    """Stream rows to the client as a CSV or NDJSON download, optionally gzipped"""
+    if export_format == "csv":
+        chunks = encode_csv(rows, fields or [])
+    else:
+        chunks = encode_ndjson(rows)
+
+    filename = f"{filename}.{export_format}"
+    media_type = EXPORT_MEDIA_TYPES.get(export_format, "application/octet-stream")
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
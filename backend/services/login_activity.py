@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+# user_id -> (latest login time, number of logins not yet written)
+LoginBatch = Dict[str, Tuple[datetime, int]]
+
+class LoginActivityBuffer:
+    """Aggregates login events in memory and writes them to the users table in batches"""
+
+    def __init__(self):
+        self.flush_interval = float(os.environ.get('LOGIN_ACTIVITY_FLUSH_INTERVAL', 10))
+        self.max_pending = int(os.environ.get('LOGIN_ACTIVITY_MAX_PENDING', 1000))
+        self.pending: LoginBatch = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: str, login_time: Optional[datetime] = None):
+        """Record a login; flushes early once too many users are pending"""
+        login_time = login_time or datetime.utcnow()
+        last_login, count = self.pending.get(user_id, (login_time, 0))
+        self.pending[user_id] = (max(last_login, login_time), count + 1)
+
+        if len(self.pending) >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def pending_user_ids(self) -> List[str]:
+        """IDs of users with logins that are not yet persisted"""
+        return list(self.pending.keys())
+
+    def apply(self, user: Optional[User]) -> Optional[User]:
+        """Overlay pending login activity onto a user read from the database"""
+        if user is None or user.id not in self.pending:
+            return user
+
+        last_login, count = self.pending[user.id]
+        if user.last_login is None or user.last_login < last_login:
+            user.last_login = last_login
+        user.login_count += count
+        return user
+
+    async def flush(self) -> int:
+        """Write all pending login activity; failed batches are kept for the next flush"""
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+
+            batch, self.pending = self.pending, {}
+
+            from repositories.user import user_repository
+            try:
+                written = await user_repository.apply_login_activity(batch)
+            except BaseException:
+                # Cancelled mid-write (shutdown): keep the batch for the final flush
+                self._requeue(batch)
+                raise
+            if written:
+                logger.info(f"Flushed login activity for {len(batch)} users")
+                return len(batch)
+
+            self._requeue(batch)
+            return 0
+
+    def _requeue(self, batch: LoginBatch):
+        """Put a batch back, merging with anything recorded meanwhile"""
+        for user_id, (last_login, count) in batch.items():
+            newer_login, newer_count = self.pending.get(user_id, (last_login, 0))
+            self.pending[user_id] = (max(last_login, newer_login), count + newer_count)
+
+# Global login activity buffer instance
+login_activity_buffer = LoginActivityBuffer()
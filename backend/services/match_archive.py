@@ -0,0 +1,315 @@
+"""
+Cold archive for old cs2_matches partitions
+
+Monthly partitions older than MATCH_RETENTION_MONTHS are exported from every match
+shard to gzip NDJSON files and then dropped:
+
+    <MATCH_ARCHIVE_DIR>/<YYYYMM>/<shard>.ndjson.gz   the partition's rows
+    <MATCH_ARCHIVE_DIR>/<YYYYMM>/<shard>.json        row count, date range, per-user index
+
+Rows are grouped by player, one gzip member each, so the file is still ordinary
+gzip NDJSON. The manifest maps every player to [matches, offset, length] of their
+member: a reader seeks to it and decompresses only that player's rows. Manifests
+written before the index have a bare match count, and those files are scanned whole.
+Readers keep manifests and extracted rows in small LRU caches.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import aiomysql
+
+from database.mysql import mysql_db
+from database.partitions import (
+    TABLE, add_months, month_start, partition_month, list_partitions,
+    partition_matches, ensure_future_partitions
+)
+from database.sharding import shard_router
+from models.ids import id_from_bytes
+from services.export import ndjson_line
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "match_archive"
+LOCK_NAME = "projecttest_match_archive"
+DATETIME_FIELDS = ("match_date", "created_at")
+
+def _parse_row(line: bytes) -> Dict[str, Any]:
+    row = json.loads(line)
+    for field in DATETIME_FIELDS:
+        if row.get(field):
+            row[field] = datetime.fromisoformat(row[field])
+    return row
+
+def _scan_user_rows(path: Path, user_id: str) -> List[Dict[str, Any]]:
+    """Rows of one user in an unindexed archive file; lines of other users are not parsed"""
+    marker = json.dumps({"user_id": user_id})[1:-1].encode("utf-8")
+    with gzip.open(path, "rb") as handle:
+        return [_parse_row(line) for line in handle if marker in line]
+
+def _count_days(path: Path, since: datetime, until: datetime, counts: Dict[str, int]):
+    """Add an archive file's matches in [since, until) to per-day `counts`"""
+    with gzip.open(path, "rb") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            match_date = datetime.fromisoformat(json.loads(line)["match_date"])
+            if since <= match_date < until:
+                day = match_date.strftime("%Y-%m-%d")
+                counts[day] = counts.get(day, 0) + 1
+
+def _read_user_member(path: Path, offset: int, length: int) -> List[Dict[str, Any]]:
+    """Rows of one user's gzip member in an indexed archive file"""
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        data = gzip.decompress(handle.read(length))
+    return [_parse_row(line) for line in data.splitlines() if line.strip()]
+
+def _write_atomic(path: Path, data: bytes):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+class MatchArchive:
+    def __init__(self):
+        self.archive_dir = Path(os.environ.get('MATCH_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+        self.retention_months = int(os.environ.get('MATCH_RETENTION_MONTHS', 6))
+        self.archive_interval = float(os.environ.get('MATCH_ARCHIVE_INTERVAL', 86400))
+        self.batch_size = int(os.environ.get('MATCH_ARCHIVE_BATCH', 5000))
+        self.cache_size = int(os.environ.get('MATCH_ARCHIVE_CACHE_SIZE', 256))
+        self.manifest_cache_size = int(os.environ.get('MATCH_ARCHIVE_MANIFEST_CACHE_SIZE', 32))
+        self._months: List[Path] = []
+        self._months_mtime: Optional[float] = None
+        # Per-user index of each cached manifest: player -> (offset, length), or None when unindexed
+        self._manifests: "OrderedDict[Path, Dict[str, Optional[Tuple[int, int]]]]" = OrderedDict()
+        self._rows: "OrderedDict[Tuple[Path, str], List[Dict[str, Any]]]" = OrderedDict()
+
+    async def archive(self) -> int:
+        """Export and drop expired partitions on every shard; returns the partitions archived"""
+        if not mysql_db.pool:
+            return 0
+        archived = 0
+        for shard in shard_router.names:
+            try:
+                archived += await self._archive_shard(shard)
+            except Exception as e:
+                logger.error(f"Error archiving matches on shard {shard}: {e}")
+        return archived
+
+    async def _archive_shard(self, shard: str) -> int:
+        cutoff = add_months(month_start(datetime.utcnow()), -self.retention_months)
+        async with shard_router.shard_connection(shard) as conn, conn.cursor() as cursor:
+            # One archiver per server; other workers skip this run
+            await cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+            (locked,) = await cursor.fetchone()
+            if not locked:
+                return 0
+            try:
+                # Shard tables created before partitioning are converted here
+                await partition_matches(cursor)
+                await ensure_future_partitions(cursor)
+                expired = [
+                    name for name in await list_partitions(cursor)
+                    if partition_month(name) and partition_month(name) < cutoff
+                ]
+                for name in expired:
+                    rows = await self._export_partition(conn, shard, name)
+                    await cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {name}")
+                    logger.info(f"Archived {rows} matches from {TABLE} partition {name} on shard {shard}")
+                return len(expired)
+            finally:
+                await cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                await cursor.fetchone()
+
+    async def _export_partition(self, conn, shard: str, name: str) -> int:
+        """Stream one partition into its archive file and manifest; returns the row count"""
+        month_dir = self.archive_dir / name[1:]
+        month_dir.mkdir(parents=True, exist_ok=True)
+        data_path = month_dir / f"{shard}.ndjson.gz"
+        tmp_path = data_path.with_name(data_path.name + ".tmp")
+
+        users: Dict[str, List[int]] = {}
+        rows = 0
+        first_match = last_match = None
+        offset = 0
+        current_user: Optional[str] = None
+        member = bytearray()
+
+        def write_member(handle, user_id: str, data: bytes) -> int:
+            compressed = gzip.compress(data)
+            handle.write(compressed)
+            users[user_id] = [data.count(b"\n"), offset, len(compressed)]
+            return len(compressed)
+
+        handle = open(tmp_path, "wb")
+        try:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                # Grouped by player (idx_user_match_date) so each player becomes one member
+                await cursor.execute(f"SELECT * FROM {TABLE} PARTITION ({name}) ORDER BY user_id")
+                while True:
+                    batch = await cursor.fetchmany(self.batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        if row["user_id"] != current_user:
+                            if current_user is not None:
+                                offset += await asyncio.to_thread(write_member, handle, current_user, bytes(member))
+                            current_user, member = row["user_id"], bytearray()
+                        row["id"] = id_from_bytes(row["id"])
+                        first_match = min(first_match or row["match_date"], row["match_date"])
+                        last_match = max(last_match or row["match_date"], row["match_date"])
+                        member += ndjson_line(row)
+                    rows += len(batch)
+            if current_user is not None:
+                offset += await asyncio.to_thread(write_member, handle, current_user, bytes(member))
+        finally:
+            handle.close()
+
+        manifest = {
+            "partition": name,
+            "shard": shard,
+            "rows": rows,
+            "first_match": first_match.isoformat() if first_match else None,
+            "last_match": last_match.isoformat() if last_match else None,
+            "archived_at": datetime.utcnow().isoformat(),
+            "users": users,
+        }
+        await asyncio.to_thread(self._commit_files, tmp_path, data_path, manifest)
+        return rows
+
+    def _commit_files(self, tmp_path: Path, data_path: Path, manifest: Dict[str, Any]):
+        """Make the data file durable before the manifest that makes it visible to readers"""
+        with open(tmp_path, "rb") as handle:
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, data_path)
+        _write_atomic(data_path.with_name(data_path.name.replace(".ndjson.gz", ".json")), json.dumps(manifest).encode("utf-8"))
+        self._manifests.pop(data_path, None)
+        for key in [key for key in self._rows if key[0] == data_path]:
+            del self._rows[key]
+
+    def _month_dirs(self) -> List[Path]:
+        """Archived month directories, newest first (re-listed only when the directory changes)"""
+        try:
+            mtime = self.archive_dir.stat().st_mtime
+        except FileNotFoundError:
+            return []
+        if mtime != self._months_mtime:
+            self._months = sorted(
+                (path for path in self.archive_dir.iterdir() if path.is_dir() and path.name.isdigit()),
+                reverse=True
+            )
+            self._months_mtime = mtime
+        return self._months
+
+    async def _user_index(self, data_path: Path) -> Dict[str, Optional[Tuple[int, int]]]:
+        """The manifest's per-user index, without the rest of the manifest"""
+        index = self._manifests.get(data_path)
+        if index is None:
+            manifest_path = data_path.with_name(data_path.name.replace(".ndjson.gz", ".json"))
+            manifest = json.loads(await asyncio.to_thread(manifest_path.read_bytes))
+            index = {
+                user_id: (entry[1], entry[2]) if isinstance(entry, list) else None
+                for user_id, entry in manifest["users"].items()
+            }
+            self._manifests[data_path] = index
+            if len(self._manifests) > self.manifest_cache_size:
+                self._manifests.popitem(last=False)
+        else:
+            self._manifests.move_to_end(data_path)
+        return index
+
+    async def _user_rows(self, data_path: Path, user_id: str, span: Optional[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        key = (data_path, user_id)
+        rows = self._rows.get(key)
+        if rows is None:
+            if span is None:
+                rows = await asyncio.to_thread(_scan_user_rows, data_path, user_id)
+            else:
+                rows = await asyncio.to_thread(_read_user_member, data_path, *span)
+            self._rows[key] = rows
+            if len(self._rows) > self.cache_size:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(key)
+        return rows
+
+    def data_files(self) -> List[Path]:
+        """Every committed archive data file, newest month first"""
+        return [
+            manifest_path.with_name(manifest_path.name.replace(".json", ".ndjson.gz"))
+            for month_dir in self._month_dirs()
+            for manifest_path in sorted(month_dir.glob("*.json"))
+        ]
+
+    async def matches_per_day(self, since: datetime, until: datetime) -> Dict[str, int]:
+        """Archived matches per day (YYYY-MM-DD) in [since, until), from every shard's file"""
+        counts: Dict[str, int] = {}
+        for month_dir in self._month_dirs():
+            month = partition_month(f"p{month_dir.name}")
+            if month >= until.date() or add_months(month, 1) <= since.date():
+                continue
+            for manifest_path in sorted(month_dir.glob("*.json")):
+                data_path = manifest_path.with_name(manifest_path.name.replace(".json", ".ndjson.gz"))
+                await asyncio.to_thread(_count_days, data_path, since, until, counts)
+        return counts
+
+    async def iter_user_matches(
+        self,
+        user_id: str,
+        before: Optional[Tuple[datetime, str]] = None,
+        since: Optional[datetime] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """A player's archived matches newest first, strictly older than `before` (match_date, id)"""
+        for month_dir in self._month_dirs():
+            month = partition_month(f"p{month_dir.name}")
+            if since and datetime.combine(add_months(month, 1), datetime.min.time()) <= since:
+                break
+
+            rows: List[Dict[str, Any]] = []
+            # A data file becomes visible once its manifest is written
+            for manifest_path in month_dir.glob("*.json"):
+                data_path = manifest_path.with_name(manifest_path.name.replace(".json", ".ndjson.gz"))
+                try:
+                    index = await self._user_index(data_path)
+                    if user_id in index:
+                        rows.extend(await self._user_rows(data_path, user_id, index[user_id]))
+                except Exception as e:
+                    # Skipping the file would silently drop matches from pages and exports
+                    logger.error(f"Error reading match archive {data_path}: {e}")
+                    raise
+            rows.sort(key=lambda row: (row["match_date"], row["id"]), reverse=True)
+            for row in rows:
+                if before and (row["match_date"], row["id"]) >= before:
+                    continue
+                yield dict(row)
+
+    async def find_user_matches(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[Tuple[datetime, str]] = None,
+        predicate: Callable[[Dict[str, Any]], bool] = lambda row: True,
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` archived matches of a player that satisfy `predicate`"""
+        matches = []
+        if limit <= 0:
+            return matches
+        async for row in self.iter_user_matches(user_id, before, since):
+            if predicate(row):
+                matches.append(row)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+# Global match archive instance
+match_archive = MatchArchive()
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable], stop_timeout: float = 30):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.stop_timeout = stop_timeout
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        """Start running the job in the background"""
+        if self._task is None or self._task.done():
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=f"periodic:{self.name}")
+
+    async def stop(self):
+        """Stop the loop, letting a run in progress finish (cancelled after `stop_timeout` seconds)"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), self.stop_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Periodic task {self.name} still running after {self.stop_timeout}s, cancelling it")
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        """Invoke the job every `interval` seconds, logging (not propagating) failures"""
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Periodic task {self.name} failed: {e}")
+
+class TaskScheduler:
+    def __init__(self):
+        self.tasks: Dict[str, PeriodicTask] = {}
+        self.running = False
+
+    def add(self, name: str, interval: float, func: Callable[[], Awaitable]) -> PeriodicTask:
+        """Register a periodic job; it starts immediately if the scheduler is running"""
+        task = PeriodicTask(name, interval, func)
+        self.tasks[name] = task
+        if self.running:
+            task.start()
+        return task
+
+    def start(self):
+        """Start all registered jobs"""
+        self.running = True
+        for task in self.tasks.values():
+            task.start()
+        logger.info(f"Scheduler started with {len(self.tasks)} periodic tasks")
+
+    async def stop(self):
+        """Stop all registered jobs"""
+        self.running = False
+        for task in self.tasks.values():
+            await task.stop()
+
+# Global scheduler instance
+scheduler = TaskScheduler()
@@ -0,0 +1,217 @@
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiomysql
+import numpy as np
+
+from database.mysql import mysql_db
+from models.cs2_stats import CS2Rank
+
+logger = logging.getLogger(__name__)
+
+# Numeric cs2_player_stats columns covered by the distribution snapshot
+DISTRIBUTION_STATS = [
+    "kd_ratio", "win_rate", "headshot_percentage", "adr",
+    "rank_rating", "total_kills", "matches_played", "mvp_count"
+]
+SUMMARY_PERCENTILES = [10, 25, 50, 75, 90, 95, 99]
+RANKS = list(CS2Rank)
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / "data" / "snapshots"
+
+# File layout: MAGIC | header length (uint32) | JSON header (summary, shape) | padding |
+# sorted values as little-endian float64. Values and summary are one file, so a
+# reader never sees them from different refreshes.
+MAGIC = b"PDIST001"
+HEADER_LENGTH = struct.Struct("<I")
+ALIGNMENT = 8
+
+def write_distributions(path: Path, sorted_values: np.ndarray, summary: Dict[str, Any]):
+    """Write a distribution snapshot atomically (per-process temp file, fsync, rename)"""
+    data = np.ascontiguousarray(sorted_values, dtype="<f8")
+    header = json.dumps({"shape": list(data.shape), "summary": summary}).encode("utf-8")
+    data_start = (len(MAGIC) + HEADER_LENGTH.size + len(header) + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        f.seek(data_start)
+        f.write(data.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_distributions(path: Path):
+    """Memory-map a distribution snapshot; returns (sorted values, summary)"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC:
+        mapped.close()
+        raise ValueError(f"{path} is not a stats distribution snapshot")
+    (header_length,) = HEADER_LENGTH.unpack_from(mapped, len(MAGIC))
+    header_start = len(MAGIC) + HEADER_LENGTH.size
+    header = json.loads(mapped[header_start:header_start + header_length])
+    data_start = (header_start + header_length + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+    rows, columns = header["shape"]
+    values = np.frombuffer(mapped, dtype="<f8", count=rows * columns, offset=data_start).reshape(rows, columns)
+    return values, header["summary"]
+
+def compute_distributions(values: np.ndarray, rank_codes: np.ndarray, bins: int = 20) -> Dict[str, Any]:
+    """Compute sorted columns, percentiles, histograms and per-rank distributions in one pass
+
+    `values` has one row per player and one column per entry of DISTRIBUTION_STATS;
+    `rank_codes` holds each player's index into RANKS.
+    """
+    player_count = values.shape[0]
+    sorted_values = np.sort(values, axis=0).T.copy()  # one contiguous sorted row per stat
+
+    summary: Dict[str, Any] = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "player_count": int(player_count),
+        "stats": {},
+        "by_rank": {},
+    }
+    if player_count == 0:
+        return {"sorted_values": sorted_values, "summary": summary}
+
+    percentiles = np.percentile(values, SUMMARY_PERCENTILES, axis=0)
+    means = values.mean(axis=0)
+
+    # Per-rank counts and means via bincount over every column at once
+    rank_counts = np.bincount(rank_codes, minlength=len(RANKS))
+    rank_sums = np.stack([
+        np.bincount(rank_codes, weights=values[:, column], minlength=len(RANKS))
+        for column in range(values.shape[1])
+    ], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rank_means = rank_sums / rank_counts[:, None]
+
+    for column, stat in enumerate(DISTRIBUTION_STATS):
+        counts, edges = np.histogram(values[:, column], bins=bins)
+        summary["stats"][stat] = {
+            "mean": float(means[column]),
+            "min": float(sorted_values[column, 0]),
+            "max": float(sorted_values[column, -1]),
+            "percentiles": {str(p): float(percentiles[i, column]) for i, p in enumerate(SUMMARY_PERCENTILES)},
+            "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+        }
+
+    for rank_index in np.nonzero(rank_counts)[0]:
+        summary["by_rank"][RANKS[rank_index].value] = {
+            "player_count": int(rank_counts[rank_index]),
+            "means": {stat: float(rank_means[rank_index, column]) for column, stat in enumerate(DISTRIBUTION_STATS)},
+        }
+
+    return {"sorted_values": sorted_values, "summary": summary}
+
+class StatsDistributionService:
+    """Periodic percentile/histogram snapshot over cs2_player_stats, served from a memory-mapped file"""
+
+    def __init__(self):
+        self.snapshot_dir = Path(os.environ.get('STATS_SNAPSHOT_DIR', DEFAULT_SNAPSHOT_DIR))
+        self.refresh_interval = float(os.environ.get('STATS_DISTRIBUTION_REFRESH_INTERVAL', 900))
+        self.histogram_bins = int(os.environ.get('STATS_DISTRIBUTION_BINS', 20))
+        self.sorted_values: Optional[np.ndarray] = None
+        self.summary: Optional[Dict[str, Any]] = None
+
+    @property
+    def path(self) -> Path:
+        return self.snapshot_dir / "distributions.snap"
+
+    @property
+    def available(self) -> bool:
+        return self.sorted_values is not None and self.summary is not None
+
+    def load(self) -> bool:
+        """Memory-map the last written snapshot, if any"""
+        try:
+            if not self.path.exists():
+                return False
+            self.sorted_values, self.summary = read_distributions(self.path)
+            logger.info(f"Loaded stats distribution snapshot ({self.summary.get('player_count', 0)} players)")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading stats distribution snapshot: {e}")
+            return False
+
+    async def refresh(self) -> bool:
+        """Recompute the distributions (one worker at a time) and map the newest snapshot"""
+        if not mysql_db.pool:
+            return False
+
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.snapshot_dir / "distributions.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is writing; pick up whatever is current
+                return self.load()
+
+            try:
+                if not (self.path.exists() and time.time() - os.stat(self.path).st_mtime < self.refresh_interval / 2):
+                    values, rank_codes = await self._load_columns()
+                    result = await asyncio.to_thread(compute_distributions, values, rank_codes, self.histogram_bins)
+                    await asyncio.to_thread(write_distributions, self.path, result["sorted_values"], result["summary"])
+            except Exception as e:
+                logger.error(f"Error refreshing stats distributions: {e}")
+                return False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return self.load()
+
+    async def _load_columns(self, batch_size: int = 5000):
+        """Read the numeric stat columns into a (players x stats) float array"""
+        rank_lookup = {rank.value: index for index, rank in enumerate(RANKS)}
+        unranked = RANKS.index(CS2Rank.UNRANKED)
+        value_batches: List[np.ndarray] = []
+        rank_batches: List[np.ndarray] = []
+
+        async with mysql_db.read_connection() as conn:
+            # Unbuffered, so only one batch of rows is held in memory at a time
+            async with conn.cursor(aiomysql.SSCursor) as cursor:
+                # A NULL stat would be NaN here and poison the sorted columns and the JSON summary
+                columns = ", ".join(f"COALESCE({stat}, 0)" for stat in DISTRIBUTION_STATS)
+                await cursor.execute(f"SELECT current_rank, {columns} FROM cs2_player_stats")
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    value_batches.append(np.array([row[1:] for row in rows], dtype=np.float64))
+                    rank_batches.append(np.array([rank_lookup.get(row[0], unranked) for row in rows], dtype=np.int64))
+
+        if not value_batches:
+            return np.empty((0, len(DISTRIBUTION_STATS))), np.empty(0, dtype=np.int64)
+        return np.concatenate(value_batches), np.concatenate(rank_batches)
+
+    def percentile_of(self, stat: str, value: float) -> Optional[float]:
+        """Share of players (0-100) with a value at or below `value`, by binary search"""
+        if not self.available or stat not in DISTRIBUTION_STATS:
+            return None
+        column = self.sorted_values[DISTRIBUTION_STATS.index(stat)]
+        if len(column) == 0:
+            return None
+        position = int(np.searchsorted(column, value, side="right"))
+        return round(position / len(column) * 100, 1)
+
+    def percentiles_for(self, stats: Dict[str, float]) -> Dict[str, Optional[float]]:
+        """Percentile of each known stat in `stats`"""
+        return {
+            stat: self.percentile_of(stat, float(stats[stat]))
+            for stat in DISTRIBUTION_STATS
+            if stats.get(stat) is not None
+        }
+
+# Global stats distribution service instance
+stats_distribution_service = StatsDistributionService()
@@ -0,0 +1,299 @@
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from datetime import timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from database.mysql import mysql_db
+from models.ids import id_from_bytes
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC | header length (uint32) | JSON header | padding | column data.
+# Numeric columns are fixed-width little-endian arrays; each string column is an
+# offsets array (uint64, rows + 1 entries) followed by one UTF-8 blob.
+MAGIC = b"PSNAP002"
+HEADER_LENGTH = struct.Struct("<I")
+ALIGNMENT = 8
+
+NUMERIC_COLUMNS = {
+    "total_kills": "<i8",
+    "total_deaths": "<i8",
+    "total_assists": "<i8",
+    "kd_ratio": "<f8",
+    "headshot_percentage": "<f8",
+    "accuracy": "<f8",
+    "matches_played": "<i8",
+    "matches_won": "<i8",
+    "matches_lost": "<i8",
+    "matches_drawn": "<i8",
+    "win_rate": "<f8",
+    "rank_rating": "<i8",
+    "average_score": "<f8",
+    "mvp_count": "<i8",
+    "adr": "<f8",
+    "kast": "<f8",
+    "total_playtime_hours": "<f8",
+    "clutch_wins": "<i8",
+    "clutch_attempts": "<i8",
+    "first_kills": "<i8",
+    "first_deaths": "<i8",
+    "flashbang_assists": "<i8",
+    "current_streak": "<i8",
+    "last_match_date": "<f8",
+    "created_at": "<f8",
+    "updated_at": "<f8",
+}
+# Stored as UTC epoch seconds, NaN for NULL
+TIMESTAMP_COLUMNS = ["last_match_date", "created_at", "updated_at"]
+# user_id must stay first: rows are sorted by it for binary search
+STRING_COLUMNS = [
+    "user_id", "username", "display_name", "current_rank", "peak_rank",
+    "id", "favorite_map", "streak_type", "recent_matches"
+]
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent / "data" / "snapshots"
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def write_snapshot(path: Path, numeric: Dict[str, np.ndarray], strings: Dict[str, List[Optional[str]]]):
+    """Write a columnar snapshot to `path` atomically (temp file, fsync, rename)"""
+    row_count = len(strings["user_id"])
+    header: Dict[str, Any] = {"row_count": row_count, "generated_at": time.time(), "numeric": {}, "strings": {}}
+
+    # Lay out every column first so the header can record absolute offsets
+    blocks = []
+    encoded_strings = {}
+    for name, dtype in NUMERIC_COLUMNS.items():
+        data = np.ascontiguousarray(numeric[name], dtype=dtype).tobytes()
+        blocks.append((name, "numeric", data))
+    for name in STRING_COLUMNS:
+        values = [(value or "").encode("utf-8") for value in strings[name]]
+        offsets = np.zeros(row_count + 1, dtype="<u8")
+        np.cumsum([len(value) for value in values], out=offsets[1:])
+        encoded_strings[name] = (offsets.tobytes(), b"".join(values))
+
+    # The header size depends on the offsets it contains; iterate until stable
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, _, data in blocks:
+            header["numeric"][name] = {"dtype": NUMERIC_COLUMNS[name], "offset": offset}
+            offset = _align(offset + len(data))
+        for name, (offsets, blob) in encoded_strings.items():
+            header["strings"][name] = {"offsets": offset, "data": _align(offset + len(offsets)), "length": len(blob)}
+            offset = _align(_align(offset + len(offsets)) + len(blob))
+        header_bytes = json.dumps(header).encode("utf-8")
+        required_start = _align(len(MAGIC) + HEADER_LENGTH.size + len(header_bytes))
+        if required_start == data_start:
+            break
+        data_start = required_start
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for name, _, data in blocks:
+            f.seek(header["numeric"][name]["offset"])
+            f.write(data)
+        for name, (offsets, blob) in encoded_strings.items():
+            f.seek(header["strings"][name]["offsets"])
+            f.write(offsets)
+            f.seek(header["strings"][name]["data"])
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class PlayerStatsSnapshot:
+    """Read-only, memory-mapped view over a snapshot file"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a player stats snapshot")
+
+        (header_length,) = HEADER_LENGTH.unpack_from(self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + HEADER_LENGTH.size
+        header = json.loads(self._mmap[header_start:header_start + header_length])
+
+        self.row_count: int = header["row_count"]
+        self.generated_at: float = header["generated_at"]
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.frombuffer(self._mmap, dtype=spec["dtype"], count=self.row_count, offset=spec["offset"])
+            for name, spec in header["numeric"].items()
+        }
+        self._strings = {
+            name: (
+                np.frombuffer(self._mmap, dtype="<u8", count=self.row_count + 1, offset=spec["offsets"]),
+                spec["data"]
+            )
+            for name, spec in header["strings"].items()
+        }
+        self._rankings: Dict[str, np.ndarray] = {}
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.generated_at
+
+    def string(self, column: str, row: int) -> str:
+        """Read one string cell straight from the mapped file"""
+        offsets, data_start = self._strings[column]
+        return self._mmap[data_start + int(offsets[row]):data_start + int(offsets[row + 1])].decode("utf-8")
+
+    def find(self, user_id: str) -> Optional[int]:
+        """Row index of a user, by binary search over the sorted user_id column"""
+        low, high = 0, self.row_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.string("user_id", middle) < user_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.row_count and self.string("user_id", low) == user_id:
+            return low
+        return None
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Materialize one row as a dict"""
+        row = {name: self.string(name, index) for name in self._strings}
+        row.update({name: column[index].item() for name, column in self.columns.items()})
+        return row
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a user's stats row"""
+        index = self.find(user_id)
+        return self.row(index) if index is not None else None
+
+    async def top(self, stat: str, limit: int) -> List[Dict[str, Any]]:
+        """Rows with the highest values of `stat`; the ordering is computed once per snapshot"""
+        if stat not in self._rankings:
+            # Sorting a million rows takes a few hundred ms: keep it off the event loop
+            self._rankings[stat] = await asyncio.to_thread(np.argsort, -self.columns[stat], kind="stable")
+        return [self.row(int(index)) for index in self._rankings[stat][:limit]]
+
+    def close(self):
+        self.columns = {}
+        self._strings = {}
+        self._rankings = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a view; the map is released when it is collected
+            pass
+
+class PlayerStatsSnapshotStore:
+    """Keeps the current snapshot mapped and periodically rebuilds it from MySQL"""
+
+    def __init__(self):
+        self.snapshot_dir = Path(os.environ.get('STATS_SNAPSHOT_DIR', DEFAULT_SNAPSHOT_DIR))
+        self.refresh_interval = float(os.environ.get('PLAYER_SNAPSHOT_REFRESH_INTERVAL', 300))
+        self.max_age = float(os.environ.get('PLAYER_SNAPSHOT_MAX_AGE', 900))
+        self.snapshot: Optional[PlayerStatsSnapshot] = None
+
+    @property
+    def path(self) -> Path:
+        return self.snapshot_dir / "player_stats.snap"
+
+    def current(self) -> Optional[PlayerStatsSnapshot]:
+        """The mapped snapshot, if it is fresh enough to serve"""
+        if self.snapshot and self.snapshot.age <= self.max_age:
+            return self.snapshot
+        return None
+
+    def load(self) -> bool:
+        """Map the snapshot file if it changed since it was last mapped"""
+        try:
+            if not self.path.exists():
+                return False
+            if self.snapshot and os.stat(self.path).st_ino == self.snapshot.inode:
+                return True
+
+            previous, self.snapshot = self.snapshot, PlayerStatsSnapshot(self.path)
+            if previous:
+                previous.close()
+            logger.info(f"Mapped player stats snapshot ({self.snapshot.row_count} players)")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading player stats snapshot: {e}")
+            return False
+
+    async def refresh(self) -> bool:
+        """Rebuild the snapshot (one worker at a time) and map the newest file"""
+        if not mysql_db.pool:
+            return self.load()
+
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.snapshot_dir / "player_stats.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is writing; pick up whatever is current
+                return self.load()
+
+            try:
+                if not (self.path.exists() and time.time() - os.stat(self.path).st_mtime < self.refresh_interval / 2):
+                    numeric, strings = await self._read_tables()
+                    await asyncio.to_thread(write_snapshot, self.path, numeric, strings)
+            except Exception as e:
+                logger.error(f"Error writing player stats snapshot: {e}")
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return self.load()
+
+    async def _read_tables(self, batch_size: int = 5000):
+        """Read cs2_player_stats and user display fields, sorted by user_id"""
+        numeric_names = list(NUMERIC_COLUMNS)
+        numeric_values: Dict[str, List] = {name: [] for name in numeric_names}
+        strings: Dict[str, List[Optional[str]]] = {name: [] for name in STRING_COLUMNS}
+
+        async with mysql_db.read_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(f"""
+                    SELECT s.user_id, u.username, u.display_name, s.current_rank, s.peak_rank,
+                           s.id, s.favorite_map, s.streak_type, s.recent_matches,
+                           {', '.join('s.' + name for name in numeric_names)}
+                    FROM cs2_player_stats s
+                    JOIN users u ON s.user_id = u.id
+                """)
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        for index, name in enumerate(STRING_COLUMNS):
+                            strings[name].append(id_from_bytes(row[index]) if name == "id" else row[index])
+                        for index, name in enumerate(numeric_names, start=len(STRING_COLUMNS)):
+                            value = row[index]
+                            if name in TIMESTAMP_COLUMNS:
+                                value = value.replace(tzinfo=timezone.utc).timestamp() if value else math.nan
+                            numeric_values[name].append(value or 0)
+
+        # Order rows by Python string comparison, which is what find() relies on
+        order = sorted(range(len(strings["user_id"])), key=strings["user_id"].__getitem__)
+        strings = {name: [values[i] for i in order] for name, values in strings.items()}
+        numeric = {
+            name: np.array([float(values[i]) for i in order], dtype=NUMERIC_COLUMNS[name])
+            for name, values in numeric_values.items()
+        }
+        return numeric, strings
+
+# Global player stats snapshot store
+player_stats_snapshot = PlayerStatsSnapshotStore()
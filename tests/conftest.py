@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend modules import each other as top-level packages (services, database, ...)
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+# The repositories build their Motor clients at import; clients connect lazily
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "projecttest_tests")
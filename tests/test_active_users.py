@@ -0,0 +1,51 @@
+import asyncio
+import math
+
+import pytest
+
+from services.active_users import ActiveUserTracker, HyperLogLog, accuracy_check
+
+@pytest.mark.parametrize("precision", [12, 14])
+def test_accuracy_within_three_standard_errors(precision):
+    standard_error = 1.04 / math.sqrt(1 << precision)
+    results = accuracy_check(users=50000, days=30, daily_fraction=0.05, precision=precision)
+
+    assert [result["window"] for result in results] == ["dau", "wau", "mau"]
+    for result in results:
+        assert abs(result["error"]) <= 3 * standard_error, result
+
+def test_small_cardinalities_are_exact_enough():
+    sketch = HyperLogLog(14)
+    for index in range(100):
+        sketch.add(f"user-{index}")
+    assert abs(sketch.count() - 100) <= 2
+
+def test_merge_is_a_union():
+    left, right = HyperLogLog(14), HyperLogLog(14)
+    for index in range(3000):
+        left.add(f"user-{index}")
+        right.add(f"user-{index + 1000}")
+    assert abs(left.merge(right).count() - 4000) <= 4000 * 3 * 1.04 / math.sqrt(1 << 14)
+
+def test_cancelled_flush_keeps_unwritten_days():
+    tracker = ActiveUserTracker()
+    tracker.record("a")
+    tracker.pending["2025-01-01"] = HyperLogLog(tracker.precision)
+    tracker.pending["2025-01-01"].add("b")
+    started = asyncio.Event()
+
+    async def blocking_merge(day, sketch, attempts=5):
+        started.set()
+        await asyncio.Event().wait()
+
+    tracker._merge_into_store = blocking_merge
+
+    async def run():
+        task = asyncio.create_task(tracker.flush())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert len(tracker.pending) == 2
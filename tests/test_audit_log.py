@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+import repositories.admin as admin
+from services.audit_log import AuditLogWriter
+
+def _log(index, action="update_user_role"):
+    created_at = datetime(2025, 3, 1) + timedelta(hours=index)
+    return {"_id": f"log-{index}", "id": f"log-{index}", "action": action, "created_at": created_at}
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = AuditLogWriter()
+    writer.batch_size = 2
+    writer.max_pending = 4
+    writer.spill_path = tmp_path / "audit_log_spill.ndjson"
+    return writer
+
+@pytest.fixture
+def inserts(monkeypatch):
+    """Replace the Mongo insert; set `fail` to make it report a failed batch"""
+    state = {"batches": [], "fail": False}
+
+    async def insert_activity_logs(logs):
+        if state["fail"]:
+            return False
+        state["batches"].append([log["id"] for log in logs])
+        return True
+
+    monkeypatch.setattr(admin.admin_repository, "insert_activity_logs", insert_activity_logs)
+    return state
+
+def _ids(writer):
+    return [log["id"] for log in writer.pending]
+
+def test_failed_batch_is_requeued_in_order(writer, inserts):
+    writer.pending.extend(_log(index) for index in range(3))
+    inserts["fail"] = True
+
+    assert asyncio.run(writer.flush()) == 0
+    assert _ids(writer) == ["log-0", "log-1", "log-2"]
+    assert writer.stats["failed_flushes"] == 1
+
+    inserts["fail"] = False
+    assert asyncio.run(writer.flush()) == 3
+    assert inserts["batches"] == [["log-0", "log-1"], ["log-2"]]
+    assert not writer.pending
+
+def test_cancelled_insert_keeps_the_batch(writer, monkeypatch):
+    started = asyncio.Event()
+
+    async def blocking_insert(logs):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(admin.admin_repository, "insert_activity_logs", blocking_insert)
+    writer.pending.extend(_log(index) for index in range(3))
+
+    async def run():
+        task = asyncio.create_task(writer.flush())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert _ids(writer) == ["log-0", "log-1", "log-2"]
+
+def test_overflow_spills_the_oldest_batch_and_recovers_it(writer, inserts):
+    inserts["fail"] = True
+
+    async def record_all():
+        for index in range(5):
+            await writer.record(_log(index))
+        # Let the early flushes started by full batches finish
+        await asyncio.sleep(0)
+        if writer._flush_task:
+            await writer._flush_task
+
+    asyncio.run(record_all())
+    assert _ids(writer) == ["log-2", "log-3", "log-4"]
+    assert writer.stats["spilled"] == 2
+    assert writer.spill_path.exists()
+
+    inserts["fail"] = False
+    assert asyncio.run(writer.flush()) == 3
+    # An empty queue picks up the spill file
+    assert asyncio.run(writer.flush()) == 2
+    assert inserts["batches"][-1] == ["log-0", "log-1"]
+    assert writer.stats["recovered"] == 2
+    assert not list(writer.spill_path.parent.glob("*.recovering.*"))
+
+def test_close_spills_unwritten_logs_for_the_next_worker(writer, inserts):
+    inserts["fail"] = True
+    writer.pending.extend(_log(index) for index in range(3))
+    asyncio.run(writer.close())
+    assert not writer.pending
+
+    successor = AuditLogWriter()
+    successor.spill_path = writer.spill_path
+    inserts["fail"] = False
+    assert asyncio.run(successor.flush()) == 3
+    assert inserts["batches"] == [["log-0", "log-1", "log-2"]]
+    assert successor.stats["recovered"] == 3
+    assert not writer.spill_path.exists()
+
+def test_spilled_logs_keep_their_timestamps(writer):
+    logs = [_log(index) for index in range(2)]
+    writer._spill(logs)
+    writer._load_spill()
+    assert [log["created_at"] for log in writer.pending] == [log["created_at"] for log in logs]
+
+class FakeActivityLogs:
+    def __init__(self, error=None):
+        self.error = error
+
+    async def insert_many(self, logs, ordered=True):
+        if self.error:
+            raise self.error
+
+@pytest.fixture
+def rollups(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        admin.platform_rollup_repository, "record_admin_actions",
+        lambda actions, day: recorded.append((day, sorted(actions)))
+    )
+    return recorded
+
+def _insert(error, logs):
+    repository = admin.AdminRepository()
+    repository.activity_logs_collection = FakeActivityLogs(error)
+    return asyncio.run(repository.insert_activity_logs(logs))
+
+def test_retry_counts_logs_stored_by_a_failed_attempt(rollups):
+    logs = [_log(0, "ban_user"), _log(1), _log(30)]
+    # log-0 was stored by an earlier attempt that then failed
+    error = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}], "writeConcernErrors": []})
+
+    assert _insert(error, logs) is True
+    assert rollups == [
+        (datetime(2025, 3, 1), ["ban_user", "update_user_role"]),
+        (datetime(2025, 3, 2), ["update_user_role"]),
+    ]
+
+def test_failed_insert_records_no_rollups(rollups):
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 121}], "writeConcernErrors": []})
+    assert _insert(error, [_log(0), _log(1)]) is False
+    assert _insert(RuntimeError("connection reset"), [_log(0)]) is False
+    assert rollups == []
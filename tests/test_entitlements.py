@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import services.entitlements as entitlements
+from middleware.auth import require_entitlement
+from services.entitlements import TierChangeRegistry, entitlements_for
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable time.time() for the entitlements module"""
+    now = [1_750_000_000.0]
+    monkeypatch.setattr(entitlements, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+def test_claim_expires_after_the_ttl(clock):
+    registry = TierChangeRegistry()
+    registry.claim_ttl = 300
+    claim = registry.claim(None)
+
+    assert claim == {"tier": None, "iat": clock[0], "exp": int(clock[0]) + 300}
+    assert registry.is_current("user", claim)
+    clock[0] += 300
+    assert not registry.is_current("user", claim)
+
+def test_claim_expires_with_the_tier(clock):
+    registry = TierChangeRegistry()
+    registry.claim_ttl = 300
+    tier_expires_at = datetime.fromtimestamp(clock[0] + 60, timezone.utc).replace(tzinfo=None)
+    claim = registry.claim({"tier": "gold", "expires_at": tier_expires_at})
+
+    assert claim["tier"] == "gold"
+    assert claim["exp"] == int(clock[0]) + 60
+
+def test_tier_change_invalidates_older_claims(clock):
+    registry = TierChangeRegistry()
+    before = registry.claim({"tier": "gold", "expires_at": None})
+
+    clock[0] += 0.0004
+    registry.mark(["user"])
+    assert not registry.is_current("user", before)
+    assert registry.is_current("other-user", before)
+
+    clock[0] += 1
+    assert registry.is_current("user", registry.claim({"tier": "bronze", "expires_at": None}))
+
+def test_missing_claim_is_not_current():
+    assert not TierChangeRegistry().is_current("user", None)
+
+def test_mark_forgets_changes_older_than_a_claim_lifetime(clock):
+    registry = TierChangeRegistry()
+    registry.claim_ttl = 300
+    registry.mark([f"old-{index}" for index in range(10001)])
+    clock[0] += 301
+    registry.mark(["new"])
+    assert list(registry.changed_at) == ["new"]
+
+def test_higher_tiers_include_lower_perks():
+    assert entitlements_for(None) == []
+    assert "supporter_chat" in entitlements_for("silver")
+    assert "advanced_analytics" not in entitlements_for("silver")
+    assert set(entitlements_for("gold")) < set(entitlements_for("elite"))
+
+def _payload(claim):
+    return {"user_id": "entitled-user", "ent": claim}
+
+def test_require_entitlement_checks_the_claim():
+    check = require_entitlement("advanced_analytics")
+    registry = entitlements.tier_changes
+
+    payload = _payload(registry.claim({"tier": "gold", "expires_at": None}))
+    assert check(payload) is payload
+
+    with pytest.raises(HTTPException) as error:
+        check(_payload(registry.claim({"tier": "silver", "expires_at": None})))
+    assert error.value.status_code == 403
+
+    for claim in (None, {"tier": "gold", "iat": 0, "exp": 1}):
+        with pytest.raises(HTTPException) as error:
+            check(_payload(claim))
+        assert error.value.status_code == 401
@@ -0,0 +1,39 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from models.ids import new_id
+from repositories.admin import decode_activity_cursor, encode_activity_cursor
+from repositories.cs2_stats import decode_match_cursor, encode_match_cursor
+
+def test_match_cursor_round_trip():
+    match_date, match_id = datetime(2025, 3, 1, 12, 30, 5, 123000), new_id()
+    cursor = encode_match_cursor(match_date, match_id)
+
+    assert decode_match_cursor(cursor) == (match_date, match_id)
+    # Cursors travel in query strings
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", encode_match_cursor(datetime(2025, 1, 1), "not-a-uuid")])
+def test_malformed_match_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_match_cursor(cursor)
+
+def test_match_cursor_rejects_bad_date():
+    cursor = base64.urlsafe_b64encode(f"yesterday|{new_id()}".encode()).decode()
+    with pytest.raises(ValueError):
+        decode_match_cursor(cursor)
+
+def test_activity_cursor_round_trip():
+    created_at, log_id = datetime(2025, 3, 1, 8, 0, 0, 250000), new_id()
+    assert decode_activity_cursor(encode_activity_cursor(created_at, log_id)) == (created_at, log_id)
+
+def test_activity_cursor_keeps_separators_in_the_id():
+    created_at = datetime(2025, 3, 1)
+    assert decode_activity_cursor(encode_activity_cursor(created_at, "a|b")) == (created_at, "a|b")
+
+@pytest.mark.parametrize("cursor", ["", "%%%", "bm8tc2VwYXJhdG9y"])
+def test_malformed_activity_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_activity_cursor(cursor)
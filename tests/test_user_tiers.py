@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from pymongo import DeleteOne, ReplaceOne
+
+from repositories.admin import AdminRepository
+from services.entitlements import tier_changes
+
+class FakeDonations:
+    """Serves the per-user result of the effective-tier aggregation"""
+
+    def __init__(self, newest_active):
+        self.newest_active = newest_active
+        self.pipelines = []
+
+    async def aggregate(self, pipeline, allowDiskUse=False):
+        self.pipelines.append(pipeline)
+        wanted = pipeline[0]["$match"].get("user_id", {}).get("$in")
+        for user_id, donation in self.newest_active.items():
+            if wanted is None or user_id in wanted:
+                yield {"_id": user_id, "donation": donation}
+
+class FakeUserTiers:
+    def __init__(self, docs=None):
+        self.docs = {doc["_id"]: doc for doc in docs or []}
+        self.finds = 0
+
+    async def bulk_write(self, operations, ordered=True):
+        upserted = deleted = 0
+        for operation in operations:
+            user_id = operation._filter["_id"]
+            if isinstance(operation, ReplaceOne):
+                upserted += user_id not in self.docs
+                self.docs[user_id] = operation._doc
+            elif isinstance(operation, DeleteOne):
+                deleted += self.docs.pop(user_id, None) is not None
+        modified = len(operations) - upserted - deleted
+        return SimpleNamespace(upserted_count=upserted, modified_count=modified, deleted_count=deleted)
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        cutoff = query["expires_at"]["$lte"]
+        expired = [{"_id": doc["_id"]} for doc in self.docs.values() if doc["expires_at"] and doc["expires_at"] <= cutoff]
+        return _Cursor(expired)
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+def _donation(tier, expires_at, donation_id="d1"):
+    return {"id": donation_id, "tier": tier, "expires_at": expires_at, "created_at": datetime(2025, 1, 1), "amount": 10.0}
+
+def _repository(newest_active, tiers=None):
+    repository = AdminRepository()
+    repository.donations_collection = FakeDonations(newest_active)
+    repository.user_tiers_collection = FakeUserTiers(tiers)
+    return repository
+
+def test_recompute_writes_current_tiers_and_removes_lapsed_ones():
+    later = datetime.utcnow() + timedelta(days=30)
+    repository = _repository(
+        {"gold": _donation("gold", later), "lifetime": _donation("diamond", None, "d2")},
+        [{"_id": "lapsed", "tier": "bronze", "expires_at": datetime(2024, 1, 1)}]
+    )
+
+    written = asyncio.run(repository.recompute_user_tiers(["gold", "lifetime", "lapsed", "gold"]))
+
+    assert written == 3
+    docs = repository.user_tiers_collection.docs
+    assert set(docs) == {"gold", "lifetime"}
+    assert docs["gold"]["tier"] == "gold" and docs["gold"]["expires_at"] == later
+    assert docs["lifetime"]["expires_at"] is None and docs["lifetime"]["donation_id"] == "d2"
+    match = repository.donations_collection.pipelines[0][0]["$match"]
+    assert match["status"] == "completed" and set(match["user_id"]["$in"]) == {"gold", "lifetime", "lapsed"}
+
+def test_recompute_invalidates_entitlement_claims():
+    repository = _repository({})
+    before = tier_changes.claim(None)
+
+    asyncio.run(repository.recompute_user_tiers(["tier-change-user"]))
+
+    assert not tier_changes.is_current("tier-change-user", before)
+
+def test_recompute_of_nobody_writes_nothing():
+    repository = _repository({})
+    assert asyncio.run(repository.recompute_user_tiers([])) == 0
+    assert repository.donations_collection.pipelines == []
+
+def test_expiry_sweeps_in_batches_until_done():
+    expired = [{"_id": f"user-{index}", "tier": "bronze", "expires_at": datetime(2024, 1, 1)} for index in range(5)]
+    current = {"_id": "current", "tier": "gold", "expires_at": datetime.utcnow() + timedelta(days=1)}
+    repository = _repository({}, expired + [current])
+    repository.tier_expiry_batch_size = 2
+
+    processed = asyncio.run(repository.expire_user_tiers())
+
+    assert processed == 5
+    assert set(repository.user_tiers_collection.docs) == {"current"}
+    # Two full batches, then a short one ends the sweep
+    assert repository.user_tiers_collection.finds == 3
+
+def test_unswept_expired_tier_is_not_served():
+    repository = _repository({}, [
+        {"_id": "lapsed", "tier": "gold", "expires_at": datetime(2024, 1, 1),
+         "purchased_at": datetime(2023, 1, 1), "amount_paid": 10.0}
+    ])
+    assert asyncio.run(repository.get_user_tier_info("lapsed")) is None